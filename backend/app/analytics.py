@@ -0,0 +1,343 @@
+from datetime import date, timedelta
+from itertools import chain
+from typing import Optional
+from sqlalchemy import Date, Float, Integer, case, cast, func, literal, select
+from sqlalchemy.orm import Session
+from .cache import TTLCache
+from .models import Account, Category, Transaction
+from . import crud, fx
+import numpy as np
+import os
+
+# Analytics work on a user's whole history as NumPy columns. Fetching them is
+# the expensive part (one DBAPI tuple per transaction), so each process keeps
+# the columns it last loaded per user and reuses them until the user's data
+# version changes (every write bumps it, see crud.get_data_version).
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "600"))
+ANALYTICS_CACHE_MAX_USERS = int(os.getenv("ANALYTICS_CACHE_MAX_USERS", "32"))
+
+column_cache = TTLCache(ANALYTICS_CACHE_TTL_SECONDS, ANALYTICS_CACHE_MAX_USERS)
+
+EPOCH = date(1970, 1, 1)
+# Modified z-score of Iglewicz and Hoaglin: 0.6745 * (x - median) / MAD
+MAD_SCALE = 0.6745
+DEFAULT_THRESHOLDS = {"mad": 3.5, "zscore": 3.0}
+# Categories with fewer transactions than this are never flagged as anomalous
+MIN_ANOMALY_HISTORY = 8
+
+class Columns:
+    """A user's transactions as parallel arrays, amounts in `currency`"""
+    __slots__ = ("currency", "transaction_id", "day", "amount", "account_id", "category_id", "is_income")
+
+    def __init__(self, currency: str, rows: list):
+        data = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=len(rows) * 6).reshape(-1, 6)
+        self.currency = currency
+        self.transaction_id = data[:, 0].astype(np.int64)
+        self.day = data[:, 1].astype(np.int64).astype("datetime64[D]")
+        self.amount = data[:, 2]
+        self.account_id = data[:, 3].astype(np.int64)
+        self.category_id = data[:, 4].astype(np.int64)
+        self.is_income = data[:, 5].astype(bool)
+
+    def __len__(self):
+        return len(self.amount)
+
+    def of_type(self, transaction_type: str) -> np.ndarray:
+        """Boolean mask of the rows of one transaction_type"""
+        return self.is_income if transaction_type == "income" else ~self.is_income
+
+def _epoch_day_expr(db: Session):
+    """transaction_date as integer days since 1970-01-01"""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(Transaction.transaction_date - literal(EPOCH, Date), Integer)
+    return cast(func.julianday(Transaction.transaction_date) - 2440587.5, Integer)
+
+def load_columns(db: Session, user_id: int) -> Columns:
+    """The user's transactions as Columns, from the cache while the data version holds.
+
+    A plain numeric column select read straight off the DBAPI cursor, with no
+    ORM objects or per-row result processing. Amounts in other currencies are
+    converted to the reporting currency (crud.resolve_reporting_currency).
+    """
+    currency, convert = crud.resolve_reporting_currency(db, user_id)
+    version, _ = crud.get_data_version(db, user_id)
+    cached = column_cache.get(user_id)
+    if cached is not None and cached[0] == (version, currency):
+        return cached[1]
+
+    stmt = select(
+        Transaction.transaction_id,
+        _epoch_day_expr(db),
+        cast(Transaction.amount, Float),
+        Transaction.account_id,
+        Transaction.category_id,
+        case((Transaction.transaction_type == "income", 1), else_=0),
+    ).where(Transaction.user_id == user_id)
+    result = db.connection().execute(stmt)
+    try:
+        columns = Columns(currency, result.cursor.fetchall())
+    finally:
+        result.close()
+
+    if convert and len(columns):
+        account_currencies = dict(
+            db.query(Account.account_id, func.coalesce(Account.currency, fx.FX_BASE_CURRENCY))
+            .filter(Account.user_id == user_id)
+        )
+        accounts, inverse = np.unique(columns.account_id, return_inverse=True)
+        currencies = np.array([account_currencies[a] for a in accounts.tolist()], dtype=object)[inverse]
+        columns.amount = fx.get_rate_table(db).convert(columns.amount, currencies, columns.day, currency)
+    column_cache.set(user_id, ((version, currency), columns))
+    return columns
+
+def _category_names(db: Session, user_id: int) -> dict:
+    return dict(db.query(Category.category_id, Category.category_name).filter(Category.user_id == user_id))
+
+# Period bucketing. Months are counted from 1970-01; weeks start on Monday
+# (1970-01-01 was a Thursday, hence the 3-day shift).
+def _period_numbers(days: np.ndarray, interval: str) -> np.ndarray:
+    if interval == "week":
+        return (days.astype(np.int64) + 3) // 7
+    return days.astype("datetime64[M]").astype(np.int64)
+
+def _period_start(number: int, interval: str) -> date:
+    if interval == "week":
+        return EPOCH + timedelta(days=number * 7 - 3)
+    return date(1970 + number // 12, number % 12 + 1, 1)
+
+def _period_matrix(columns: Columns, mask: np.ndarray, interval: str, first: int, count: int):
+    """(category_ids, totals) with totals[c, p] the sum for category c in period first + p"""
+    periods = _period_numbers(columns.day[mask], interval) - first
+    in_range = (periods >= 0) & (periods < count)
+    categories = columns.category_id[mask][in_range]
+    category_ids, rows = np.unique(categories, return_inverse=True)
+    totals = np.bincount(
+        rows * count + periods[in_range],
+        weights=columns.amount[mask][in_range],
+        minlength=len(category_ids) * count,
+    ).astype(np.float64).reshape(len(category_ids), count)  # bincount of nothing is int64
+    return category_ids, totals
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing moving average along the last axis; the first window - 1
+    points average what is available so far"""
+    sums = np.cumsum(values, axis=-1)
+    sums[..., window:] = sums[..., window:] - sums[..., :-window]
+    return sums / np.minimum(np.arange(1, values.shape[-1] + 1), window)
+
+def linear_fit(values: np.ndarray):
+    """Least-squares (intercept, slope) of each row against 0, 1, ..., n - 1"""
+    count = values.shape[-1]
+    x = np.arange(count) - (count - 1) / 2
+    denominator = float(x @ x) or 1.0
+    slope = values @ x / denominator
+    intercept = values.mean(axis=-1) - slope * (count - 1) / 2
+    return intercept, slope
+
+def seasonal_index(values: np.ndarray, first_month_of_year: int) -> np.ndarray:
+    """Per row, each calendar month's average ratio to the centered 2x12
+    moving average, normalized to average 1 (classical multiplicative
+    decomposition; needs at least 24 months for every month to appear)"""
+    count = values.shape[-1]
+    trailing = moving_average(values, 12)
+    centered = (trailing[:, 12:] + trailing[:, 11:-1]) / 2  # at positions 6 .. count - 7
+    inner = values[:, 6:count - 6]
+    ratios = np.divide(inner, centered, out=np.ones_like(inner), where=centered > 0)
+    one_hot = np.eye(12)[(first_month_of_year + np.arange(6, count - 6)) % 12]
+    index = (ratios @ one_hot) / np.maximum(one_hot.sum(axis=0), 1)
+    mean = index.mean(axis=1, keepdims=True)
+    return np.divide(index, mean, out=np.ones_like(index), where=mean > 0)
+
+def group_order(groups: np.ndarray, group_count: int):
+    """Order that puts each group's rows together, and the split points between groups"""
+    order = np.argsort(groups, kind="stable")
+    return order, np.cumsum(np.bincount(groups, minlength=group_count))[:-1]
+
+def group_medians(values: np.ndarray, order: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Median of values per group (see group_order): one partition-based
+    np.median per category, never a loop over rows"""
+    return np.array([np.median(part) if len(part) else 0.0 for part in np.split(values[order], bounds)])
+
+def anomaly_scores(category_ids: np.ndarray, amounts: np.ndarray, method: str = "mad"):
+    """(score, center, group count) per amount, relative to its category.
+
+    mad: modified z-score around the category median, robust to the outliers
+    themselves; zscore: classic (x - mean) / std. Scores are 0 where the
+    category's spread is 0.
+    """
+    categories, groups = np.unique(category_ids, return_inverse=True)
+    counts = np.bincount(groups, minlength=len(categories))
+    if method == "zscore":
+        means = np.bincount(groups, weights=amounts, minlength=len(categories)) / np.maximum(counts, 1)
+        squares = np.bincount(groups, weights=amounts * amounts, minlength=len(categories)) / np.maximum(counts, 1)
+        spread = np.sqrt(np.maximum(squares - means * means, 0))
+        center, scale = means, spread
+    else:
+        order, bounds = group_order(groups, len(categories))
+        center = group_medians(amounts, order, bounds)
+        spread = group_medians(np.abs(amounts - center[groups]), order, bounds)
+        scale = spread / MAD_SCALE
+    deviation = amounts - center[groups]
+    scores = np.divide(deviation, scale[groups], out=np.zeros_like(deviation), where=scale[groups] > 0)
+    return scores, center[groups], counts[groups]
+
+def get_trends(
+    db: Session,
+    user_id: int,
+    transaction_type: str = "expense",
+    interval: str = "month",
+    periods: int = 12,
+    window: int = 3,
+    today: Optional[date] = None,
+):
+    """Per-category totals for the last `periods` periods (the current one
+    included), their trailing moving average and linear trend per period"""
+    columns = load_columns(db, user_id)
+    today = today or date.today()
+    last = int(_period_numbers(np.array([today], dtype="datetime64[D]"), interval)[0])
+    first = last - periods + 1
+    category_ids, totals = _period_matrix(columns, columns.of_type(transaction_type), interval, first, periods)
+    averages = moving_average(totals, window)
+    _, slopes = linear_fit(totals)
+    names = _category_names(db, user_id)
+    return {
+        "transaction_type": transaction_type,
+        "interval": interval,
+        "window": window,
+        "currency": columns.currency,
+        "periods": [_period_start(first + p, interval) for p in range(periods)],
+        "total": np.round(totals.sum(axis=0), 2).tolist(),
+        "categories": [
+            {
+                "category_id": category_id,
+                "category_name": names.get(category_id),
+                "totals": row_totals,
+                "moving_average": row_average,
+                "trend": row_slope,
+            } for category_id, row_totals, row_average, row_slope in zip(
+                category_ids.tolist(),
+                np.round(totals, 2).tolist(),
+                np.round(averages, 2).tolist(),
+                np.round(slopes, 2).tolist(),
+            )
+        ],
+    }
+
+def get_forecast(
+    db: Session,
+    user_id: int,
+    transaction_type: str = "expense",
+    method: str = "linear",
+    history: int = 24,
+    today: Optional[date] = None,
+):
+    """Per-category forecast for the current month from the `history` complete months before it.
+
+    linear extrapolates a least-squares trend; seasonal fits the trend to
+    seasonally adjusted totals and scales it by the month's seasonal index,
+    which needs at least 24 months of history (else linear is used).
+    """
+    columns = load_columns(db, user_id)
+    today = today or date.today()
+    target = int(_period_numbers(np.array([today], dtype="datetime64[D]"), "month")[0])
+    first = target - history
+    mask = columns.of_type(transaction_type)
+    category_ids, totals = _period_matrix(columns, mask, "month", first, history + 1)
+    past, month_to_date = totals[:, :history], totals[:, history]
+
+    used = method if method != "seasonal" or history >= 24 else "linear"
+    if used == "seasonal":
+        index = seasonal_index(past, first % 12)
+        month_of_year = (first + np.arange(history)) % 12
+        adjusted = np.divide(past, index[:, month_of_year], out=np.zeros_like(past), where=index[:, month_of_year] > 0)
+        intercept, slope = linear_fit(adjusted)
+        forecast = (intercept + slope * history) * index[:, target % 12]
+    else:
+        intercept, slope = linear_fit(past)
+        forecast = intercept + slope * history
+    forecast = np.maximum(forecast, 0)
+
+    names = _category_names(db, user_id)
+    return {
+        "transaction_type": transaction_type,
+        "method": used,
+        "history_months": history,
+        "currency": columns.currency,
+        "month": _period_start(target, "month"),
+        "forecast": round(float(forecast.sum()), 2),
+        "month_to_date": round(float(month_to_date.sum()), 2),
+        "categories": [
+            {
+                "category_id": category_id,
+                "category_name": names.get(category_id),
+                "forecast": row_forecast,
+                "month_to_date": row_actual,
+                "average": row_average,
+            } for category_id, row_forecast, row_actual, row_average in zip(
+                category_ids.tolist(),
+                np.round(forecast, 2).tolist(),
+                np.round(month_to_date, 2).tolist(),
+                np.round(past.mean(axis=1), 2).tolist(),
+            )
+        ],
+    }
+
+def get_anomalies(
+    db: Session,
+    user_id: int,
+    transaction_type: str = "expense",
+    method: str = "mad",
+    threshold: Optional[float] = None,
+    days: int = 90,
+    limit: int = 50,
+    today: Optional[date] = None,
+):
+    """Transactions of the last `days` days whose amount is unusual for their
+    category, scored against the category's whole history, highest score first"""
+    columns = load_columns(db, user_id)
+    today = today or date.today()
+    threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+    mask = columns.of_type(transaction_type)
+    scores, centers, counts = anomaly_scores(columns.category_id[mask], columns.amount[mask], method)
+
+    since = np.datetime64(today - timedelta(days=days), "D")
+    flagged = np.flatnonzero(
+        (np.abs(scores) > threshold) & (counts >= MIN_ANOMALY_HISTORY) & (columns.day[mask] > since)
+    )
+    flagged = flagged[np.argsort(-np.abs(scores[flagged]), kind="stable")][:limit]
+
+    transaction_ids = columns.transaction_id[mask][flagged].tolist()
+    details = {
+        row.transaction_id: row for row in db.query(
+            Transaction.transaction_id, Transaction.account_id, Transaction.category_id,
+            Transaction.description, Transaction.transaction_date, Transaction.amount,
+        ).filter(Transaction.transaction_id.in_(transaction_ids))
+    } if transaction_ids else {}
+    names = _category_names(db, user_id)
+    anomalies = []
+    for transaction_id, score, center, amount in zip(
+        transaction_ids, scores[flagged].tolist(), centers[flagged].tolist(), columns.amount[mask][flagged].tolist(),
+    ):
+        row = details.get(transaction_id)
+        if row is None:
+            continue
+        anomalies.append({
+            "transaction_id": transaction_id,
+            "account_id": row.account_id,
+            "category_id": row.category_id,
+            "category_name": names.get(row.category_id),
+            "description": row.description,
+            "transaction_date": row.transaction_date,
+            "amount": float(row.amount),
+            "converted_amount": round(amount, 2),
+            "typical_amount": round(center, 2),
+            "score": round(score, 2),
+        })
+    return {
+        "transaction_type": transaction_type,
+        "method": method,
+        "threshold": threshold,
+        "currency": columns.currency,
+        "since": today - timedelta(days=days),
+        "anomalies": anomalies,
+    }
@@ -6,10 +6,15 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from .database import SessionLocal
+from sqlalchemy.orm import Session, make_transient_to_detached
+from .database import get_db, run_db
 from .models import User
+from .cache import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,12 +29,34 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 security = HTTPBearer()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# In-process cache of authenticated users, keyed by token subject (username).
+# Entries are column snapshots, re-attached to the request session without a
+# query; routes that modify or delete the user must call invalidate_cached_user.
+# Invalidation only reaches this process, so the password hash is left out:
+# password checks read it from the row (verify_user_password), and another
+# worker's stale entry can't accept an old password.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+_USER_CACHE_COLUMNS = [column.key for column in User.__table__.columns if column.key != "hashed_password"]
+
+user_cache = TTLCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_SIZE)
+
+def invalidate_cached_user(username: str):
+    user_cache.invalidate(username)
+
+def _load_user(db: Session, username: str) -> Optional[User]:
+    snapshot = user_cache.get(username)
+    if snapshot is not None:
+        # Rebuild a clean, detached instance and attach it without a SELECT
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+
+    user = db.query(User).filter(User.username == username).first()
+    if user is not None:
+        user_cache.set(username, {key: getattr(user, key) for key in _USER_CACHE_COLUMNS})
+    return user
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -37,12 +64,93 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+# bcrypt is CPU bound (but releases the GIL), so async routes hand it to a
+# dedicated, size-limited pool instead of the shared request threadpool.
+# Work beyond PASSWORD_HASH_MAX_QUEUE waiting jobs is rejected with 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+HASH_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_lock = threading.Lock()
+_hash_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "rejected": 0,
+    "latency_sum": 0.0,
+    "latency_max": 0.0,
+    "latency_buckets": [0] * len(HASH_LATENCY_BUCKETS),
+}
+
+def _timed_hash_job(fn, *args):
+    with _hash_lock:
+        _hash_stats["queued"] -= 1
+        _hash_stats["running"] += 1
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        elapsed = time.perf_counter() - started
+        with _hash_lock:
+            _hash_stats["running"] -= 1
+            _hash_stats["completed"] += 1
+            _hash_stats["latency_sum"] += elapsed
+            _hash_stats["latency_max"] = max(_hash_stats["latency_max"], elapsed)
+            for i, bound in enumerate(HASH_LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    _hash_stats["latency_buckets"][i] += 1
+
+async def _run_hash_job(fn, *args):
+    with _hash_lock:
+        if _hash_stats["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+            _hash_stats["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _hash_stats["queued"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _timed_hash_job, fn, *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash_job(get_password_hash, password)
+
+def get_password_hash_metrics() -> dict:
+    """Snapshot of queue depth and hash latency for the password pool"""
+    with _hash_lock:
+        completed = _hash_stats["completed"]
+        return {
+            "workers": PASSWORD_HASH_WORKERS,
+            "max_queue": PASSWORD_HASH_MAX_QUEUE,
+            "queue_depth": _hash_stats["queued"],
+            "running": _hash_stats["running"],
+            "completed": completed,
+            "rejected": _hash_stats["rejected"],
+            "latency_avg_seconds": _hash_stats["latency_sum"] / completed if completed else 0.0,
+            "latency_max_seconds": _hash_stats["latency_max"],
+            "latency_sum_seconds": _hash_stats["latency_sum"],
+            "latency_buckets": dict(zip(HASH_LATENCY_BUCKETS, _hash_stats["latency_buckets"])),
+        }
+
+async def authenticate_user(db: Session, username: str, password: str):
+    user = await run_db(db, lambda session: session.query(User).filter(User.username == username).first())
+    if not user or not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
+async def verify_user_password(db: Session, user_id: int, password: str) -> bool:
+    """Check a password against the user's stored hash, read from the row
+    rather than the (possibly cached) current user; False if the user is gone"""
+    hashed_password = await run_db(
+        db, lambda session: session.query(User.hashed_password).filter(User.user_id == user_id).scalar()
+    )
+    return hashed_password is not None and await verify_password_async(password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -53,7 +161,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -70,7 +178,7 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = await run_db(db, _load_user, username)
     if user is None:
         raise credentials_exception
     return user
@@ -1,13 +1,29 @@
 from sqlalchemy.orm import Session
-from .models import Account, Transaction, Category, Budget, User
-from .schemas import AccountCreate, TransactionCreate, CategoryCreate, UserCreate, BudgetCreate
-from . import auth
+from .models import (
+    Account, Transaction, Category, Budget, User, MonthlyTotal, BalanceSnapshot, UserDataVersion, Tombstone,
+    RecurringTransaction, FxRate, OPENING_SNAPSHOT_DATE, TRANSACTION_SEARCH_TABLE, TRANSACTION_SEARCH_DOCUMENT,
+)
+from .schemas import AccountCreate, TransactionCreate, CategoryCreate, UserCreate, BudgetCreate, RecurringTransactionCreate
+from . import auth, fx
 from decimal import Decimal
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional, Tuple
+from collections import defaultdict
+from pydantic import ValidationError
+from sqlalchemy import Date, Integer, and_, or_, bindparam, case, func, extract, cast, literal, literal_column, select, text, update, insert, delete
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
+import base64
+import binascii
+import calendar
+import numpy as np
+import re
+import unicodedata
 
 # Users
-def create_user(db: Session, user: UserCreate):
-    hashed_password = auth.get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = auth.get_password_hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -29,81 +45,260 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.user_id == user_id).first()
 
+def delete_user(db: Session, user: User):
+    """Delete a user and everything they own, children first to satisfy foreign keys"""
+    _unindex_user_transactions(db, user.user_id)
+    for model in (Tombstone, UserDataVersion, BalanceSnapshot, MonthlyTotal, Budget, Transaction, RecurringTransaction, Account, Category):
+        db.query(model).filter(model.user_id == user.user_id).delete(synchronize_session=False)
+    db.delete(user)
+    db.commit()
+
+# Data versions (ETag support): every write to a user's accounts, categories,
+# transactions or budgets bumps the counter in the same DB transaction
+def _bump_data_version(db: Session, user_id: int):
+    deferred = db.info.get("deferred_version_bumps")
+    if deferred is not None:
+        # Inside apply_batch: bump once when the batch finishes
+        deferred.add(user_id)
+        return
+    now = datetime.utcnow()
+    result = db.execute(
+        update(UserDataVersion)
+        .where(UserDataVersion.user_id == user_id)
+        .values(version=UserDataVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(UserDataVersion).values(user_id=user_id, version=1, updated_at=now))
+    _stamp_sync_versions(db, [user_id])
+
+def _stamp_sync_versions(db: Session, user_ids):
+    """Stamp rows and tombstones this write touched (sync_version reset to
+    NULL) with the version it was just bumped to. The bump holds the user's
+    version row lock until commit, so versions commit in order and the delta
+    sync can use them as its cursor"""
+    db.flush()
+    for model in (*SYNC_ENTITIES.values(), Tombstone):
+        table = model.__table__
+        db.execute(
+            update(table)
+            .where(table.c.user_id.in_(user_ids), table.c.sync_version.is_(None))
+            .values(sync_version=select(UserDataVersion.version)
+                    .where(UserDataVersion.user_id == table.c.user_id)
+                    .scalar_subquery())
+        )
+
+def _finish_write(db: Session, commit: bool, obj=None):
+    """Commit and reload obj, or only flush when the caller owns the DB transaction (apply_batch)"""
+    if commit:
+        db.commit()
+        if obj is not None:
+            db.refresh(obj)
+    else:
+        db.flush()
+
+def get_data_version(db: Session, user_id: int):
+    """(version, updated_at) for the user's data; (0, None) before the first write"""
+    row = db.query(UserDataVersion.version, UserDataVersion.updated_at)\
+        .filter(UserDataVersion.user_id == user_id)\
+        .first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+# Delta sync: rows carry the data version of their last write (sync_version)
+# and deletes leave a tombstone, so a client holding a cursor only fetches
+# what changed after it. Wall-clock updated_at can't be the cursor: a
+# transaction that commits after a later-stamped one would be skipped
+SYNC_ENTITIES = {"accounts": Account, "categories": Category, "transactions": Transaction, "budgets": Budget}
+
+def _record_tombstone(db: Session, user_id: int, entity_type: str, entity_id: int):
+    db.add(Tombstone(user_id=user_id, entity_type=entity_type, entity_id=entity_id))
+
+def encode_sync_cursor(version: int) -> str:
+    """Opaque sync cursor: the data version the client has seen"""
+    return base64.urlsafe_b64encode(f"sync|{version}".encode()).decode().rstrip("=")
+
+def decode_sync_cursor(cursor: str) -> int:
+    """Inverse of encode_sync_cursor; raises ValueError on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        kind, version = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        if kind != "sync" or int(version) < 0:
+            raise ValueError
+        return int(version)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+def get_changes(db: Session, user_id: int, since: Optional[int] = None):
+    """Rows changed and ids deleted after data version `since` (everything
+    when None).
+
+    Clients apply `deleted` before `changes`, then keep the returned cursor
+    (None until the user has any data) for the next call.
+    """
+    # Read the version first: every version up to it has committed, and rows
+    # stamped later are left for the next call
+    version, _ = get_data_version(db, user_id)
+    since = since or 0
+    changes = {}
+    for name, model in SYNC_ENTITIES.items():
+        changes[name] = db.query(model)\
+            .filter(model.user_id == user_id, model.sync_version > since, model.sync_version <= version)\
+            .order_by(model.sync_version)\
+            .all()
+
+    deleted = {name: [] for name in SYNC_ENTITIES}
+    if since:
+        tombstones = db.query(Tombstone.entity_type, Tombstone.entity_id)\
+            .filter(Tombstone.user_id == user_id, Tombstone.sync_version > since, Tombstone.sync_version <= version)\
+            .order_by(Tombstone.sync_version)\
+            .all()
+        for entity_type, entity_id in tombstones:
+            deleted[entity_type].append(entity_id)
+
+    return {
+        "cursor": encode_sync_cursor(max(version, since)) if version or since else None,
+        "changes": changes,
+        "deleted": deleted,
+    }
+
+# Default categories copied to every new user
+DEFAULT_CATEGORIES = [
+    # Income categories
+    {'category_name': 'Salary', 'category_type': 'income', 'icon': '💼', 'color': '#10b981'},
+    {'category_name': 'Freelance', 'category_type': 'income', 'icon': '💻', 'color': '#3b82f6'},
+    {'category_name': 'Investment', 'category_type': 'income', 'icon': '📈', 'color': '#8b5cf6'},
+    {'category_name': 'Business', 'category_type': 'income', 'icon': '💰', 'color': '#06b6d4'},
+    # Expense categories
+    {'category_name': 'Food & Dining', 'category_type': 'expense', 'icon': '🍔', 'color': '#ef4444'},
+    {'category_name': 'Transportation', 'category_type': 'expense', 'icon': '🚗', 'color': '#f59e0b'},
+    {'category_name': 'Shopping', 'category_type': 'expense', 'icon': '🛍️', 'color': '#ec4899'},
+    {'category_name': 'Entertainment', 'category_type': 'expense', 'icon': '🎬', 'color': '#6366f1'},
+    {'category_name': 'Bills & Utilities', 'category_type': 'expense', 'icon': '💡', 'color': '#14b8a6'},
+    {'category_name': 'Healthcare', 'category_type': 'expense', 'icon': '🏥', 'color': '#f43f5e'},
+    {'category_name': 'Education', 'category_type': 'expense', 'icon': '📚', 'color': '#8b5cf6'},
+    {'category_name': 'Travel', 'category_type': 'expense', 'icon': '✈️', 'color': '#0ea5e9'},
+]
+
+def _insert_default_categories(db: Session, user_id: int):
+    """One multi-row INSERT of the default set; the caller commits"""
+    db.execute(insert(Category), [
+        {**cat_data, 'user_id': user_id, 'is_default': True} for cat_data in DEFAULT_CATEGORIES
+    ])
+    _bump_data_version(db, user_id)
+
 # Create default categories for new users
 def create_default_categories(db: Session, user_id: int):
-    default_categories = [
-        # Income categories
-        {'category_name': 'Salary', 'category_type': 'income', 'icon': '💼', 'color': '#10b981'},
-        {'category_name': 'Freelance', 'category_type': 'income', 'icon': '💻', 'color': '#3b82f6'},
-        {'category_name': 'Investment', 'category_type': 'income', 'icon': '📈', 'color': '#8b5cf6'},
-        {'category_name': 'Business', 'category_type': 'income', 'icon': '💰', 'color': '#06b6d4'},
-        # Expense categories
-        {'category_name': 'Food & Dining', 'category_type': 'expense', 'icon': '🍔', 'color': '#ef4444'},
-        {'category_name': 'Transportation', 'category_type': 'expense', 'icon': '🚗', 'color': '#f59e0b'},
-        {'category_name': 'Shopping', 'category_type': 'expense', 'icon': '🛍️', 'color': '#ec4899'},
-        {'category_name': 'Entertainment', 'category_type': 'expense', 'icon': '🎬', 'color': '#6366f1'},
-        {'category_name': 'Bills & Utilities', 'category_type': 'expense', 'icon': '💡', 'color': '#14b8a6'},
-        {'category_name': 'Healthcare', 'category_type': 'expense', 'icon': '🏥', 'color': '#f43f5e'},
-        {'category_name': 'Education', 'category_type': 'expense', 'icon': '📚', 'color': '#8b5cf6'},
-        {'category_name': 'Travel', 'category_type': 'expense', 'icon': '✈️', 'color': '#0ea5e9'},
-    ]
-    
-    for cat_data in default_categories:
-        new_category = Category(
-            user_id=user_id,
-            category_name=cat_data['category_name'],
-            category_type=cat_data['category_type'],
-            icon=cat_data['icon'],
-            color=cat_data['color'],
-            is_default=True
-        )
-        db.add(new_category)
-    
+    _insert_default_categories(db, user_id)
     db.commit()
     return True
 
+def get_registration_conflict(db: Session, username: str, email: str) -> Optional[str]:
+    """"username" or "email" if either is already taken, from a single probe"""
+    taken = db.query(User.username == username, User.email == email)\
+        .filter(or_(User.username == username, User.email == email))\
+        .limit(2)\
+        .all()
+    if any(username_taken for username_taken, _ in taken):
+        return "username"
+    if taken:
+        return "email"
+    return None
+
+def register_user(db: Session, user: UserCreate, hashed_password: str) -> int:
+    """Create the user and their default categories in one transaction and
+    return the new user_id.
+
+    Raises IntegrityError (after rolling back) if a concurrent registration
+    claimed the username or email first.
+    """
+    db_user = User(
+        username=user.username,
+        email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    try:
+        db.flush()
+        user_id = db_user.user_id
+        _insert_default_categories(db, user_id)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise
+    return user_id
+
 # Accounts
 def get_accounts(db: Session, user_id: int):
     return db.query(Account).filter(Account.user_id == user_id, Account.is_active == True).all()
 
-def create_account(db: Session, account: AccountCreate, user_id: int):
+def create_account(db: Session, account: AccountCreate, user_id: int, commit: bool = True):
     new_account = Account(
         user_id=user_id,
         account_name=account.account_name,
         account_type=account.account_type,
-        balance=account.balance
+        currency=(account.currency or "USD").upper(),
+        # Decimal, as loaded rows have, so later balance UPDATEs can sync it in-session
+        balance=Decimal(str(account.balance))
     )
     db.add(new_account)
-    db.commit()
-    db.refresh(new_account)
+    db.flush()
+    db.add(BalanceSnapshot(
+        account_id=new_account.account_id,
+        user_id=user_id,
+        snapshot_date=OPENING_SNAPSHOT_DATE,
+        balance=account.balance,
+    ))
+    _bump_data_version(db, user_id)
+    _finish_write(db, commit, new_account)
     return new_account
 
 def get_account_by_id(db: Session, account_id: int, user_id: int):
     return db.query(Account).filter(Account.account_id == account_id, Account.user_id == user_id).first()
 
-def update_account(db: Session, account_id: int, account: AccountCreate, user_id: int):
+def update_account(db: Session, account_id: int, account: AccountCreate, user_id: int, commit: bool = True):
     db_account = db.query(Account).filter(Account.account_id == account_id, Account.user_id == user_id).first()
     if db_account:
         db_account.account_name = account.account_name
         db_account.account_type = account.account_type
-        db_account.balance = account.balance
-        db.commit()
-        db.refresh(db_account)
+        if account.currency:
+            db_account.currency = account.currency.upper()
+        # A client-supplied balance is a manual adjustment: shift the stored
+        # balance and every snapshot by the same amount so the ledger agrees
+        adjustment = Decimal(str(account.balance)) - db_account.balance
+        if adjustment:
+            _apply_balance_deltas(db, user_id, {account_id: adjustment})
+            db.execute(
+                update(BalanceSnapshot)
+                .where(BalanceSnapshot.account_id == account_id)
+                .values(balance=BalanceSnapshot.balance + adjustment)
+            )
+        _bump_data_version(db, user_id)
+        _finish_write(db, commit, db_account)
         return db_account
     return None
 
-def delete_account(db: Session, account_id: int, user_id: int):
+def delete_account(db: Session, account_id: int, user_id: int, commit: bool = True):
     db_account = db.query(Account).filter(Account.account_id == account_id, Account.user_id == user_id).first()
     if db_account:
         # Check if account has any transactions
         has_transactions = db.query(Transaction).filter(Transaction.account_id == account_id).first()
         if has_transactions:
-            # Soft delete if has transactions
+            # Soft delete if has transactions; its schedules stop producing more
             db_account.is_active = False
+            db.execute(
+                update(RecurringTransaction)
+                .where(RecurringTransaction.account_id == account_id)
+                .values(next_due_date=None)
+            )
         else:
-            # Hard delete if no transactions
+            # Hard delete if no transactions, along with its derived rows
+            for model in (BalanceSnapshot, MonthlyTotal, RecurringTransaction):
+                db.query(model).filter(model.account_id == account_id).delete(synchronize_session=False)
             db.delete(db_account)
-        db.commit()
+            _record_tombstone(db, user_id, "accounts", account_id)
+        _bump_data_version(db, user_id)
+        _finish_write(db, commit)
         return True
     return False
 
@@ -111,7 +306,7 @@ def delete_account(db: Session, account_id: int, user_id: int):
 def get_categories(db: Session, user_id: int):
     return db.query(Category).filter(Category.user_id == user_id).all()
 
-def create_category(db: Session, category: CategoryCreate, user_id: int):
+def create_category(db: Session, category: CategoryCreate, user_id: int, commit: bool = True):
     new_category = Category(
         user_id=user_id,
         category_name=category.category_name,
@@ -120,22 +315,324 @@ def create_category(db: Session, category: CategoryCreate, user_id: int):
         color=category.color
     )
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    _bump_data_version(db, user_id)
+    _finish_write(db, commit, new_category)
     return new_category
 
 def get_category_by_id(db: Session, category_id: int, user_id: int):
     return db.query(Category).filter(Category.category_id == category_id, Category.user_id == user_id).first()
 
 
-def get_transactions(db: Session, user_id: int):
-    return db.query(Transaction)\
-        .options(joinedload(Transaction.category), joinedload(Transaction.account))\
-        .filter(Transaction.user_id == user_id)\
-        .order_by(Transaction.transaction_date.desc())\
-        .all()
+# Transactions
+def encode_transaction_cursor(transaction_date: date, transaction_id: int) -> str:
+    """Opaque keyset cursor pointing just past the given transaction"""
+    raw = f"{transaction_date.isoformat()}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_transaction_cursor(cursor: str) -> Tuple[date, int]:
+    """Inverse of encode_transaction_cursor; raises ValueError on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+def _filter_transactions(
+    query,
+    user_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[Tuple[date, int]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    transaction_type: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+):
+    """Filters, keyset cursor and newest-first order shared by the ORM query and the row select"""
+    query = query.filter(Transaction.user_id == user_id)
+    if start_date is not None:
+        query = query.filter(Transaction.transaction_date >= start_date)
+    if end_date is not None:
+        query = query.filter(Transaction.transaction_date <= end_date)
+    if account_id is not None:
+        query = query.filter(Transaction.account_id == account_id)
+    if category_id is not None:
+        query = query.filter(Transaction.category_id == category_id)
+    if transaction_type is not None:
+        query = query.filter(Transaction.transaction_type == transaction_type)
+    if min_amount is not None:
+        query = query.filter(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.filter(Transaction.amount <= max_amount)
+
+    if cursor is not None:
+        cursor_date, cursor_id = cursor
+        query = query.filter(or_(
+            Transaction.transaction_date < cursor_date,
+            and_(Transaction.transaction_date == cursor_date, Transaction.transaction_id < cursor_id),
+        ))
+
+    query = query.order_by(Transaction.transaction_date.desc(), Transaction.transaction_id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def get_transactions(db: Session, user_id: int, **filters):
+    """Newest-first transactions, keyset-paginated on (transaction_date, transaction_id);
+    takes the keyword filters of _filter_transactions"""
+    query = db.query(Transaction)\
+        .options(joinedload(Transaction.category), joinedload(Transaction.account))
+    return _filter_transactions(query, user_id, **filters).all()
+
+# Plain-column form of a transaction list row (schemas.TransactionDetailResponse).
+# Selecting columns skips ORM identity-map work, and the dicts go straight to
+# orjson in GET /transactions instead of through response-model validation.
+TRANSACTION_ROW_FIELDS = (
+    "transaction_id", "user_id", "account_id", "category_id", "transaction_type", "amount",
+    "description", "transaction_date", "payment_method", "notes", "created_at", "updated_at",
+)
+CATEGORY_ROW_FIELDS = (
+    "category_id", "user_id", "category_name", "category_type", "icon", "color", "is_default",
+    "created_at", "updated_at",
+)
+ACCOUNT_ROW_FIELDS = (
+    "account_id", "user_id", "account_name", "account_type", "balance", "currency", "is_active",
+    "created_at", "updated_at",
+)
+
+def get_transaction_rows(db: Session, user_id: int, **filters):
+    """get_transactions as plain dicts with nested category and account dicts"""
+    columns = [getattr(Transaction, name) for name in TRANSACTION_ROW_FIELDS]
+    columns += [getattr(Category, name) for name in CATEGORY_ROW_FIELDS]
+    columns += [getattr(Account, name) for name in ACCOUNT_ROW_FIELDS]
+    query = select(*columns)\
+        .join(Category, Category.category_id == Transaction.category_id)\
+        .join(Account, Account.account_id == Transaction.account_id)
+
+    category_start = len(TRANSACTION_ROW_FIELDS)
+    account_start = category_start + len(CATEGORY_ROW_FIELDS)
+    categories, accounts = {}, {}
+    rows = []
+    for row in db.execute(_filter_transactions(query, user_id, **filters)):
+        item = dict(zip(TRANSACTION_ROW_FIELDS, row))
+        # A page touches few categories and accounts; build each nested dict once
+        category = categories.get(item["category_id"])
+        if category is None:
+            category = categories[item["category_id"]] = dict(zip(CATEGORY_ROW_FIELDS, row[category_start:account_start]))
+        account = accounts.get(item["account_id"])
+        if account is None:
+            account = accounts[item["account_id"]] = dict(zip(ACCOUNT_ROW_FIELDS, row[account_start:]))
+        item["category"] = category
+        item["account"] = account
+        rows.append(item)
+    return rows
+
+# Full-text search. On SQLite the FTS5 table is kept in step with every
+# transaction write below; on Postgres the GIN expression index needs no upkeep.
+def _uses_fts5(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+def _search_words(value: Optional[str]):
+    """Lowercased, accent-stripped words; also keeps user input out of MATCH / tsquery syntax"""
+    folded = unicodedata.normalize("NFKD", value or "").lower()
+    return re.findall(r"[^\W_]+", "".join(ch for ch in folded if not unicodedata.combining(ch)))
+
+def _search_tokens(user_id: int, value: Optional[str]) -> str:
+    return " ".join(f"{user_id}_{word}" for word in _search_words(value))
+
+def _index_transactions(db: Session, rows):
+    """Add rows with transaction_id, user_id, description and notes to the search index"""
+    if not _uses_fts5(db):
+        return
+    params = [
+        {
+            "rowid": row.transaction_id,
+            "description": _search_tokens(row.user_id, row.description),
+            "notes": _search_tokens(row.user_id, row.notes),
+        }
+        for row in rows
+    ]
+    if params:
+        db.execute(text(
+            f"INSERT INTO {TRANSACTION_SEARCH_TABLE} (rowid, description, notes) "
+            "VALUES (:rowid, :description, :notes)"
+        ), params)
 
-def create_transaction(db: Session, transaction: TransactionCreate, user_id: int):
+def _unindex_transactions(db: Session, transaction_ids):
+    if _uses_fts5(db) and transaction_ids:
+        db.execute(
+            text(f"DELETE FROM {TRANSACTION_SEARCH_TABLE} WHERE rowid = :rowid"),
+            [{"rowid": transaction_id} for transaction_id in transaction_ids],
+        )
+
+def _unindex_user_transactions(db: Session, user_id: int):
+    if _uses_fts5(db):
+        db.execute(text(
+            f"DELETE FROM {TRANSACTION_SEARCH_TABLE} "
+            "WHERE rowid IN (SELECT transaction_id FROM transactions WHERE user_id = :user_id)"
+        ), {"user_id": user_id})
+
+def rebuild_search_index(db: Session, user_id: Optional[int] = None, batch_size: int = 5000):
+    """Repopulate the SQLite search index from transactions; returns rows indexed"""
+    if not _uses_fts5(db):
+        return 0
+    if user_id is None:
+        db.execute(text(f"DELETE FROM {TRANSACTION_SEARCH_TABLE}"))
+    else:
+        _unindex_user_transactions(db, user_id)
+
+    query = select(Transaction.transaction_id, Transaction.user_id, Transaction.description, Transaction.notes)
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+    indexed = 0
+    for partition in db.execute(query.execution_options(yield_per=batch_size)).partitions():
+        _index_transactions(db, partition)
+        indexed += len(partition)
+    db.commit()
+    return indexed
+
+def encode_search_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"search|{offset}".encode()).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str) -> int:
+    """Inverse of encode_search_cursor; raises ValueError on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        kind, raw_offset = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        if kind != "search" or int(raw_offset) < 0:
+            raise ValueError("Invalid cursor")
+        return int(raw_offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+def search_transactions(db: Session, user_id: int, search: str, limit: int = 50, offset: int = 0):
+    """Transactions whose description or notes contain every search term (as a
+    word prefix), best match first"""
+    terms = _search_words(search)[:16]
+    if not terms:
+        return []
+
+    query = db.query(Transaction)\
+        .options(joinedload(Transaction.category), joinedload(Transaction.account))
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        # Terms carry the user prefix, so the match never leaves this user's
+        # postings; bm25 favours description hits over notes
+        match = " AND ".join(f'"{user_id}_{term}"*' for term in terms)
+        ranked = select(
+            literal_column("rowid").label("transaction_id"),
+            literal_column(f"bm25({TRANSACTION_SEARCH_TABLE}, 10.0, 5.0)").label("rank"),
+        ).select_from(text(TRANSACTION_SEARCH_TABLE))\
+            .where(text(f"{TRANSACTION_SEARCH_TABLE} MATCH :match").bindparams(match=match))\
+            .subquery()
+        query = query.join(ranked, ranked.c.transaction_id == Transaction.transaction_id)\
+            .filter(Transaction.user_id == user_id)\
+            .order_by(ranked.c.rank, Transaction.transaction_id.desc())
+    elif dialect == "postgresql":
+        # Same expression as the ix_transactions_search GIN index
+        document = literal_column(TRANSACTION_SEARCH_DOCUMENT)
+        tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{t}:*" for t in terms))
+        query = query.filter(Transaction.user_id == user_id, document.op("@@")(tsquery))\
+            .order_by(func.ts_rank(document, tsquery).desc(), Transaction.transaction_id.desc())
+    else:
+        query = query.filter(Transaction.user_id == user_id)
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.filter(or_(Transaction.description.ilike(pattern), Transaction.notes.ilike(pattern)))
+        query = query.order_by(Transaction.transaction_date.desc(), Transaction.transaction_id.desc())
+
+    return query.offset(offset).limit(limit).all()
+
+def _bump_monthly_total(db: Session, user_id: int, account_id: int, category_id: int,
+                        transaction_date: date, transaction_type: str, amount: Decimal, count: int):
+    """Add amount/count to the matching monthly_totals row, creating it if needed"""
+    key = and_(
+        MonthlyTotal.user_id == user_id,
+        MonthlyTotal.year == transaction_date.year,
+        MonthlyTotal.month == transaction_date.month,
+        MonthlyTotal.account_id == account_id,
+        MonthlyTotal.category_id == category_id,
+        MonthlyTotal.transaction_type == transaction_type,
+    )
+    result = db.execute(
+        update(MonthlyTotal)
+        .where(key)
+        .values(total=MonthlyTotal.total + amount, count=MonthlyTotal.count + count)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(MonthlyTotal).values(
+            user_id=user_id,
+            account_id=account_id,
+            category_id=category_id,
+            year=transaction_date.year,
+            month=transaction_date.month,
+            transaction_type=transaction_type,
+            total=amount,
+            count=count,
+        ))
+
+def rebuild_monthly_totals(db: Session, user_id: Optional[int] = None):
+    """Recompute monthly_totals from the transactions table (all users by default)"""
+    year = cast(extract("year", Transaction.transaction_date), Integer)
+    month = cast(extract("month", Transaction.transaction_date), Integer)
+    source = db.query(
+        Transaction.user_id,
+        Transaction.account_id,
+        Transaction.category_id,
+        year,
+        month,
+        Transaction.transaction_type,
+        func.sum(Transaction.amount),
+        func.count(Transaction.transaction_id),
+    )
+    clear = delete(MonthlyTotal)
+    if user_id is not None:
+        source = source.filter(Transaction.user_id == user_id)
+        clear = clear.where(MonthlyTotal.user_id == user_id)
+    source = source.group_by(
+        Transaction.user_id, Transaction.account_id, Transaction.category_id,
+        year, month, Transaction.transaction_type,
+    )
+
+    db.execute(clear)
+    result = db.execute(insert(MonthlyTotal).from_select(
+        ["user_id", "account_id", "category_id", "year", "month", "transaction_type", "total", "count"],
+        source.statement,
+    ))
+    db.commit()
+    return result.rowcount
+
+def _signed_amount(transaction_type: str, amount) -> Decimal:
+    """Balance impact of a transaction: income adds, everything else subtracts"""
+    amount_decimal = Decimal(str(amount))
+    return amount_decimal if transaction_type == "income" else -amount_decimal
+
+def _apply_balance_deltas(db: Session, user_id: int, deltas: dict):
+    """One atomic `balance = balance + delta` UPDATE per affected account"""
+    for account_id, delta in deltas.items():
+        if delta:
+            db.execute(
+                update(Account)
+                .where(Account.account_id == account_id, Account.user_id == user_id)
+                .values(balance=Account.balance + delta)
+            )
+
+def _invalidate_snapshots(db: Session, account_id: int, from_date: date):
+    """Drop snapshots a backdated write has made stale (never the opening one)"""
+    db.execute(
+        delete(BalanceSnapshot)
+        .where(
+            BalanceSnapshot.account_id == account_id,
+            BalanceSnapshot.snapshot_date >= from_date,
+            BalanceSnapshot.snapshot_date > OPENING_SNAPSHOT_DATE,
+        )
+    )
+
+def create_transaction(db: Session, transaction: TransactionCreate, user_id: int, commit: bool = True):
     new_transaction = Transaction(
         user_id=user_id,
         account_id=transaction.account_id,
@@ -148,38 +645,133 @@ def create_transaction(db: Session, transaction: TransactionCreate, user_id: int
         notes=transaction.notes
     )
     db.add(new_transaction)
+    db.flush()
+    _index_transactions(db, [new_transaction])
     
-    # Update account balance
-    account = db.query(Account).filter(Account.account_id == transaction.account_id, Account.user_id == user_id).first()
-    if account:
-        # Convert amount to Decimal to match balance type
-        amount_decimal = Decimal(str(transaction.amount))
-        
-        if transaction.transaction_type == "income":
-            account.balance += amount_decimal
-        else:
-            account.balance -= amount_decimal
+    # Update account balance in the database, not from a value read earlier
+    _apply_balance_deltas(db, user_id, {
+        transaction.account_id: _signed_amount(transaction.transaction_type, transaction.amount),
+    })
     
-    db.commit()
-    db.refresh(new_transaction)
+    _invalidate_snapshots(db, transaction.account_id, transaction.transaction_date)
+    _bump_monthly_total(
+        db, user_id, transaction.account_id, transaction.category_id,
+        transaction.transaction_date, transaction.transaction_type,
+        Decimal(str(transaction.amount)), 1,
+    )
+    
+    _bump_data_version(db, user_id)
+    _finish_write(db, commit, new_transaction)
     return new_transaction
 
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+
+def import_transactions(db: Session, rows: Iterable[Tuple[int, dict]], user_id: int, batch_size: int = 1000):
+    """Validate and bulk-insert (row_number, raw_row) pairs, committing once per batch.
+
+    Invalid rows (or non-dict rows, treated as an error message) are reported
+    back instead of aborting the import. Account balances and monthly totals
+    receive one aggregated update per batch.
+    """
+    account_ids = {a for (a,) in db.query(Account.account_id).filter(Account.user_id == user_id)}
+    category_ids = {c for (c,) in db.query(Category.category_id).filter(Category.user_id == user_id)}
+    imported = 0
+    errors = []
+    batch = []
+
+    def flush():
+        balance_deltas = defaultdict(Decimal)
+        earliest_dates = {}
+        rollup_deltas = defaultdict(lambda: [Decimal("0"), 0])
+        for row in batch:
+            amount = Decimal(str(row["amount"]))
+            balance_deltas[row["account_id"]] += _signed_amount(row["transaction_type"], amount)
+            earliest_dates[row["account_id"]] = min(row["transaction_date"], earliest_dates.get(row["account_id"], date.max))
+            key = (row["account_id"], row["category_id"], row["transaction_date"].replace(day=1), row["transaction_type"])
+            rollup_deltas[key][0] += amount
+            rollup_deltas[key][1] += 1
+
+        inserted = db.execute(
+            insert(Transaction).returning(
+                Transaction.transaction_id, Transaction.user_id, Transaction.description, Transaction.notes,
+            ),
+            batch,
+        )
+        _index_transactions(db, inserted.all())
+        _apply_balance_deltas(db, user_id, balance_deltas)
+        for account_id, earliest in earliest_dates.items():
+            _invalidate_snapshots(db, account_id, earliest)
+        for (account_id, category_id, month_start, t_type), (amount, count) in rollup_deltas.items():
+            _bump_monthly_total(db, user_id, account_id, category_id, month_start, t_type, amount, count)
+        _bump_data_version(db, user_id)
+        db.commit()
+        batch.clear()
+
+    for row_number, raw in rows:
+        if not isinstance(raw, dict):
+            errors.append({"row": row_number, "error": str(raw)})
+            continue
+        try:
+            transaction = TransactionCreate(**raw)
+        except ValidationError as e:
+            errors.append({"row": row_number, "error": _validation_message(e)})
+            continue
+        if transaction.account_id not in account_ids:
+            errors.append({"row": row_number, "error": "Account not found"})
+            continue
+        if transaction.category_id not in category_ids:
+            errors.append({"row": row_number, "error": "Category not found"})
+            continue
+
+        batch.append({
+            "user_id": user_id,
+            "account_id": transaction.account_id,
+            "category_id": transaction.category_id,
+            "transaction_type": transaction.transaction_type,
+            "amount": transaction.amount,
+            "description": transaction.description,
+            "transaction_date": transaction.transaction_date,
+            "payment_method": transaction.payment_method,
+            "notes": transaction.notes,
+            "created_at": datetime.utcnow(),
+        })
+        if len(batch) >= batch_size:
+            imported += len(batch)
+            flush()
+
+    if batch:
+        imported += len(batch)
+        flush()
+
+    return {"imported": imported, "failed": len(errors), "errors": errors}
+
 def get_transaction_by_id(db: Session, transaction_id: int, user_id: int):
     return db.query(Transaction).filter(Transaction.transaction_id == transaction_id, Transaction.user_id == user_id).first()
 
-def update_transaction(db: Session, transaction_id: int, transaction: TransactionCreate, user_id: int):
-    db_transaction = db.query(Transaction).filter(Transaction.transaction_id == transaction_id, Transaction.user_id == user_id).first()
+def _get_transaction_for_update(db: Session, transaction_id: int, user_id: int):
+    # Row lock on Postgres so concurrent edits of one transaction serialize;
+    # SQLite ignores FOR UPDATE and relies on its single-writer lock
+    return db.query(Transaction)\
+        .filter(Transaction.transaction_id == transaction_id, Transaction.user_id == user_id)\
+        .with_for_update()\
+        .first()
+
+def update_transaction(db: Session, transaction_id: int, transaction: TransactionCreate, user_id: int, commit: bool = True):
+    db_transaction = _get_transaction_for_update(db, transaction_id, user_id)
     if db_transaction:
-        # Reverse old transaction balance impact
-        account = db.query(Account).filter(Account.account_id == db_transaction.account_id, Account.user_id == user_id).first()
-        if account:
-            # Convert to Decimal
-            old_amount = Decimal(str(db_transaction.amount))
-            
-            if db_transaction.transaction_type == "income":
-                account.balance -= old_amount
-            else:
-                account.balance += old_amount
+        # Reverse the old impact and apply the new one, netted per account
+        deltas = defaultdict(Decimal)
+        deltas[db_transaction.account_id] -= _signed_amount(db_transaction.transaction_type, db_transaction.amount)
+        deltas[transaction.account_id] += _signed_amount(transaction.transaction_type, transaction.amount)
+        
+        _bump_monthly_total(
+            db, user_id, db_transaction.account_id, db_transaction.category_id,
+            db_transaction.transaction_date, db_transaction.transaction_type,
+            -Decimal(str(db_transaction.amount)), -1,
+        )
+        
+        old_account_id, old_date = db_transaction.account_id, db_transaction.transaction_date
         
         # Update transaction
         db_transaction.account_id = transaction.account_id
@@ -190,47 +782,336 @@ def update_transaction(db: Session, transaction_id: int, transaction: Transactio
         db_transaction.transaction_date = transaction.transaction_date
         db_transaction.payment_method = transaction.payment_method
         db_transaction.notes = transaction.notes
+        _unindex_transactions(db, [transaction_id])
+        _index_transactions(db, [db_transaction])
         
-        # Apply new transaction balance impact
-        new_account = db.query(Account).filter(Account.account_id == transaction.account_id, Account.user_id == user_id).first()
-        if new_account:
-            # Convert to Decimal
-            new_amount = Decimal(str(transaction.amount))
-            
-            if transaction.transaction_type == "income":
-                new_account.balance += new_amount
-            else:
-                new_account.balance -= new_amount
+        _apply_balance_deltas(db, user_id, deltas)
+        _invalidate_snapshots(db, old_account_id, old_date)
+        _invalidate_snapshots(db, transaction.account_id, transaction.transaction_date)
+        _bump_monthly_total(
+            db, user_id, transaction.account_id, transaction.category_id,
+            transaction.transaction_date, transaction.transaction_type,
+            Decimal(str(transaction.amount)), 1,
+        )
         
-        db.commit()
-        db.refresh(db_transaction)
+        _bump_data_version(db, user_id)
+        _finish_write(db, commit, db_transaction)
         return db_transaction
     return None
 
-def delete_transaction(db: Session, transaction_id: int, user_id: int):
-    db_transaction = db.query(Transaction).filter(Transaction.transaction_id == transaction_id, Transaction.user_id == user_id).first()
+def delete_transaction(db: Session, transaction_id: int, user_id: int, commit: bool = True):
+    db_transaction = _get_transaction_for_update(db, transaction_id, user_id)
     if db_transaction:
         # Reverse transaction balance impact
-        account = db.query(Account).filter(Account.account_id == db_transaction.account_id, Account.user_id == user_id).first()
-        if account:
-            # Convert to Decimal
-            amount_decimal = Decimal(str(db_transaction.amount))
-            
-            if db_transaction.transaction_type == "income":
-                account.balance -= amount_decimal
-            else:
-                account.balance += amount_decimal
+        _apply_balance_deltas(db, user_id, {
+            db_transaction.account_id: -_signed_amount(db_transaction.transaction_type, db_transaction.amount),
+        })
+        _invalidate_snapshots(db, db_transaction.account_id, db_transaction.transaction_date)
+        
+        _bump_monthly_total(
+            db, user_id, db_transaction.account_id, db_transaction.category_id,
+            db_transaction.transaction_date, db_transaction.transaction_type,
+            -Decimal(str(db_transaction.amount)), -1,
+        )
         
         db.delete(db_transaction)
+        _unindex_transactions(db, [transaction_id])
+        _record_tombstone(db, user_id, "transactions", transaction_id)
+        _bump_data_version(db, user_id)
+        _finish_write(db, commit)
+        return True
+    return False
+
+# Recurring transactions. The scheduler (app/scheduler.py) calls
+# materialize_recurring, which turns every occurrence due by today into a
+# Transaction row; next_due_date advances in the same commit, so an
+# interrupted or repeated run neither skips nor duplicates occurrences.
+RECURRENCE_DAYS = {"daily": 1, "weekly": 7}
+RECURRENCE_MONTHS = {"monthly": 1, "yearly": 12}
+
+def recurrence_date(start_date: date, frequency: str, interval: int, n: int) -> date:
+    """Date of occurrence n (0 is start_date); monthly/yearly days clamp to the month end"""
+    if frequency in RECURRENCE_DAYS:
+        return start_date + timedelta(days=RECURRENCE_DAYS[frequency] * interval * n)
+    months = start_date.month - 1 + RECURRENCE_MONTHS[frequency] * interval * n
+    year, month = start_date.year + months // 12, months % 12 + 1
+    return date(year, month, min(start_date.day, calendar.monthrange(year, month)[1]))
+
+def _next_due(start_date: date, end_date: Optional[date], frequency: str, interval: int, n: int) -> Optional[date]:
+    due = recurrence_date(start_date, frequency, interval, n)
+    return due if end_date is None or due <= end_date else None
+
+def get_recurring_transactions(db: Session, user_id: int):
+    return db.query(RecurringTransaction)\
+        .filter(RecurringTransaction.user_id == user_id)\
+        .order_by(RecurringTransaction.recurring_id)\
+        .all()
+
+def get_recurring_transaction_by_id(db: Session, recurring_id: int, user_id: int):
+    return db.query(RecurringTransaction)\
+        .filter(RecurringTransaction.recurring_id == recurring_id, RecurringTransaction.user_id == user_id)\
+        .first()
+
+def create_recurring_transaction(db: Session, recurring: RecurringTransactionCreate, user_id: int, today: Optional[date] = None):
+    """Create a schedule and materialize the occurrences already due (a past start_date backfills)"""
+    new_recurring = RecurringTransaction(
+        user_id=user_id,
+        occurrence_count=0,
+        next_due_date=_next_due(recurring.start_date, recurring.end_date, recurring.frequency, recurring.interval, 0),
+        **recurring.model_dump(),
+    )
+    db.add(new_recurring)
+    db.commit()
+    materialize_recurring(db, today, recurring_id=new_recurring.recurring_id)
+    db.refresh(new_recurring)
+    return new_recurring
+
+def delete_recurring_transaction(db: Session, recurring_id: int, user_id: int):
+    """Stop a schedule; one that never produced a transaction is deleted outright"""
+    db_recurring = get_recurring_transaction_by_id(db, recurring_id, user_id)
+    if db_recurring:
+        if db_recurring.occurrence_count:
+            db_recurring.next_due_date = None
+        else:
+            db.delete(db_recurring)
         db.commit()
         return True
     return False
 
+def _dialect_insert(db: Session):
+    """INSERT construct with on_conflict_do_update for this database, if it has one"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+def _apply_account_deltas(db: Session, deltas: dict):
+    """_apply_balance_deltas across users: one executemany UPDATE for every
+    {(user_id, account_id): delta}, each scoped to the owning user"""
+    params = [
+        {"b_user_id": user_id, "b_account_id": account_id, "b_delta": delta}
+        for (user_id, account_id), delta in deltas.items() if delta
+    ]
+    if params:
+        accounts = Account.__table__
+        db.execute(
+            accounts.update()
+            .where(accounts.c.account_id == bindparam("b_account_id"), accounts.c.user_id == bindparam("b_user_id"))
+            .values(balance=accounts.c.balance + bindparam("b_delta")),
+            params,
+        )
+
+def _invalidate_account_snapshots(db: Session, earliest_dates: dict):
+    """_invalidate_snapshots for many accounts in one executemany DELETE"""
+    if earliest_dates:
+        snapshots = BalanceSnapshot.__table__
+        db.execute(
+            snapshots.delete().where(
+                snapshots.c.account_id == bindparam("b_account_id"),
+                snapshots.c.snapshot_date >= bindparam("b_from_date"),
+                snapshots.c.snapshot_date > OPENING_SNAPSHOT_DATE,
+            ),
+            [{"b_account_id": account_id, "b_from_date": earliest} for account_id, earliest in earliest_dates.items()],
+        )
+
+def _bump_monthly_totals(db: Session, deltas: dict):
+    """Add {(user_id, account_id, category_id, month_start, type): [amount, count]} to monthly_totals"""
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        for (user_id, account_id, category_id, month_start, t_type), (amount, count) in deltas.items():
+            _bump_monthly_total(db, user_id, account_id, category_id, month_start, t_type, amount, count)
+        return
+    table = MonthlyTotal.__table__
+    statement = dialect_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[column.name for column in table.primary_key.columns],
+        set_={"total": table.c.total + statement.excluded.total, "count": table.c.count + statement.excluded.count},
+    )
+    db.execute(statement, [
+        {
+            "user_id": user_id, "account_id": account_id, "category_id": category_id,
+            "year": month_start.year, "month": month_start.month, "transaction_type": t_type,
+            "total": amount, "count": count,
+        }
+        for (user_id, account_id, category_id, month_start, t_type), (amount, count) in deltas.items()
+    ])
+
+def _bump_data_versions(db: Session, user_ids):
+    """_bump_data_version for many users in one upsert"""
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        for user_id in user_ids:
+            _bump_data_version(db, user_id)
+        return
+    table = UserDataVersion.__table__
+    now = datetime.utcnow()
+    statement = dialect_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"version": table.c.version + 1, "updated_at": statement.excluded.updated_at},
+    )
+    db.execute(statement, [{"user_id": user_id, "version": 1, "updated_at": now} for user_id in user_ids])
+    _stamp_sync_versions(db, list(user_ids))
+
+RECURRING_COLUMNS = (
+    RecurringTransaction.recurring_id, RecurringTransaction.user_id, RecurringTransaction.account_id,
+    RecurringTransaction.category_id, RecurringTransaction.transaction_type, RecurringTransaction.amount,
+    RecurringTransaction.description, RecurringTransaction.payment_method, RecurringTransaction.notes,
+    RecurringTransaction.frequency, RecurringTransaction.interval, RecurringTransaction.start_date,
+    RecurringTransaction.end_date, RecurringTransaction.occurrence_count, RecurringTransaction.next_due_date,
+)
+
+def _insert_occurrences(db: Session, rows: list) -> int:
+    """Insert materialized occurrences with their balance, snapshot, rollup
+    and search index updates, then clear rows. Occurrences an overlapping run
+    already inserted hit the unique (recurring_id, transaction_date) index and
+    are skipped, so only the rows actually inserted count. Returns that count"""
+    if not rows:
+        return 0
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        statement = insert(Transaction)
+    else:
+        statement = dialect_insert(Transaction).on_conflict_do_nothing(index_elements=["recurring_id", "transaction_date"])
+    inserted = db.execute(
+        statement.returning(
+            Transaction.transaction_id, Transaction.user_id, Transaction.account_id, Transaction.category_id,
+            Transaction.transaction_type, Transaction.amount, Transaction.transaction_date,
+            Transaction.description, Transaction.notes,
+        ),
+        rows,
+    ).all()
+    rows.clear()
+    if not inserted:
+        return 0
+
+    balance_deltas = defaultdict(Decimal)
+    earliest_dates = {}
+    rollup_deltas = defaultdict(lambda: [Decimal("0"), 0])
+    for row in inserted:
+        balance_deltas[(row.user_id, row.account_id)] += _signed_amount(row.transaction_type, row.amount)
+        earliest_dates[row.account_id] = min(row.transaction_date, earliest_dates.get(row.account_id, date.max))
+        key = (row.user_id, row.account_id, row.category_id, row.transaction_date.replace(day=1), row.transaction_type)
+        rollup_deltas[key][0] += row.amount
+        rollup_deltas[key][1] += 1
+    _index_transactions(db, inserted)
+    _apply_account_deltas(db, balance_deltas)
+    _invalidate_account_snapshots(db, earliest_dates)
+    _bump_monthly_totals(db, rollup_deltas)
+    return len(inserted)
+
+def materialize_recurring(db: Session, today: Optional[date] = None, batch_size: int = 2000,
+                          recurring_id: Optional[int] = None) -> int:
+    """Insert every occurrence due on or before today, catching up missed runs.
+
+    Each batch is one range query on next_due_date (only due schedules are
+    read; Postgres skips rows another scheduler holds), bulk INSERTs of at
+    most batch_size occurrences with one balance UPDATE per account each,
+    rollup and data-version upserts, and the schedule advance, committed
+    together. Returns the transactions created.
+    """
+    today = today or date.today()
+    created = 0
+    while True:
+        query = select(*RECURRING_COLUMNS).where(RecurringTransaction.next_due_date <= today)
+        if recurring_id is not None:
+            query = query.where(RecurringTransaction.recurring_id == recurring_id)
+        query = query.order_by(RecurringTransaction.next_due_date)\
+            .limit(batch_size)\
+            .with_for_update(skip_locked=True)
+        schedules = db.execute(query).all()
+        if not schedules:
+            return created
+
+        now = datetime.utcnow()
+        rows = []
+        advanced = []
+        for schedule in schedules:
+            n, due = schedule.occurrence_count, schedule.next_due_date
+            while due is not None and due <= today:
+                rows.append({
+                    "user_id": schedule.user_id,
+                    "account_id": schedule.account_id,
+                    "category_id": schedule.category_id,
+                    "transaction_type": schedule.transaction_type,
+                    "amount": schedule.amount,
+                    "description": schedule.description,
+                    "transaction_date": due,
+                    "payment_method": schedule.payment_method,
+                    "notes": schedule.notes,
+                    "recurring_id": schedule.recurring_id,
+                    "created_at": now,
+                })
+                if len(rows) >= batch_size:
+                    # A long catch-up (a daily schedule started years ago)
+                    # is written in chunks rather than held in one list
+                    created += _insert_occurrences(db, rows)
+                n += 1
+                due = _next_due(schedule.start_date, schedule.end_date, schedule.frequency, schedule.interval, n)
+            advanced.append({
+                "b_recurring_id": schedule.recurring_id, "b_from_count": schedule.occurrence_count,
+                "b_count": n, "b_next_due": due,
+            })
+        created += _insert_occurrences(db, rows)
+
+        _bump_data_versions(db, {schedule.user_id for schedule in schedules})
+        # A schedule an overlapping run has advanced meanwhile keeps its state
+        recurring = RecurringTransaction.__table__
+        db.execute(
+            recurring.update()
+            .where(
+                recurring.c.recurring_id == bindparam("b_recurring_id"),
+                recurring.c.occurrence_count == bindparam("b_from_count"),
+            )
+            .values(occurrence_count=bindparam("b_count"), next_due_date=bindparam("b_next_due")),
+            advanced,
+        )
+        db.commit()
+
 # Budgets
-def get_budgets(db: Session, user_id: int):
-    return db.query(Budget).options(joinedload(Budget.category)).filter(Budget.user_id == user_id).all()
+def get_budgets(db: Session, user_id: int, with_progress: bool = False):
+    if not with_progress:
+        return db.query(Budget).options(joinedload(Budget.category)).filter(Budget.user_id == user_id).all()
 
-def create_budget(db: Session, budget: BudgetCreate, user_id: int):
+    # Expense totals per (category, year, month), restricted to budgeted categories
+    year = extract("year", Transaction.transaction_date)
+    month = extract("month", Transaction.transaction_date)
+    budgeted_categories = db.query(Budget.category_id).filter(Budget.user_id == user_id)
+    spent_by_period = db.query(
+        Transaction.category_id.label("category_id"),
+        year.label("year"),
+        month.label("month"),
+        func.sum(Transaction.amount).label("spent"),
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.transaction_type == "expense",
+        Transaction.category_id.in_(budgeted_categories),
+    ).group_by(Transaction.category_id, year, month).subquery()
+
+    rows = db.query(Budget, func.coalesce(spent_by_period.c.spent, 0))\
+        .options(joinedload(Budget.category))\
+        .outerjoin(spent_by_period, and_(
+            spent_by_period.c.category_id == Budget.category_id,
+            spent_by_period.c.year == Budget.year,
+            spent_by_period.c.month == Budget.month,
+        ))\
+        .filter(Budget.user_id == user_id)\
+        .all()
+
+    budgets = []
+    for budget, spent in rows:
+        budget_amount = float(budget.budget_amount)
+        budget.spent = float(spent)
+        budget.remaining = budget_amount - budget.spent
+        budget.percent_used = round(budget.spent / budget_amount * 100, 2) if budget_amount else 0.0
+        budgets.append(budget)
+    return budgets
+
+def create_budget(db: Session, budget: BudgetCreate, user_id: int, commit: bool = True):
     new_budget = Budget(
         user_id=user_id,
         category_id=budget.category_id,
@@ -239,29 +1120,741 @@ def create_budget(db: Session, budget: BudgetCreate, user_id: int):
         year=budget.year
     )
     db.add(new_budget)
-    db.commit()
-    db.refresh(new_budget)
+    _bump_data_version(db, user_id)
+    _finish_write(db, commit, new_budget)
     return new_budget
 
 def get_budget_by_id(db: Session, budget_id: int, user_id: int):
     return db.query(Budget).options(joinedload(Budget.category)).filter(Budget.budget_id == budget_id, Budget.user_id == user_id).first()
 
-def update_budget(db: Session, budget_id: int, budget: BudgetCreate, user_id: int):
+def update_budget(db: Session, budget_id: int, budget: BudgetCreate, user_id: int, commit: bool = True):
     db_budget = db.query(Budget).filter(Budget.budget_id == budget_id, Budget.user_id == user_id).first()
     if db_budget:
         db_budget.category_id = budget.category_id
         db_budget.budget_amount = budget.budget_amount
         db_budget.month = budget.month
         db_budget.year = budget.year
-        db.commit()
-        db.refresh(db_budget)
+        _bump_data_version(db, user_id)
+        _finish_write(db, commit, db_budget)
         return db_budget
     return None
 
-def delete_budget(db: Session, budget_id: int, user_id: int):
+def delete_budget(db: Session, budget_id: int, user_id: int, commit: bool = True):
     db_budget = db.query(Budget).filter(Budget.budget_id == budget_id, Budget.user_id == user_id).first()
     if db_budget:
         db.delete(db_budget)
-        db.commit()
+        _record_tombstone(db, user_id, "budgets", budget_id)
+        _bump_data_version(db, user_id)
+        _finish_write(db, commit)
         return True
-    return False
\ No newline at end of file
+    return False
+
+# Batches: ordered writes from POST /batch in one DB transaction
+class BatchOperationError(ValueError):
+    """Operation `index` of a batch failed; nothing in the batch was committed"""
+
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Operation {index}: {message}")
+        self.index = index
+        self.message = message
+
+BATCH_HANDLERS = {
+    "accounts": {"label": "Account", "model": Account, "key": "account_id", "schema": AccountCreate,
+                 "create": create_account, "update": update_account, "delete": delete_account},
+    "categories": {"label": "Category", "model": Category, "key": "category_id", "schema": CategoryCreate,
+                   "create": create_category},
+    "transactions": {"label": "Transaction", "model": Transaction, "key": "transaction_id", "schema": TransactionCreate,
+                     "create": create_transaction, "update": update_transaction, "delete": delete_transaction},
+    "budgets": {"label": "Budget", "model": Budget, "key": "budget_id", "schema": BudgetCreate,
+                "create": create_budget, "update": update_budget, "delete": delete_budget},
+}
+
+# Foreign keys in batch payloads that must belong to the batch's user (rows
+# created earlier in the batch are flushed, so the lookups see them)
+BATCH_OWNED_REFS = (("account_id", get_account_by_id, "Account"), ("category_id", get_category_by_id, "Category"))
+
+def _resolve_batch_ref(value, created: dict, index: int):
+    """"$n" stands for the id created by operation n of the same batch"""
+    if not (isinstance(value, str) and value.startswith("$")):
+        return value
+    ref = value[1:]
+    if not ref.isdigit() or int(ref) not in created:
+        raise BatchOperationError(index, f"{value} does not refer to an earlier create")
+    return created[int(ref)]
+
+def apply_batch(db: Session, operations, user_id: int):
+    """Apply schemas.BatchOperation items in order with a single commit.
+
+    Returns (operation, id, object) per operation, object None for deletes.
+    The first failure rolls everything back and raises BatchOperationError.
+    """
+    created = {}  # operation index -> new id
+    results = []
+    index = 0
+    db.info["deferred_version_bumps"] = set()
+    try:
+        for index, operation in enumerate(operations):
+            handler = BATCH_HANDLERS[operation.entity]
+            write = handler.get(operation.op)
+            if write is None:
+                raise BatchOperationError(index, f"{operation.op} is not supported for {operation.entity}")
+
+            if operation.op != "delete":
+                data = {
+                    key: _resolve_batch_ref(value, created, index) if key.endswith("_id") else value
+                    for key, value in (operation.data or {}).items()
+                }
+                try:
+                    payload = handler["schema"](**data)
+                except ValidationError as e:
+                    raise BatchOperationError(index, _validation_message(e))
+                for key, get_owned, label in BATCH_OWNED_REFS:
+                    ref = getattr(payload, key, None)
+                    if ref is not None and get_owned(db, ref, user_id) is None:
+                        raise BatchOperationError(index, f"{label} not found")
+
+            if operation.op == "create":
+                obj = write(db, payload, user_id, commit=False)
+                entity_id = created[index] = getattr(obj, handler["key"])
+            else:
+                entity_id = _resolve_batch_ref(operation.id, created, index)
+                if not isinstance(entity_id, int):
+                    raise BatchOperationError(index, f"{operation.op} needs the id of an existing row")
+                if operation.op == "update":
+                    obj = write(db, entity_id, payload, user_id, commit=False)
+                    found = obj is not None
+                else:
+                    obj = None
+                    found = write(db, entity_id, user_id, commit=False)
+                if not found:
+                    raise BatchOperationError(index, f"{handler['label']} not found")
+            results.append((operation, entity_id, obj))
+        for bumped_user_id in db.info.pop("deferred_version_bumps"):
+            _bump_data_version(db, bumped_user_id)
+        db.commit()
+    except BatchOperationError:
+        db.rollback()
+        raise
+    except IntegrityError:
+        db.rollback()
+        raise BatchOperationError(index, "Conflicts with existing data")
+    finally:
+        db.info.pop("deferred_version_bumps", None)
+
+    # Balances and updated_at were also changed in SQL; reload the written rows
+    # with one query per entity instead of a refresh per row
+    for entity, handler in BATCH_HANDLERS.items():
+        ids = {entity_id for operation, entity_id, obj in results if obj is not None and operation.entity == entity}
+        if ids:
+            key = getattr(handler["model"], handler["key"])
+            db.query(handler["model"]).filter(key.in_(ids)).populate_existing().all()
+    return results
+
+# Currency conversion
+def get_account_currencies(db: Session, user_id: int) -> set:
+    """Currencies of all the user's accounts, including closed ones that still carry history"""
+    currency = func.coalesce(Account.currency, fx.FX_BASE_CURRENCY)
+    return {value.upper() for (value,) in db.query(currency).filter(Account.user_id == user_id).distinct()}
+
+def resolve_reporting_currency(db: Session, user_id: int, requested: Optional[str] = None) -> Tuple[str, bool]:
+    """Currency to report a user's figures in, and whether any need converting.
+
+    Without a requested currency this is the one all the user's accounts
+    share, else FX_BASE_CURRENCY. Raises fx.UnknownCurrencyError when a
+    needed rate is not loaded.
+    """
+    currencies = get_account_currencies(db, user_id)
+    if requested:
+        currency = requested.upper()
+    elif len(currencies) == 1:
+        currency = next(iter(currencies))
+    else:
+        currency = fx.FX_BASE_CURRENCY
+    convert = bool(currencies - {currency})
+    if convert:
+        fx.get_rate_table(db).check(currency, *currencies)
+    return currency, convert
+
+def upsert_fx_rates(db: Session, rows: Iterable[dict], batch_size: int = 5000) -> int:
+    """Insert or replace fx_rates rows ({currency, rate_date, rate}) in batches"""
+    dialect_insert = _dialect_insert(db)
+    count = 0
+    batch = []
+
+    def flush():
+        if dialect_insert is None:
+            for row in batch:
+                db.merge(FxRate(**row))
+        else:
+            statement = dialect_insert(FxRate.__table__)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=["currency", "rate_date"], set_={"rate": statement.excluded.rate},
+            ), batch)
+        batch.clear()
+
+    for row in rows:
+        batch.append(row)
+        count += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    db.commit()
+    fx.invalidate_rate_table()
+    return count
+
+def _converted_sums(db: Session, query, keys, currency: str, start_date: Optional[date], end_date: Optional[date]):
+    """{key tuple: (total, count)} of query's transactions, converted to currency.
+
+    SQL groups by keys plus account currency and transaction date, so the
+    rows reaching Python are one per key, currency and day rather than one
+    per transaction; those sums convert in a single vectorized pass.
+    """
+    account_currency = func.coalesce(Account.currency, fx.FX_BASE_CURRENCY)
+    query = query.add_columns(
+        account_currency,
+        Transaction.transaction_date,
+        func.sum(Transaction.amount),
+        func.count(Transaction.transaction_id),
+    ).join(Account, Account.account_id == Transaction.account_id)
+    rows = _windowed(query, start_date, end_date)\
+        .group_by(*keys, account_currency, Transaction.transaction_date)\
+        .all()
+    if not rows:
+        return {}
+
+    width = len(keys)
+    converted = fx.get_rate_table(db).convert(
+        [row[width + 2] for row in rows], [row[width] for row in rows], [row[width + 1] for row in rows], currency,
+    )
+    groups = {}
+    group_index = np.fromiter(
+        (groups.setdefault(tuple(row[:width]), len(groups)) for row in rows), dtype=np.intp, count=len(rows),
+    )
+    totals = np.bincount(group_index, weights=converted, minlength=len(groups))
+    counts = np.bincount(group_index, weights=[row[width + 3] for row in rows], minlength=len(groups))
+    return {key: (round(float(totals[i]), 2), int(counts[i])) for key, i in groups.items()}
+
+# Reports
+def _windowed(query, start_date: Optional[date], end_date: Optional[date]):
+    if start_date is not None:
+        query = query.filter(Transaction.transaction_date >= start_date)
+    if end_date is not None:
+        query = query.filter(Transaction.transaction_date <= end_date)
+    return query
+
+def get_type_totals(db: Session, user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                    currency: Optional[str] = None):
+    """Sum and count of transactions per transaction_type inside the window.
+
+    With currency, amounts are converted to it at their transaction date's rate.
+    """
+    if currency is not None:
+        query = db.query(Transaction.transaction_type).filter(Transaction.user_id == user_id)
+        sums = _converted_sums(db, query, [Transaction.transaction_type], currency, start_date, end_date)
+        return {t_type: {"total": total, "count": count} for (t_type,), (total, count) in sums.items()}
+    query = db.query(
+        Transaction.transaction_type,
+        func.coalesce(func.sum(Transaction.amount), 0),
+        func.count(Transaction.transaction_id),
+    ).filter(Transaction.user_id == user_id)
+    query = _windowed(query, start_date, end_date).group_by(Transaction.transaction_type)
+    return {t_type: {"total": float(total), "count": count} for t_type, total, count in query.all()}
+
+def get_category_totals(
+    db: Session,
+    user_id: int,
+    transaction_type: str = "expense",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    currency: Optional[str] = None,
+):
+    """Per-category sum and count for one transaction_type, largest first.
+
+    With currency, amounts are converted to it at their transaction date's rate.
+    """
+    if currency is not None:
+        keys = [Category.category_id, Category.category_name, Category.icon, Category.color]
+        query = db.query(*keys).select_from(Transaction)\
+            .join(Category, Category.category_id == Transaction.category_id)\
+            .filter(Transaction.user_id == user_id, Transaction.transaction_type == transaction_type)
+        sums = _converted_sums(db, query, keys, currency, start_date, end_date)
+        return sorted((
+            {
+                "category_id": category_id,
+                "category_name": category_name,
+                "icon": icon,
+                "color": color,
+                "total": total,
+                "count": count,
+            } for (category_id, category_name, icon, color), (total, count) in sums.items()
+        ), key=lambda item: item["total"], reverse=True)
+    total = func.sum(Transaction.amount)
+    query = db.query(
+        Category.category_id,
+        Category.category_name,
+        Category.icon,
+        Category.color,
+        total,
+        func.count(Transaction.transaction_id),
+    ).join(Category, Category.category_id == Transaction.category_id)\
+        .filter(Transaction.user_id == user_id, Transaction.transaction_type == transaction_type)
+    query = _windowed(query, start_date, end_date)\
+        .group_by(Category.category_id, Category.category_name, Category.icon, Category.color)\
+        .order_by(total.desc())
+    return [
+        {
+            "category_id": category_id,
+            "category_name": category_name,
+            "icon": icon,
+            "color": color,
+            "total": float(amount),
+            "count": count,
+        } for category_id, category_name, icon, color, amount, count in query.all()
+    ]
+
+def get_monthly_totals(db: Session, user_id: int, year: Optional[int] = None):
+    """Income/expense per (year, month) read from the monthly_totals rollup"""
+    query = db.query(
+        MonthlyTotal.year,
+        MonthlyTotal.month,
+        MonthlyTotal.transaction_type,
+        func.sum(MonthlyTotal.total),
+        func.sum(MonthlyTotal.count),
+    ).filter(MonthlyTotal.user_id == user_id, MonthlyTotal.count > 0)
+    if year is not None:
+        query = query.filter(MonthlyTotal.year == year)
+    query = query.group_by(MonthlyTotal.year, MonthlyTotal.month, MonthlyTotal.transaction_type)\
+        .order_by(MonthlyTotal.year, MonthlyTotal.month)
+
+    periods = {}
+    for row_year, row_month, t_type, total, count in query.all():
+        period = periods.setdefault((row_year, row_month), {
+            "year": row_year, "month": row_month,
+            "income": 0.0, "expense": 0.0, "transaction_count": 0,
+        })
+        period[t_type] = float(total)
+        period["transaction_count"] += int(count)
+    return list(periods.values())
+
+def get_yearly_category_totals(db: Session, user_id: int, year: int, transaction_type: str = "expense"):
+    """Per-category, per-month totals for one year read from the rollup"""
+    query = db.query(
+        MonthlyTotal.category_id,
+        MonthlyTotal.month,
+        func.sum(MonthlyTotal.total),
+        func.sum(MonthlyTotal.count),
+    ).filter(
+        MonthlyTotal.user_id == user_id,
+        MonthlyTotal.year == year,
+        MonthlyTotal.transaction_type == transaction_type,
+        MonthlyTotal.count > 0,
+    ).group_by(MonthlyTotal.category_id, MonthlyTotal.month)\
+        .order_by(MonthlyTotal.category_id, MonthlyTotal.month)
+    return [
+        {"category_id": category_id, "month": month, "total": float(total), "count": int(count)}
+        for category_id, month, total, count in query.all()
+    ]
+
+# Export
+EXPORT_SECTIONS = {
+    "accounts": (Account, ["account_id", "account_name", "account_type", "balance", "currency"]),
+    "transactions": (Transaction, [
+        "transaction_id", "account_id", "category_id", "description", "amount",
+        "transaction_type", "transaction_date", "payment_method", "notes",
+    ]),
+    "categories": (Category, ["category_id", "category_name", "category_type", "icon", "color"]),
+    "budgets": (Budget, ["budget_id", "category_id", "budget_amount", "month", "year"]),
+}
+
+# Sections exported with a converted copy of one amount: (amount column, converted column)
+EXPORT_CONVERSIONS = {
+    "accounts": ("balance", "converted_balance"),
+    "transactions": ("amount", "converted_amount"),
+}
+
+def export_columns(section: str, currency: Optional[str] = None):
+    columns = EXPORT_SECTIONS[section][1]
+    if currency is not None and section in EXPORT_CONVERSIONS:
+        return columns + [EXPORT_CONVERSIONS[section][1]]
+    return columns
+
+# Row order per section, primary key unless listed; transactions newest first,
+# as the export has always listed them (ix_transactions_user_date_id covers it)
+EXPORT_ORDER = {"transactions": (Transaction.transaction_date.desc(), Transaction.transaction_id.desc())}
+
+def iter_export_rows(db: Session, user_id: int, section: str, batch_size: int = 1000, currency: Optional[str] = None):
+    """Stream one export section as plain row mappings using a server-side cursor.
+
+    With currency, accounts and transactions also carry their amount converted
+    to it (at today's rate and the transaction date's rate respectively),
+    converted one fetched batch at a time.
+    """
+    model, columns = EXPORT_SECTIONS[section]
+    order = EXPORT_ORDER.get(section, (getattr(model, columns[0]),))
+    stmt = select(*[getattr(model, column) for column in columns])\
+        .where(model.user_id == user_id)\
+        .order_by(*order)\
+        .execution_options(yield_per=batch_size)
+    if model is Account:
+        stmt = stmt.where(Account.is_active == True)
+    if currency is None or section not in EXPORT_CONVERSIONS:
+        yield from db.execute(stmt).mappings()
+        return
+
+    amount_column, converted_column = EXPORT_CONVERSIONS[section]
+    if model is Transaction:
+        stmt = stmt.add_columns(func.coalesce(Account.currency, fx.FX_BASE_CURRENCY).label("account_currency"))\
+            .join(Account, Account.account_id == Transaction.account_id)
+    rates = fx.get_rate_table(db)
+    today = date.today()
+    for batch in db.execute(stmt).mappings().partitions():
+        if model is Transaction:
+            currencies = [row["account_currency"] for row in batch]
+            dates = [row["transaction_date"] for row in batch]
+        else:
+            currencies = [row["currency"] or fx.FX_BASE_CURRENCY for row in batch]
+            dates = today
+        converted = rates.convert([row[amount_column] or 0 for row in batch], currencies, dates, currency)
+        for row, value in zip(batch, converted.tolist()):
+            yield {**{column: row[column] for column in columns}, converted_column: value}
+
+# Balance snapshots and reconciliation
+def _signed_amount_expr():
+    return case((Transaction.transaction_type == "income", Transaction.amount), else_=-Transaction.amount)
+
+def _latest_snapshots(as_of: Optional[date] = None, inclusive: bool = True,
+                      user_id: Optional[int] = None, account_id: Optional[int] = None):
+    """Subquery with each account's most recent snapshot, optionally bounded by date"""
+    latest = select(BalanceSnapshot.account_id, func.max(BalanceSnapshot.snapshot_date).label("snapshot_date"))
+    if as_of is not None:
+        latest = latest.where(
+            BalanceSnapshot.snapshot_date <= as_of if inclusive else BalanceSnapshot.snapshot_date < as_of
+        )
+    if user_id is not None:
+        latest = latest.where(BalanceSnapshot.user_id == user_id)
+    if account_id is not None:
+        latest = latest.where(BalanceSnapshot.account_id == account_id)
+    latest = latest.group_by(BalanceSnapshot.account_id).subquery()
+    return select(BalanceSnapshot.account_id, BalanceSnapshot.user_id, BalanceSnapshot.snapshot_date, BalanceSnapshot.balance)\
+        .join(latest, and_(
+            BalanceSnapshot.account_id == latest.c.account_id,
+            BalanceSnapshot.snapshot_date == latest.c.snapshot_date,
+        )).subquery()
+
+def _derived_balances(as_of: Optional[date] = None, before_snapshot: bool = False,
+                      user_id: Optional[int] = None, account_id: Optional[int] = None):
+    """Select (account_id, user_id, balance): latest snapshot + transactions after it"""
+    snapshots = _latest_snapshots(as_of, not before_snapshot, user_id, account_id)
+    join_on = and_(
+        Transaction.account_id == snapshots.c.account_id,
+        Transaction.transaction_date > snapshots.c.snapshot_date,
+    )
+    if as_of is not None:
+        join_on = and_(join_on, Transaction.transaction_date <= as_of)
+    derived = snapshots.c.balance + func.coalesce(func.sum(_signed_amount_expr()), 0)
+    return select(snapshots.c.account_id, snapshots.c.user_id, derived.label("balance"))\
+        .select_from(snapshots.outerjoin(Transaction, join_on))\
+        .group_by(snapshots.c.account_id, snapshots.c.user_id, snapshots.c.balance)
+
+def get_balance_as_of(db: Session, account_id: int, user_id: int, as_of: Optional[date] = None):
+    """Ledger-derived balance of one account at the end of as_of (or now)"""
+    row = db.execute(_derived_balances(as_of, user_id=user_id, account_id=account_id)).first()
+    if row is not None:
+        return Decimal(str(row.balance)).quantize(Decimal("0.01"))
+
+    # No opening snapshot yet (pre-snapshot account): walk back from the stored balance
+    account = get_account_by_id(db, account_id, user_id)
+    if account is None:
+        return None
+    later = Decimal("0")
+    if as_of is not None:
+        later = db.query(func.coalesce(func.sum(_signed_amount_expr()), 0))\
+            .filter(Transaction.account_id == account_id, Transaction.transaction_date > as_of)\
+            .scalar()
+    return (Decimal(str(account.balance)) - Decimal(str(later))).quantize(Decimal("0.01"))
+
+def initialize_opening_snapshots(db: Session, user_id: Optional[int] = None):
+    """Give accounts created before snapshots existed an opening snapshot.
+
+    The opening balance is back-computed as stored balance minus the ledger,
+    i.e. the account is assumed correct at the time it is first initialized.
+    """
+    has_snapshot = select(BalanceSnapshot.account_id).where(BalanceSnapshot.account_id == Account.account_id)
+    ledger = select(func.coalesce(func.sum(_signed_amount_expr()), 0))\
+        .where(Transaction.account_id == Account.account_id)\
+        .scalar_subquery()
+    source = select(
+        Account.account_id,
+        Account.user_id,
+        literal(OPENING_SNAPSHOT_DATE, Date),
+        Account.balance - ledger,
+    ).where(~has_snapshot.exists())
+    if user_id is not None:
+        source = source.where(Account.user_id == user_id)
+    result = db.execute(insert(BalanceSnapshot).from_select(
+        ["account_id", "user_id", "snapshot_date", "balance"], source,
+    ))
+    db.commit()
+    return result.rowcount
+
+def create_balance_snapshots(db: Session, snapshot_date: date, user_id: Optional[int] = None):
+    """Snapshot every account at snapshot_date from its previous snapshot plus the delta since"""
+    source = _derived_balances(snapshot_date, before_snapshot=True, user_id=user_id).subquery()
+    rows = select(source.c.account_id, source.c.user_id, literal(snapshot_date, Date), source.c.balance)
+    clear = delete(BalanceSnapshot).where(BalanceSnapshot.snapshot_date == snapshot_date)
+    if user_id is not None:
+        clear = clear.where(BalanceSnapshot.user_id == user_id)
+
+    db.execute(clear)
+    result = db.execute(insert(BalanceSnapshot).from_select(
+        ["account_id", "user_id", "snapshot_date", "balance"], rows,
+    ))
+    db.commit()
+    return result.rowcount
+
+def reconcile_balances(db: Session, fix: bool = False, user_id: Optional[int] = None):
+    """Compare accounts.balance with the ledger-derived balance for every account.
+
+    Returns the drifted accounts; with fix=True their stored balance is reset
+    to the derived value.
+    """
+    derived = _derived_balances(user_id=user_id).subquery()
+    query = db.query(Account.account_id, Account.user_id, Account.balance, derived.c.balance)\
+        .join(derived, derived.c.account_id == Account.account_id)
+
+    drifted = []
+    for account_id, owner_id, stored, ledger_balance in query.all():
+        expected = Decimal(str(ledger_balance)).quantize(Decimal("0.01"))
+        if Decimal(str(stored)).quantize(Decimal("0.01")) != expected:
+            drifted.append({
+                "account_id": account_id,
+                "user_id": owner_id,
+                "stored_balance": float(stored),
+                "ledger_balance": float(expected),
+                "drift": float(Decimal(str(stored)) - expected),
+            })
+
+    if fix:
+        for item in drifted:
+            db.execute(
+                update(Account)
+                .where(Account.account_id == item["account_id"])
+                .values(balance=item["ledger_balance"])
+            )
+        for owner_id in {item["user_id"] for item in drifted}:
+            _bump_data_version(db, owner_id)
+        db.commit()
+    return drifted
+
+# Balance time series
+SERIES_DEFAULT_SPAN = {"day": timedelta(days=90), "week": timedelta(weeks=52), "month": timedelta(days=730)}
+
+def _period_floor(value: date, interval: str) -> date:
+    if interval == "week":
+        return value - timedelta(days=value.weekday())
+    if interval == "month":
+        return value.replace(day=1)
+    return value
+
+def _next_period(value: date, interval: str) -> date:
+    if interval == "week":
+        return value + timedelta(weeks=1)
+    if interval == "month":
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+def _period_count(start_date: date, end_date: date, interval: str) -> int:
+    """Periods from start_date (a period start) through the one holding end_date"""
+    if interval == "week":
+        return (end_date - start_date).days // 7 + 1
+    if interval == "month":
+        return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+    return (end_date - start_date).days + 1
+
+def _nth_period(start_date: date, interval: str, n: int) -> date:
+    if interval == "week":
+        return start_date + timedelta(weeks=n)
+    if interval == "month":
+        years, month = divmod(start_date.month - 1 + n, 12)
+        return date(start_date.year + years, month + 1, 1)
+    return start_date + timedelta(days=n)
+
+def _period_start_expr(db: Session, interval: str):
+    """SQL expression mapping transaction_date to the start of its day/ISO week"""
+    if interval == "day":
+        return Transaction.transaction_date
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc("week", Transaction.transaction_date), Date)
+    # SQLite: next Sunday (or today if Sunday), minus six days = Monday of the week
+    return func.date(Transaction.transaction_date, "weekday 0", "-6 days")
+
+def _as_period_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, int):
+        return date(value // 100, value % 100, 1)
+    return date.fromisoformat(str(value)[:10])
+
+def get_balance_series(
+    db: Session,
+    user_id: int,
+    interval: str = "month",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    points: int = 100,
+    account_id: Optional[int] = None,
+    currency: Optional[str] = None,
+):
+    """End-of-period balances per account and in total, at most `points` samples.
+
+    Per-period deltas come from GROUP BY over transactions (day/week) or the
+    monthly_totals rollup (month); a SUM() OVER window turns them into running
+    totals on top of each account's ledger-derived opening balance. Account
+    series stay in the account's currency; the total is in the reporting
+    currency (see resolve_reporting_currency), at each period's rates.
+    """
+    currency, convert = resolve_reporting_currency(db, user_id, currency)
+    end_date = end_date or date.today()
+    # Nothing predates the opening balances, so neither does the window
+    start_date = max(start_date or end_date - SERIES_DEFAULT_SPAN[interval], OPENING_SNAPSHOT_DATE)
+    start_date = _period_floor(start_date, interval)
+    account_currencies = {
+        a.account_id: a.currency for a in get_accounts(db, user_id)
+        if account_id is None or a.account_id == account_id
+    }
+    account_ids = list(account_currencies)
+    if not account_ids or start_date > end_date:
+        return {"interval": interval, "currency": currency, "dates": [], "total": [], "accounts": {}}
+
+    # Opening balances at the end of the day before the window
+    before_window = start_date - timedelta(days=1)
+    opening = {
+        row.account_id: Decimal(str(row.balance))
+        for row in db.execute(_derived_balances(before_window, user_id=user_id))
+        if row.account_id in account_ids
+    }
+    for missing in set(account_ids) - set(opening):
+        opening[missing] = get_balance_as_of(db, missing, user_id, before_window)
+
+    if interval == "month":
+        period = (MonthlyTotal.year * 100 + MonthlyTotal.month)
+        signed = case((MonthlyTotal.transaction_type == "income", MonthlyTotal.total), else_=-MonthlyTotal.total)
+        last_period = end_date.year * 100 + end_date.month
+        deltas = select(MonthlyTotal.account_id.label("account_id"), period.label("period"), signed.label("delta"))\
+            .where(
+                MonthlyTotal.user_id == user_id,
+                MonthlyTotal.account_id.in_(account_ids),
+                period >= start_date.year * 100 + start_date.month,
+                period <= last_period,
+            )
+        # The rollup holds whole months (start_date is a month start): take
+        # back what the last one has after end_date, future-dated rows included
+        month_end = _next_period(_period_floor(end_date, "month"), "month") - timedelta(days=1)
+        if end_date < month_end:
+            deltas = deltas.union_all(
+                select(Transaction.account_id, literal(last_period), -_signed_amount_expr())
+                .where(
+                    Transaction.user_id == user_id,
+                    Transaction.account_id.in_(account_ids),
+                    Transaction.transaction_date > end_date,
+                    Transaction.transaction_date <= month_end,
+                )
+            )
+        deltas = deltas.subquery()
+        grouped = select(deltas.c.account_id, deltas.c.period, func.sum(deltas.c.delta).label("delta"))\
+            .group_by(deltas.c.account_id, deltas.c.period)
+    else:
+        period = _period_start_expr(db, interval)
+        grouped = select(Transaction.account_id, period.label("period"), func.sum(_signed_amount_expr()).label("delta"))\
+            .where(
+                Transaction.user_id == user_id,
+                Transaction.account_id.in_(account_ids),
+                Transaction.transaction_date >= start_date,
+                Transaction.transaction_date <= end_date,
+            )\
+            .group_by(Transaction.account_id, period)
+    grouped = grouped.subquery()
+    running = select(
+        grouped.c.account_id,
+        grouped.c.period,
+        func.sum(grouped.c.delta).over(partition_by=grouped.c.account_id, order_by=grouped.c.period),
+    )
+    running_by_period = defaultdict(dict)
+    for row_account, row_period, running_total in db.execute(running):
+        running_by_period[_as_period_date(row_period)][row_account] = Decimal(str(running_total))
+
+    # Downsample by keeping the last period of each stride (balances are step
+    # functions). Only the sampled periods are generated, so `points` bounds
+    # the work however long the window is
+    count = _period_count(start_date, end_date, interval)
+    stride = -(-count // max(points, 1))
+    indexes = list(range(stride - 1, count, stride))
+    if not indexes or indexes[-1] != count - 1:
+        indexes.append(count - 1)
+
+    # Forward-fill: each sample takes the latest running totals at or before it
+    activity = sorted(running_by_period.items())
+    applied = 0
+    current = dict.fromkeys(account_ids, Decimal("0"))
+    series = {"interval": interval, "currency": currency, "dates": [], "total": [], "accounts": {a: [] for a in account_ids}}
+    for index in indexes:
+        period_start = _nth_period(start_date, interval, index)
+        while applied < len(activity) and activity[applied][0] <= period_start:
+            current.update(activity[applied][1])
+            applied += 1
+        series["dates"].append(period_start)
+        total = Decimal("0")
+        for a in account_ids:
+            balance = opening[a] + current[a]
+            series["accounts"][a].append(float(balance))
+            total += balance
+        series["total"].append(float(total))
+
+    if convert:
+        # Balances are as of each period's end, so convert at that day's rate;
+        # a whole account series at once, one rate lookup per account
+        rates = fx.get_rate_table(db)
+        period_ends = [min(_next_period(d, interval) - timedelta(days=1), end_date) for d in series["dates"]]
+        total = np.zeros(len(period_ends))
+        for a in account_ids:
+            total += rates.convert(series["accounts"][a], account_currencies[a], period_ends, currency)
+        series["total"] = np.round(total, 2).tolist()
+    return series
+
+def get_net_worth(db: Session, user_id: int, currency: Optional[str] = None):
+    """Current balance of every active account and their total in the reporting
+    currency (see resolve_reporting_currency), at today's rates"""
+    currency, convert = resolve_reporting_currency(db, user_id, currency)
+    today = date.today()
+    accounts = db.query(
+        Account.account_id,
+        Account.account_name,
+        Account.account_type,
+        func.coalesce(Account.currency, fx.FX_BASE_CURRENCY),
+        Account.balance,
+    ).filter(Account.user_id == user_id, Account.is_active == True)\
+        .order_by(Account.account_id)\
+        .all()
+    balances = [float(balance or 0) for *_, balance in accounts]
+    converted = balances
+    if convert and accounts:
+        converted = fx.get_rate_table(db).convert(balances, [row[3] for row in accounts], today, currency).tolist()
+    return {
+        "currency": currency,
+        "as_of": today,
+        "total": round(sum(converted), 2),
+        "accounts": [
+            {
+                "account_id": account_id,
+                "account_name": account_name,
+                "account_type": account_type,
+                "currency": account_currency,
+                "balance": balance,
+                "converted_balance": converted_balance,
+            } for (account_id, account_name, account_type, account_currency, _), balance, converted_balance
+            in zip(accounts, balances, converted)
+        ],
+    }
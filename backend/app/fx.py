@@ -0,0 +1,142 @@
+from datetime import date
+from typing import Iterable, Iterator, Optional, Tuple
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .models import FxRate
+import csv
+import numpy as np
+import os
+import threading
+import time
+
+# Exchange rates are stored against one base currency: fx_rates.rate is units
+# of a currency per one unit of the base, whose own rate is always 1. A date
+# with no row uses the latest earlier rate (the earliest one for dates before
+# the table starts), so monthly or weekday-only rate files work as loaded.
+FX_BASE_CURRENCY = os.getenv("FX_BASE_CURRENCY", "USD").upper()
+
+# Each process keeps the whole rate table in memory as sorted NumPy arrays and
+# re-reads it after this many seconds (load_fx_rates.py clears it right away
+# in its own process).
+FX_CACHE_TTL_SECONDS = float(os.getenv("FX_CACHE_TTL_SECONDS", "300"))
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def _as_days(dates, count: int) -> np.ndarray:
+    """datetime64[D] array of count dates from a date, an array or date objects.
+
+    Date objects go through toordinal(), far cheaper than NumPy converting
+    each one itself.
+    """
+    if isinstance(dates, date):
+        return np.full(count, np.datetime64(dates, "D"))
+    if isinstance(dates, np.ndarray):
+        return dates.astype("datetime64[D]")
+    return (np.fromiter((d.toordinal() for d in dates), np.int64, count) - _EPOCH_ORDINAL).astype("datetime64[D]")
+
+class UnknownCurrencyError(ValueError):
+    """No exchange rates are loaded for a currency"""
+
+    def __init__(self, currency: str):
+        self.currency = currency
+        super().__init__(f"No exchange rates loaded for {currency}")
+
+class RateTable:
+    """Immutable in-memory copy of fx_rates with vectorized lookups"""
+
+    def __init__(self, rows: Iterable[Tuple[str, date, Decimal]]):
+        grouped = {}
+        for currency, rate_date, rate in rows:
+            days, rates = grouped.setdefault(currency.upper(), ([], []))
+            days.append(rate_date)
+            rates.append(float(rate))
+        self._series = {}
+        for currency, (days, rates) in grouped.items():
+            days = _as_days(days, len(days))
+            order = np.argsort(days, kind="stable")
+            self._series[currency] = (days[order], np.array(rates, dtype=np.float64)[order])
+
+    @property
+    def currencies(self) -> set:
+        return set(self._series) | {FX_BASE_CURRENCY}
+
+    def rates(self, currency: str, dates) -> np.ndarray:
+        """Rate of currency on each of dates (datetime64[D] array)"""
+        currency = currency.upper()
+        if currency == FX_BASE_CURRENCY:
+            return np.ones(len(dates))
+        if currency not in self._series:
+            raise UnknownCurrencyError(currency)
+        days, rates = self._series[currency]
+        index = np.searchsorted(days, dates, side="right") - 1
+        return rates[np.maximum(index, 0)]
+
+    def convert(self, amounts, currencies, dates, to_currency: str) -> np.ndarray:
+        """amounts[i], in currencies[i] on dates[i], converted to to_currency.
+
+        currencies and dates may be a single value for every amount. Lookups
+        run once per distinct currency over all its amounts, never per row;
+        results are rounded to cents.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        count = len(amounts)
+        dates = _as_days(dates, count)
+        currencies = np.broadcast_to(np.asarray(currencies, dtype=object), (count,))
+        if count == 0:
+            return amounts
+
+        target = None
+        factors = np.ones(count)
+        for currency in set(currencies.tolist()):
+            source = currency.upper() if currency else FX_BASE_CURRENCY
+            if source == to_currency.upper():
+                continue
+            if target is None:
+                target = self.rates(to_currency, dates)
+            mask = currencies == currency
+            factors[mask] = target[mask] / self.rates(source, dates[mask])
+        return np.round(amounts * factors, 2)
+
+    def check(self, *currencies: Optional[str]):
+        """Raise UnknownCurrencyError unless every currency has rates"""
+        for currency in currencies:
+            if currency and currency.upper() not in self.currencies:
+                raise UnknownCurrencyError(currency.upper())
+
+_rate_table: Optional[RateTable] = None
+_rate_table_loaded_at = 0.0
+_rate_table_lock = threading.Lock()
+
+def get_rate_table(db: Session) -> RateTable:
+    """The cached RateTable, re-read from fx_rates once it is older than the TTL"""
+    global _rate_table, _rate_table_loaded_at
+    with _rate_table_lock:
+        if _rate_table is not None and time.monotonic() - _rate_table_loaded_at < FX_CACHE_TTL_SECONDS:
+            return _rate_table
+    table = RateTable(db.execute(select(FxRate.currency, FxRate.rate_date, FxRate.rate)))
+    with _rate_table_lock:
+        _rate_table, _rate_table_loaded_at = table, time.monotonic()
+    return table
+
+def invalidate_rate_table():
+    global _rate_table
+    with _rate_table_lock:
+        _rate_table = None
+
+def read_rate_file(path) -> Iterator[dict]:
+    """Rows of a CSV rates file with a date,currency,rate header.
+
+    Dates are ISO (YYYY-MM-DD), currencies ISO 4217 codes, and rate is units
+    of that currency per one unit of FX_BASE_CURRENCY.
+    """
+    with open(path, newline="", encoding="utf-8") as handle:
+        for line, row in enumerate(csv.DictReader(handle), start=2):
+            try:
+                currency = row["currency"].strip().upper()
+                rate = Decimal(row["rate"].strip())
+                if len(currency) != 3 or not currency.isalpha() or rate <= 0:
+                    raise ValueError
+                yield {"currency": currency, "rate_date": date.fromisoformat(row["date"].strip()), "rate": rate}
+            except (AttributeError, KeyError, ValueError, InvalidOperation):
+                raise ValueError(f"{path}, line {line}: expected date,currency,rate but got {row}")
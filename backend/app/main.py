@@ -1,17 +1,48 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, File, Query, Request, Response, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from datetime import timedelta
-from .database import engine, SessionLocal
-from .models import Base, User
-from .schemas import AccountCreate, TransactionCreate, CategoryCreate, UserCreate, UserLogin, BudgetCreate
-from .auth import authenticate_user, create_access_token, get_current_user
-from . import crud
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime
+from decimal import Decimal
+from typing import List, Optional
+import codecs
+import hashlib
+import csv
+import io
+import json
+import orjson
+import zlib
+from .database import engine, SessionLocal, get_db, run_db
+from .models import User
+from .schemas import (
+    AccountCreate, TransactionCreate, CategoryCreate, UserCreate, UserLogin, BudgetCreate,
+    AccountResponse, BudgetDetailResponse, BudgetResponse, CategoryResponse, SyncResponse,
+    TransactionDetailResponse, TransactionResponse, UserResponse,
+    BatchRequest, BatchResponse, BatchResult, RecurringTransactionCreate, RecurringTransactionResponse,
+)
+from .auth import (
+    authenticate_user, create_access_token, get_current_user, invalidate_cached_user,
+    verify_user_password, get_password_hash_async, get_password_hash_metrics,
+)
+from . import analytics, crud, migrations
+from .fx import UnknownCurrencyError
+from .metrics import RequestMetricsMiddleware, render_metrics, require_metrics_token
+from .scheduler import lifespan as run_scheduler
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is created and migrated by migrate.py at deploy time, so importing
+# the app touches no database. Startup only checks that the migrations ran,
+# which also opens the first pooled connection before any request needs it.
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_threadpool(migrations.log_pending, engine)
+    async with run_scheduler(app):
+        yield
 
-app = FastAPI(title="Finance Tracker API")
+app = FastAPI(title="Finance Tracker API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -20,48 +51,76 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Server-Timing"],
 )
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Per-request SQL count / timing: Server-Timing header and /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
+# Conditional GET: list routes answer 304 from the per-user data version alone.
+# The ETag names the user, so a browser shared by two users can never be told
+# its copy of one user's list is current for the other; Vary: Authorization
+# keeps shared caches from mixing them up too. Last-Modified is informational
+# only: a date cannot say whose data it describes, so If-Modified-Since alone
+# never earns a 304.
+def _not_modified(request: Request, response: Response, user_id: int, version: int, updated_at: Optional[datetime]):
+    """Set ETag/Last-Modified on response; return a 304 response if the client is current"""
+    variant = hashlib.sha1(request.url.path.encode() + b"?" + request.url.query.encode()).hexdigest()[:12]
+    headers = {
+        "ETag": f'W/"{user_id}-{version}-{variant}"',
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return None
+
+def _orjson_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+def _json_response(content, response: Response) -> Response:
+    """Serialize already response-shaped content with orjson, skipping
+    jsonable_encoder and response-model validation; keeps headers set on response"""
+    return Response(orjson.dumps(content, default=_orjson_default), media_type="application/json", headers=dict(response.headers))
 
 # Routes
 @app.get("/")
-def root():
+async def root():
     return {"message": "Finance Tracker API"}
 
 # Authentication Routes
 @app.post("/auth/register", status_code=201)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_username(db, user.username)
-    if db_user:
+async def register(user: UserCreate, db: Session = Depends(get_db)):
+    conflict = await run_db(db, crud.get_registration_conflict, user.username, user.email)
+    if conflict:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
+            detail=f"{conflict.capitalize()} already registered"
         )
     
-    db_user = crud.get_user_by_email(db, user.email)
-    if db_user:
+    # Hash on the bounded password pool, then create the user and default
+    # categories in a single transaction
+    hashed_password = await get_password_hash_async(user.password)
+    try:
+        user_id = await run_db(db, crud.register_user, user, hashed_password)
+    except IntegrityError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail="Username or email already registered"
         )
     
-    created_user = crud.create_user(db, user)
-    
-    # Create default categories for new user
-    crud.create_default_categories(db, created_user.user_id)
-    
-    return {"message": "User created successfully", "user_id": created_user.user_id}
+    return {"message": "User created successfully", "user_id": user_id}
 
 @app.post("/auth/login")
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await authenticate_user(db, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -86,131 +145,489 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 # Protected Routes
-@app.get("/users/me")
-def read_users_me(current_user: User = Depends(get_current_user)):
+@app.get("/users/me", response_model=UserResponse)
+async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 # Accounts
-@app.get("/accounts")
-def get_accounts(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    accounts = crud.get_accounts(db, current_user.user_id)
+@app.get("/accounts", response_model=List[AccountResponse])
+async def get_accounts(request: Request, response: Response, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    not_modified = _not_modified(
+        request, response, current_user.user_id, *await run_db(db, crud.get_data_version, current_user.user_id)
+    )
+    if not_modified:
+        return not_modified
+    accounts = await run_db(db, crud.get_accounts, current_user.user_id)
     return accounts
 
-@app.post("/accounts")
-def create_account(account: AccountCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    new_account = crud.create_account(db, account, current_user.user_id)
+@app.post("/accounts", response_model=AccountResponse)
+async def create_account(account: AccountCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    new_account = await run_db(db, crud.create_account, account, current_user.user_id)
     return new_account
 
-@app.get("/accounts/{account_id}")
-def get_account(account_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    account = crud.get_account_by_id(db, account_id, current_user.user_id)
+@app.get("/accounts/{account_id}", response_model=AccountResponse)
+async def get_account(account_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    account = await run_db(db, crud.get_account_by_id, account_id, current_user.user_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     return account
 
-@app.put("/accounts/{account_id}")
-def update_account(account_id: int, account: AccountCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    updated_account = crud.update_account(db, account_id, account, current_user.user_id)
+@app.get("/accounts/{account_id}/balance")
+async def get_account_balance(
+    account_id: int,
+    as_of: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Ledger-derived balance (latest snapshot + later transactions), optionally historical"""
+    balance = await run_db(db, crud.get_balance_as_of, account_id, current_user.user_id, as_of)
+    if balance is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return {"account_id": account_id, "as_of": as_of, "balance": float(balance)}
+
+@app.put("/accounts/{account_id}", response_model=AccountResponse)
+async def update_account(account_id: int, account: AccountCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    updated_account = await run_db(db, crud.update_account, account_id, account, current_user.user_id)
     if not updated_account:
         raise HTTPException(status_code=404, detail="Account not found")
     return updated_account
 
 @app.delete("/accounts/{account_id}")
-def delete_account(account_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    deleted = crud.delete_account(db, account_id, current_user.user_id)
+async def delete_account(account_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    deleted = await run_db(db, crud.delete_account, account_id, current_user.user_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Account not found")
     return {"message": "Account deleted successfully"}
 
 # Categories
-@app.get("/categories")
-def get_categories(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    categories = crud.get_categories(db, current_user.user_id)
+@app.get("/categories", response_model=List[CategoryResponse])
+async def get_categories(request: Request, response: Response, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    not_modified = _not_modified(
+        request, response, current_user.user_id, *await run_db(db, crud.get_data_version, current_user.user_id)
+    )
+    if not_modified:
+        return not_modified
+    categories = await run_db(db, crud.get_categories, current_user.user_id)
     return categories
 
-@app.post("/categories")
-def create_category(category: CategoryCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    new_category = crud.create_category(db, category, current_user.user_id)
+@app.post("/categories", response_model=CategoryResponse)
+async def create_category(category: CategoryCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    new_category = await run_db(db, crud.create_category, category, current_user.user_id)
     return new_category
 
-@app.get("/categories/{category_id}")
-def get_category(category_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    category = crud.get_category_by_id(db, category_id, current_user.user_id)
+@app.get("/categories/{category_id}", response_model=CategoryResponse)
+async def get_category(category_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    category = await run_db(db, crud.get_category_by_id, category_id, current_user.user_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
+# Delta sync
+@app.get("/sync", response_model=SyncResponse)
+async def sync_changes(since: Optional[str] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Changes and deletions after `since`; omit it for a full snapshot"""
+    try:
+        since_version = crud.decode_sync_cursor(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return await run_db(db, crud.get_changes, current_user.user_id, since_version)
+
 # Transactions
-@app.get("/transactions")
-def get_transactions(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    transactions = crud.get_transactions(db, current_user.user_id)
+@app.get("/transactions", response_model=List[TransactionDetailResponse])
+async def get_transactions(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    transaction_type: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List transactions newest first; follow X-Next-Cursor for the next page"""
+    not_modified = _not_modified(
+        request, response, current_user.user_id, *await run_db(db, crud.get_data_version, current_user.user_id)
+    )
+    if not_modified:
+        return not_modified
+    
+    try:
+        after = crud.decode_transaction_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Fetch one extra row to know whether another page exists
+    transactions = await run_db(
+        db, crud.get_transaction_rows, current_user.user_id,
+        limit=limit + 1,
+        cursor=after,
+        start_date=start_date,
+        end_date=end_date,
+        account_id=account_id,
+        category_id=category_id,
+        transaction_type=transaction_type,
+        min_amount=min_amount,
+        max_amount=max_amount,
+    )
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = crud.encode_transaction_cursor(last["transaction_date"], last["transaction_id"])
+    # Rows already have the TransactionDetailResponse shape; response_model documents it
+    return _json_response(transactions, response)
+
+@app.get("/transactions/search", response_model=List[TransactionDetailResponse])
+async def search_transactions(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over description and notes, best match first; follow X-Next-Cursor"""
+    try:
+        offset = crud.decode_search_cursor(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    transactions = await run_db(db, crud.search_transactions, current_user.user_id, q, limit + 1, offset)
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        response.headers["X-Next-Cursor"] = crud.encode_search_cursor(offset + limit)
     return transactions
 
-@app.post("/transactions")
-def create_transaction(transaction: TransactionCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    new_transaction = crud.create_transaction(db, transaction, current_user.user_id)
+@app.post("/transactions", response_model=TransactionResponse)
+async def create_transaction(transaction: TransactionCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    new_transaction = await run_db(db, crud.create_transaction, transaction, current_user.user_id)
     return new_transaction
 
-@app.get("/transactions/{transaction_id}")
-def get_transaction(transaction_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    transaction = crud.get_transaction_by_id(db, transaction_id, current_user.user_id)
+def _find_invalid_utf8(upload: UploadFile) -> Optional[int]:
+    """Byte offset of the first invalid UTF-8 sequence in the upload, if any.
+
+    Checked before importing: a decode error halfway through would otherwise
+    end the request after earlier batches were committed.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    offset = 0
+    try:
+        while chunk := upload.file.read(1 << 20):
+            decoder.decode(chunk)
+            offset += len(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        return offset + e.start
+    finally:
+        upload.file.seek(0)
+    return None
+
+def _iter_import_rows(upload: UploadFile, import_format: str):
+    """Lazily yield (row_number, row) pairs from a CSV or JSON-lines upload"""
+    text = codecs.getreader("utf-8-sig")(upload.file)
+    if import_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            # DictReader files cells beyond the header under a None key
+            if None in row:
+                yield row_number, f"Row has {len(row[None])} more field(s) than the header"
+                continue
+            # Empty CSV cells mean "not provided" for optional fields
+            yield row_number, {key: (value if value != "" else None) for key, value in row.items()}
+    else:
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            # Unparseable lines are passed through as an error message for that row
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = f"Invalid JSON: {e.msg}"
+            yield row_number, row if isinstance(row, (dict, str)) else "Each line must be a JSON object"
+
+@app.post("/transactions/import")
+async def import_transactions(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Bulk import a CSV or JSON-lines statement; bad rows are reported, not fatal"""
+    import_format = format or ("jsonl" if (file.filename or "").endswith((".jsonl", ".ndjson", ".json")) else "csv")
+    invalid_at = await run_in_threadpool(_find_invalid_utf8, file)
+    if invalid_at is not None:
+        raise HTTPException(status_code=400, detail=f"File is not valid UTF-8 (byte {invalid_at})")
+    return await run_db(db, crud.import_transactions, _iter_import_rows(file, import_format), current_user.user_id)
+
+@app.get("/transactions/{transaction_id}", response_model=TransactionResponse)
+async def get_transaction(transaction_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    transaction = await run_db(db, crud.get_transaction_by_id, transaction_id, current_user.user_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return transaction
 
-@app.put("/transactions/{transaction_id}")
-def update_transaction(transaction_id: int, transaction: TransactionCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    updated_transaction = crud.update_transaction(db, transaction_id, transaction, current_user.user_id)
+@app.put("/transactions/{transaction_id}", response_model=TransactionResponse)
+async def update_transaction(transaction_id: int, transaction: TransactionCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    updated_transaction = await run_db(db, crud.update_transaction, transaction_id, transaction, current_user.user_id)
     if not updated_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return updated_transaction
 
 @app.delete("/transactions/{transaction_id}")
-def delete_transaction(transaction_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    deleted = crud.delete_transaction(db, transaction_id, current_user.user_id)
+async def delete_transaction(transaction_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    deleted = await run_db(db, crud.delete_transaction, transaction_id, current_user.user_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return {"message": "Transaction deleted successfully"}
 
+# Recurring transactions
+@app.get("/recurring", response_model=List[RecurringTransactionResponse])
+async def get_recurring_transactions(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return await run_db(db, crud.get_recurring_transactions, current_user.user_id)
+
+@app.post("/recurring", status_code=201, response_model=RecurringTransactionResponse)
+async def create_recurring_transaction(recurring: RecurringTransactionCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Create a schedule; occurrences already due are added right away"""
+    if recurring.end_date is not None and recurring.end_date < recurring.start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    # A soft-deleted account is gone to the client (and its schedules were stopped)
+    account = await run_db(db, crud.get_account_by_id, recurring.account_id, current_user.user_id)
+    if not account or not account.is_active:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if not await run_db(db, crud.get_category_by_id, recurring.category_id, current_user.user_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+    return await run_db(db, crud.create_recurring_transaction, recurring, current_user.user_id)
+
+@app.delete("/recurring/{recurring_id}")
+async def delete_recurring_transaction(recurring_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    deleted = await run_db(db, crud.delete_recurring_transaction, recurring_id, current_user.user_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Recurring transaction not found")
+    return {"message": "Recurring transaction stopped"}
+
 # Budgets
-@app.get("/budgets")
-def get_budgets(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    budgets = crud.get_budgets(db, current_user.user_id)
+@app.get("/budgets", response_model=List[BudgetDetailResponse])
+async def get_budgets(request: Request, response: Response, with_progress: bool = False, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    not_modified = _not_modified(
+        request, response, current_user.user_id, *await run_db(db, crud.get_data_version, current_user.user_id)
+    )
+    if not_modified:
+        return not_modified
+    budgets = await run_db(db, crud.get_budgets, current_user.user_id, with_progress=with_progress)
     return budgets
 
-@app.post("/budgets")
-def create_budget(budget: BudgetCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    new_budget = crud.create_budget(db, budget, current_user.user_id)
+@app.post("/budgets", response_model=BudgetResponse)
+async def create_budget(budget: BudgetCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    new_budget = await run_db(db, crud.create_budget, budget, current_user.user_id)
     return new_budget
 
-@app.get("/budgets/{budget_id}")
-def get_budget(budget_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    budget = crud.get_budget_by_id(db, budget_id, current_user.user_id)
+@app.get("/budgets/{budget_id}", response_model=BudgetDetailResponse)
+async def get_budget(budget_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    budget = await run_db(db, crud.get_budget_by_id, budget_id, current_user.user_id)
     if not budget:
         raise HTTPException(status_code=404, detail="Budget not found")
     return budget
 
-@app.put("/budgets/{budget_id}")
-def update_budget(budget_id: int, budget: BudgetCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    updated_budget = crud.update_budget(db, budget_id, budget, current_user.user_id)
+@app.put("/budgets/{budget_id}", response_model=BudgetResponse)
+async def update_budget(budget_id: int, budget: BudgetCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    updated_budget = await run_db(db, crud.update_budget, budget_id, budget, current_user.user_id)
     if not updated_budget:
         raise HTTPException(status_code=404, detail="Budget not found")
     return updated_budget
 
 @app.delete("/budgets/{budget_id}")
-def delete_budget(budget_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    deleted = crud.delete_budget(db, budget_id, current_user.user_id)
+async def delete_budget(budget_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    deleted = await run_db(db, crud.delete_budget, budget_id, current_user.user_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Budget not found")
     return {"message": "Budget deleted successfully"}
 
+# Batch
+BATCH_RESPONSE_SCHEMAS = {
+    "accounts": AccountResponse,
+    "categories": CategoryResponse,
+    "transactions": TransactionResponse,
+    "budgets": BudgetResponse,
+}
+
+@app.post("/batch", response_model=BatchResponse)
+async def apply_batch(batch: BatchRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Apply ordered create/update/delete operations atomically: all commit or none do"""
+    def run(session):
+        results = crud.apply_batch(session, batch.operations, current_user.user_id)
+        # Build the response models while the session can still load attributes
+        return [
+            BatchResult(
+                op=operation.op,
+                entity=operation.entity,
+                id=entity_id,
+                data=BATCH_RESPONSE_SCHEMAS[operation.entity].model_validate(obj) if obj is not None else None,
+            )
+            for operation, entity_id, obj in results
+        ]
+    try:
+        results = await run_db(db, run)
+    except crud.BatchOperationError as e:
+        raise HTTPException(status_code=400, detail={"index": e.index, "error": e.message})
+    return BatchResponse(results=results)
+
+# Reports
+# ISO 4217 code of the reporting currency; omitted, reports use the currency
+# shared by all the user's accounts, else FX_BASE_CURRENCY
+CurrencyQuery = Query(None, pattern="^[A-Za-z]{3}$")
+
+async def _reporting_currency(db, user_id: int, currency: Optional[str]):
+    try:
+        return await run_db(db, crud.resolve_reporting_currency, user_id, currency)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/reports/summary")
+async def get_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    currency: Optional[str] = CurrencyQuery,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Income/expense totals and per-category spending aggregated in SQL,
+    in one reporting currency"""
+    currency, convert = await _reporting_currency(db, current_user.user_id, currency)
+    convert_to = currency if convert else None
+    totals = await run_db(db, crud.get_type_totals, current_user.user_id, start_date, end_date, convert_to)
+    income = totals.get("income", {"total": 0.0, "count": 0})
+    expense = totals.get("expense", {"total": 0.0, "count": 0})
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "currency": currency,
+        "total_income": income["total"],
+        "total_expense": expense["total"],
+        "net": income["total"] - expense["total"],
+        "transaction_count": income["count"] + expense["count"],
+        "expenses_by_category": await run_db(
+            db, crud.get_category_totals, current_user.user_id, "expense", start_date, end_date, convert_to
+        ),
+    }
+
+@app.get("/reports/monthly")
+async def get_monthly_report(
+    year: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Income and expense per month, served from the monthly_totals rollup"""
+    return await run_db(db, crud.get_monthly_totals, current_user.user_id, year)
+
+@app.get("/reports/yearly/{year}")
+async def get_yearly_report(
+    year: int,
+    transaction_type: str = "expense",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Per-category monthly totals for one year, served from the rollup"""
+    return {
+        "year": year,
+        "transaction_type": transaction_type,
+        "months": await run_db(db, crud.get_monthly_totals, current_user.user_id, year),
+        "categories": await run_db(db, crud.get_yearly_category_totals, current_user.user_id, year, transaction_type),
+    }
+
+@app.get("/reports/balance-series")
+async def get_balance_series(
+    interval: str = Query("month", pattern="^(day|week|month)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    points: int = Query(100, ge=1, le=1000),
+    account_id: Optional[int] = None,
+    currency: Optional[str] = CurrencyQuery,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Running balance per account and net worth over time, at most `points` samples"""
+    try:
+        return await run_db(
+            db, crud.get_balance_series, current_user.user_id,
+            interval, start_date, end_date, points, account_id, currency,
+        )
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/reports/net-worth")
+async def get_net_worth(
+    currency: Optional[str] = CurrencyQuery,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Current account balances and their total in one reporting currency"""
+    try:
+        return await run_db(db, crud.get_net_worth, current_user.user_id, currency)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Analytics: NumPy over the user's transactions as cached columns (see analytics.py)
+TransactionTypeQuery = Query("expense", pattern="^(income|expense)$")
+
+@app.get("/analytics/trends")
+async def get_trends(
+    transaction_type: str = TransactionTypeQuery,
+    interval: str = Query("month", pattern="^(week|month)$"),
+    periods: int = Query(12, ge=2, le=520),
+    window: int = Query(3, ge=1, le=52),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Per-category totals per period with a moving average and linear trend"""
+    try:
+        return await run_db(db, analytics.get_trends, current_user.user_id, transaction_type, interval, periods, window)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/forecast")
+async def get_forecast(
+    transaction_type: str = TransactionTypeQuery,
+    method: str = Query("linear", pattern="^(linear|seasonal)$"),
+    history: int = Query(24, ge=2, le=120),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Per-category forecast for the current month from the complete months before it"""
+    try:
+        return await run_db(db, analytics.get_forecast, current_user.user_id, transaction_type, method, history)
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/anomalies")
+async def get_anomalies(
+    transaction_type: str = TransactionTypeQuery,
+    method: str = Query("mad", pattern="^(mad|zscore)$"),
+    threshold: Optional[float] = Query(None, gt=0),
+    days: int = Query(90, ge=1, le=3660),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recent transactions with an unusual amount for their category"""
+    try:
+        return await run_db(
+            db, analytics.get_anomalies, current_user.user_id,
+            transaction_type, method, threshold, days, limit,
+        )
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # Add this debug endpoint (around line 190)
 @app.get("/debug/user-data")
-def get_user_debug_data(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_debug_data(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Debug endpoint to check user's data"""
-    accounts = crud.get_accounts(db, current_user.user_id)
-    categories = crud.get_categories(db, current_user.user_id)
-    transactions = crud.get_transactions(db, current_user.user_id)
+    accounts = await run_db(db, crud.get_accounts, current_user.user_id)
+    categories = await run_db(db, crud.get_categories, current_user.user_id)
+    transactions = await run_db(db, crud.get_transactions, current_user.user_id)
     
     return {
         "user_id": current_user.user_id,
@@ -227,32 +644,42 @@ def get_user_debug_data(current_user: User = Depends(get_current_user), db: Sess
             } for cat in categories
         ]
     }
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    """Prometheus metrics: per-route latency, SQL count and SQL time histograms"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/password-hashing", dependencies=[Depends(require_metrics_token)])
+async def password_hashing_metrics():
+    """Queue depth and latency of the bounded password hashing pool"""
+    return get_password_hash_metrics()
+
 # Settings & User Management Routes
 @app.put("/users/me/password")
-def change_password(
+async def change_password(
     old_password: str,
     new_password: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Change user password"""
-    from .auth import verify_password, get_password_hash
-    
     # Verify old password
-    if not verify_password(old_password, current_user.hashed_password):
+    if not await verify_user_password(db, current_user.user_id, old_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password"
         )
     
     # Update password
-    current_user.hashed_password = get_password_hash(new_password)
-    db.commit()
+    current_user.hashed_password = await get_password_hash_async(new_password)
+    await run_db(db, lambda session: session.commit())
+    invalidate_cached_user(current_user.username)
     
     return {"message": "Password updated successfully"}
 
 @app.put("/users/me/profile")
-def update_profile(
+async def update_profile(
     first_name: str = None,
     last_name: str = None,
     email: str = None,
@@ -266,7 +693,7 @@ def update_profile(
         current_user.last_name = last_name
     if email:
         # Check if email already exists
-        existing_user = crud.get_user_by_email(db, email)
+        existing_user = await run_db(db, crud.get_user_by_email, email)
         if existing_user and existing_user.user_id != current_user.user_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -274,8 +701,11 @@ def update_profile(
             )
         current_user.email = email
     
-    db.commit()
-    db.refresh(current_user)
+    def save(session):
+        session.commit()
+        session.refresh(current_user)
+    await run_db(db, save)
+    invalidate_cached_user(current_user.username)
     
     return {
         "message": "Profile updated successfully",
@@ -289,84 +719,111 @@ def update_profile(
     }
 
 @app.delete("/users/me")
-def delete_account(
+async def delete_account(
     password: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete user account"""
-    from .auth import verify_password
-    
     # Verify password before deletion
-    if not verify_password(password, current_user.hashed_password):
+    if not await verify_user_password(db, current_user.user_id, password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect password"
         )
     
-    # Delete user (cascade will delete all related data)
-    db.delete(current_user)
-    db.commit()
+    # Delete user along with all related data
+    await run_db(db, crud.delete_user, current_user)
+    invalidate_cached_user(current_user.username)
     
     return {"message": "Account deleted successfully"}
 
+def _export_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return str(value)
+    return value
+
+def _export_chunks(user_info: dict, user_id: int, export_format: str, currency: Optional[str] = None):
+    """Yield the export piece by piece; memory stays flat regardless of history size"""
+    db = SessionLocal()
+    try:
+        if export_format == "json":
+            yield '{"user": ' + json.dumps(user_info)
+            for section in crud.EXPORT_SECTIONS:
+                yield f', "{section}": ['
+                separator = ""
+                for row in crud.iter_export_rows(db, user_id, section, currency=currency):
+                    yield separator + json.dumps({k: _export_value(v) for k, v in row.items()})
+                    separator = ", "
+                yield "]"
+            yield "}"
+        elif export_format == "ndjson":
+            yield json.dumps({"section": "user", **user_info}) + "\n"
+            for section in crud.EXPORT_SECTIONS:
+                for row in crud.iter_export_rows(db, user_id, section, currency=currency):
+                    yield json.dumps({"section": section, **{k: _export_value(v) for k, v in row.items()}}) + "\n"
+        else:
+            # One CSV block per section, each introduced by a "# <section>" line
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            sections = [("user", list(user_info))] + [(name, crud.export_columns(name, currency)) for name in crud.EXPORT_SECTIONS]
+            for section, columns in sections:
+                buffer.write(f"# {section}\n")
+                writer.writerow(columns)
+                rows = [user_info] if section == "user" else crud.iter_export_rows(db, user_id, section, currency=currency)
+                for row in rows:
+                    writer.writerow([_export_value(row[column]) for column in columns])
+                    if buffer.tell() >= 64 * 1024:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+                buffer.write("\n")
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
 @app.get("/users/me/export")
-def export_user_data(
+async def export_user_data(
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
+    gzip: bool = False,
+    currency: Optional[str] = CurrencyQuery,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Export all user data as JSON"""
-    accounts = crud.get_accounts(db, current_user.user_id)
-    transactions = crud.get_transactions(db, current_user.user_id)
-    categories = crud.get_categories(db, current_user.user_id)
-    budgets = crud.get_budgets(db, current_user.user_id)
-    
-    return {
-        "user": {
-            "username": current_user.username,
-            "email": current_user.email,
-            "first_name": current_user.first_name,
-            "last_name": current_user.last_name,
-            "created_at": str(current_user.created_at)
-        },
-        "accounts": [
-            {
-                "account_id": acc.account_id,
-                "account_name": acc.account_name,
-                "account_type": acc.account_type,
-                "balance": float(acc.balance),
-                "currency": acc.currency
-            } for acc in accounts
-        ],
-        "transactions": [
-            {
-                "transaction_id": trans.transaction_id,
-                "description": trans.description,
-                "amount": float(trans.amount),
-                "transaction_type": trans.transaction_type,
-                "transaction_date": str(trans.transaction_date),
-                "payment_method": trans.payment_method,
-                "notes": trans.notes
-            } for trans in transactions
-        ],
-        "categories": [
-            {
-                "category_id": cat.category_id,
-                "category_name": cat.category_name,
-                "category_type": cat.category_type,
-                "icon": cat.icon,
-                "color": cat.color
-            } for cat in categories
-        ],
-        "budgets": [
-            {
-                "budget_id": bud.budget_id,
-                "budget_amount": float(bud.budget_amount),
-                "month": bud.month,
-                "year": bud.year
-            } for bud in budgets
-        ]
+    """Stream all user data as JSON, NDJSON or CSV, optionally gzip-compressed.
+
+    With currency, account balances and transaction amounts also come
+    converted to it (converted_balance / converted_amount).
+    """
+    user_info = {
+        "username": current_user.username,
+        "email": current_user.email,
+        "first_name": current_user.first_name,
+        "last_name": current_user.last_name,
+        "created_at": str(current_user.created_at)
     }
+    if currency is not None:
+        # Fail before streaming starts rather than halfway through the body
+        currency, _ = await _reporting_currency(db, current_user.user_id, currency)
+        user_info["reporting_currency"] = currency
+    media_types = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+    headers = {"Content-Disposition": f'attachment; filename="finance-tracker-export.{format}"'}
+
+    chunks = _export_chunks(user_info, current_user.user_id, format, currency)
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        chunks = _gzip_chunks(chunks)
+    return StreamingResponse(chunks, media_type=media_types[format], headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,213 @@
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from .database import engine, async_engine
+from .auth import get_password_hash_metrics
+from collections import Counter
+import hmac
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Per-request SQL instrumentation. Engine events add each statement's count and
+# duration to the stats of the request being served (a context variable, so
+# it follows the work into threadpool workers and AsyncSession.run_sync).
+# RequestMetricsMiddleware reports them in a Server-Timing header and feeds
+# the per-route histograms rendered at /metrics.
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "0"))  # 0 disables the detector
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+
+# The metrics endpoints expose per-route traffic and latency and password
+# hashing pool saturation, so they are only served with METRICS_TOKEN set, to
+# requests bearing it (for Prometheus, the scrape job's authorization
+# credentials); otherwise they answer 404
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+def require_metrics_token(request: Request):
+    """Route dependency for the metrics endpoints"""
+    supplied = request.headers.get("authorization", "").encode()
+    if not METRICS_TOKEN or not hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "slowest_seconds", "slowest_statement", "shapes")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter() if DB_N_PLUS_ONE_THRESHOLD > 0 else None
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    if elapsed > stats.slowest_seconds:
+        stats.slowest_seconds = elapsed
+        stats.slowest_statement = statement
+    if stats.shapes is not None:
+        # Statements are already parameterized, so the SQL text is the shape
+        stats.shapes[statement] += 1
+
+def instrument_engine(sync_engine):
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple, Prometheus style"""
+
+    def __init__(self, name: str, help_text: str, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: tuple, value: float):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                labels = ",".join(f'{key}="{value}"' for key, value in zip(self.labels, label_values))
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return lines
+
+ROUTE_LABELS = ("method", "route")
+request_duration = Histogram("http_request_duration_seconds", "Request latency", DURATION_BUCKETS, ROUTE_LABELS)
+request_db_time = Histogram("http_request_db_seconds", "Time spent in SQL per request", DURATION_BUCKETS, ROUTE_LABELS)
+request_queries = Histogram("http_request_db_queries", "SQL statements per request", QUERY_COUNT_BUCKETS, ROUTE_LABELS)
+
+_counter_lock = threading.Lock()
+_responses = Counter()  # (method, route, status) -> count
+_n_plus_one_warnings = Counter()  # (method, route) -> count
+
+def _route_label(scope) -> str:
+    # The route template (/transactions/{transaction_id}) keeps label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+def _server_timing(stats: RequestStats, elapsed: float) -> bytes:
+    return (
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}, "
+        f"app;dur={elapsed * 1000:.1f}"
+    ).encode()
+
+class RequestMetricsMiddleware:
+    """Times each request, counts its SQL, sets Server-Timing and records metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Streamed bodies keep querying afterwards; /metrics has the full totals
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(stats, time.perf_counter() - started)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._record(scope, stats, time.perf_counter() - started, status_code)
+
+    def _record(self, scope, stats: RequestStats, elapsed: float, status_code: int):
+        labels = (scope["method"], _route_label(scope))
+        request_duration.observe(labels, elapsed)
+        request_db_time.observe(labels, stats.db_seconds)
+        request_queries.observe(labels, stats.queries)
+        with _counter_lock:
+            _responses[labels + (str(status_code),)] += 1
+
+        if stats.slowest_statement is not None and stats.slowest_seconds * 1000 >= DB_SLOW_QUERY_MS:
+            logger.warning(
+                "Slow SQL in %s %s: %.1f ms: %s",
+                labels[0], labels[1], stats.slowest_seconds * 1000, " ".join(stats.slowest_statement.split())[:500],
+            )
+        if stats.shapes:
+            statement, repeats = stats.shapes.most_common(1)[0]
+            if repeats >= DB_N_PLUS_ONE_THRESHOLD:
+                with _counter_lock:
+                    _n_plus_one_warnings[labels] += 1
+                logger.warning(
+                    "Possible N+1 in %s %s: statement ran %d times: %s",
+                    labels[0], labels[1], repeats, " ".join(statement.split())[:500],
+                )
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for histogram in (request_duration, request_db_time, request_queries):
+        lines.extend(histogram.render())
+
+    with _counter_lock:
+        responses = sorted(_responses.items())
+        warnings = sorted(_n_plus_one_warnings.items())
+    lines += ["# HELP http_responses_total Responses by route and status", "# TYPE http_responses_total counter"]
+    for (method, route, status_code), count in responses:
+        lines.append(f'http_responses_total{{method="{method}",route="{route}",status="{status_code}"}} {count}')
+    lines += ["# HELP db_n_plus_one_warnings_total Requests that repeated one statement shape", "# TYPE db_n_plus_one_warnings_total counter"]
+    for (method, route), count in warnings:
+        lines.append(f'db_n_plus_one_warnings_total{{method="{method}",route="{route}"}} {count}')
+
+    # The bounded password hashing pool (auth.py)
+    hashing = get_password_hash_metrics()
+    for key in ("workers", "max_queue", "queue_depth", "running"):
+        lines += [f"# TYPE password_hash_{key} gauge", f"password_hash_{key} {hashing[key]}"]
+    for key in ("completed", "rejected"):
+        lines += [f"# TYPE password_hash_{key}_total counter", f"password_hash_{key}_total {hashing[key]}"]
+    lines.append("# TYPE password_hash_duration_seconds histogram")
+    for bound, count in hashing["latency_buckets"].items():
+        lines.append(f'password_hash_duration_seconds_bucket{{le="{bound}"}} {count}')
+    lines.append(f'password_hash_duration_seconds_bucket{{le="+Inf"}} {hashing["completed"]}')
+    lines.append(f"password_hash_duration_seconds_sum {hashing['latency_sum_seconds']}")
+    lines.append(f"password_hash_duration_seconds_count {hashing['completed']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,208 @@
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import column, func, insert, inspect, select, table as table_clause, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from .models import Base, SchemaMigration, UserDataVersion, TRANSACTION_SEARCH_DDL, TRANSACTION_SEARCH_TABLE
+from . import crud
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema migrations, applied once per deploy by migrate.py rather
+# than checked on every app import. A new database gets the current models
+# from create_all and is stamped with every version; an existing one runs the
+# versions it has not seen yet, in order, each in its own transaction along
+# with its schema_migrations row.
+#
+# Databases created before this table existed (by the old import-time
+# create_all, at any point in the schema's history) start from version 0, so
+# every step checks before it changes anything and is a no-op where the
+# object is already there. That also makes a step safe to re-run after a
+# failure on a database without transactional DDL.
+#
+# To change the schema: edit models.py, then append a @migration with the
+# next version that makes the same change to an existing database.
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+MIGRATIONS: List[Migration] = []
+
+def migration(version: int, name: str):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+def head() -> int:
+    return MIGRATIONS[-1][0]
+
+# Idempotent building blocks; each returns whether it changed anything
+def _create_table(connection: Connection, table_name: str) -> bool:
+    if inspect(connection).has_table(table_name):
+        return False
+    Base.metadata.tables[table_name].create(connection)
+    return True
+
+def _create_index(connection: Connection, table_name: str, index_name: str) -> bool:
+    if index_name in {index["name"] for index in inspect(connection).get_indexes(table_name)}:
+        return False
+    index = next(index for index in Base.metadata.tables[table_name].indexes if index.name == index_name)
+    index.create(connection)
+    return True
+
+def _add_column(connection: Connection, table_name: str, column_name: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN for a nullable column as declared in models.py"""
+    if column_name in {column["name"] for column in inspect(connection).get_columns(table_name)}:
+        return False
+    column = Base.metadata.tables[table_name].c[column_name]
+    quote = connection.dialect.identifier_preparer.quote
+    ddl = f"ALTER TABLE {quote(table_name)} ADD COLUMN {quote(column_name)} {column.type.compile(connection.dialect)}"
+    for key in column.foreign_keys:
+        ddl += f" REFERENCES {quote(key.column.table.name)} ({quote(key.column.name)})"
+    connection.execute(text(ddl))
+    return True
+
+def _bare_table(table_name: str, *column_names: str):
+    """Table clause for a backfill UPDATE: unlike the model's table it has no
+    onupdate defaults, which would touch other columns or ones added later"""
+    return table_clause(table_name, *(column(name) for name in column_names))
+
+def _backfill(connection: Connection, fn: Callable[..., int]) -> int:
+    """Run a crud rebuild job inside the migration's transaction"""
+    with Session(bind=connection) as db:
+        return fn(db)
+
+@migration(1, "transaction list indexes")
+def _transaction_indexes(connection: Connection):
+    for name in (
+        "ix_transactions_user_date_id",
+        "ix_transactions_user_account_date",
+        "ix_transactions_user_category_date",
+        "ix_transactions_user_type_date",
+        "ix_transactions_user_type_category_date",
+    ):
+        _create_index(connection, "transactions", name)
+
+@migration(2, "monthly totals rollup")
+def _monthly_totals(connection: Connection):
+    if _create_table(connection, "monthly_totals"):
+        _backfill(connection, crud.rebuild_monthly_totals)
+
+@migration(3, "balance snapshots")
+def _balance_snapshots(connection: Connection):
+    if _create_table(connection, "balance_snapshots"):
+        _backfill(connection, crud.initialize_opening_snapshots)
+
+@migration(4, "user data versions")
+def _user_data_versions(connection: Connection):
+    # No backfill: a user without a row is at version 0
+    _create_table(connection, "user_data_versions")
+
+@migration(5, "delta sync columns and tombstones")
+def _delta_sync(connection: Connection):
+    for table_name in ("categories", "accounts", "transactions", "budgets"):
+        if _add_column(connection, table_name, "updated_at"):
+            table = _bare_table(table_name, "created_at", "updated_at")
+            connection.execute(update(table).where(table.c.updated_at.is_(None)).values(updated_at=table.c.created_at))
+        _create_index(connection, table_name, f"ix_{table_name}_user_updated")
+    _create_table(connection, "tombstones")
+
+@migration(6, "transaction search")
+def _transaction_search(connection: Connection):
+    dialect = connection.dialect.name
+    if dialect not in TRANSACTION_SEARCH_DDL:
+        return
+    created = dialect == "sqlite" and not inspect(connection).has_table(TRANSACTION_SEARCH_TABLE)
+    connection.execute(TRANSACTION_SEARCH_DDL[dialect])
+    if created:
+        _backfill(connection, crud.rebuild_search_index)
+
+@migration(7, "recurring transactions")
+def _recurring_transactions(connection: Connection):
+    _create_table(connection, "recurring_transactions")
+    _add_column(connection, "transactions", "recurring_id")
+    _create_index(connection, "transactions", "ux_transactions_recurring_date")
+
+@migration(8, "exchange rates")
+def _fx_rates(connection: Connection):
+    _create_table(connection, "fx_rates")
+
+@migration(9, "sync versions")
+def _sync_versions(connection: Connection):
+    # Existing rows and tombstones take the user's current version: a client
+    # whose old timestamp cursor is rejected resyncs from scratch anyway
+    for table_name in ("categories", "accounts", "transactions", "budgets", "tombstones"):
+        if _add_column(connection, table_name, "sync_version"):
+            table = _bare_table(table_name, "user_id", "sync_version")
+            connection.execute(
+                update(table)
+                .where(table.c.sync_version.is_(None))
+                .values(sync_version=func.coalesce(
+                    select(UserDataVersion.version).where(UserDataVersion.user_id == table.c.user_id).scalar_subquery(),
+                    0,
+                ))
+            )
+        _create_index(connection, table_name, f"ix_{table_name}_user_sync")
+
+def current_version(connection: Connection) -> Optional[int]:
+    """Applied schema version; None for an empty database, 0 for one that
+    predates schema_migrations"""
+    inspector = inspect(connection)
+    if not inspector.has_table("users"):
+        return None
+    if not inspector.has_table(SchemaMigration.__tablename__):
+        return 0
+    return connection.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+
+def pending(connection: Connection) -> List[Migration]:
+    version = current_version(connection) or 0
+    return [step for step in MIGRATIONS if step[0] > version]
+
+def _stamp(connection: Connection, steps: List[Migration]):
+    connection.execute(insert(SchemaMigration), [{"version": version, "name": name} for version, name, _ in steps])
+
+def upgrade(engine: Engine) -> List[Migration]:
+    """Create or migrate the schema to head(); returns the migrations applied"""
+    with engine.begin() as connection:
+        version = current_version(connection)
+        if version is None:
+            Base.metadata.create_all(connection)
+            _stamp(connection, MIGRATIONS)
+            return list(MIGRATIONS)
+        if version == 0:
+            _create_table(connection, SchemaMigration.__tablename__)
+
+    applied = []
+    for step in MIGRATIONS:
+        if step[0] <= version:
+            continue
+        with engine.begin() as connection:
+            step[2](connection)
+            _stamp(connection, [step])
+        logger.info("Applied migration %03d %s", step[0], step[1])
+        applied.append(step)
+    return applied
+
+def schema_drift(connection: Connection) -> List[str]:
+    """Tables, columns and indexes declared in models.py but missing from the database"""
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+    problems = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            problems.append(f"missing table {table.name}")
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        problems += [f"missing column {table.name}.{column.name}" for column in table.columns if column.name not in columns]
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        problems += [f"missing index {index.name} on {table.name}" for index in table.indexes if index.name not in indexes]
+    return problems
+
+def log_pending(engine: Engine):
+    """Startup check: warn when the database is behind this code's migrations"""
+    with engine.connect() as connection:
+        steps = pending(connection)
+    if steps:
+        logger.warning(
+            "Database schema is %d migration(s) behind (%s); run `python migrate.py`",
+            len(steps), ", ".join(f"{version:03d} {name}" for version, name, _ in steps),
+        )
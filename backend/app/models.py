@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, Boolean, DateTime, Index, PrimaryKeyConstraint, DDL, event, null
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import date, datetime
 from .database import Base
 
+# Date of the snapshot that carries an account's opening balance
+OPENING_SNAPSHOT_DATE = date(1900, 1, 1)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -33,10 +36,20 @@ class Category(Base):
     color = Column(String)
     is_default = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # User data version of the write that last changed the row, the delta sync
+    # cursor; any update resets it to NULL until that write's version bump
+    # stamps it (crud._stamp_sync_versions)
+    sync_version = Column(Integer, onupdate=null())
     
     user = relationship("User", back_populates="categories")
     transactions = relationship("Transaction", back_populates="category")
     budgets = relationship("Budget", back_populates="category")
+    
+    __table_args__ = (
+        Index("ix_categories_user_updated", "user_id", "updated_at"),
+        Index("ix_categories_user_sync", "user_id", "sync_version"),
+    )
 
 
 class Account(Base):
@@ -50,9 +63,16 @@ class Account(Base):
     currency = Column(String, default="USD")
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_version = Column(Integer, onupdate=null())
     
     user = relationship("User", back_populates="accounts")
     transactions = relationship("Transaction", back_populates="account")
+    
+    __table_args__ = (
+        Index("ix_accounts_user_updated", "user_id", "updated_at"),
+        Index("ix_accounts_user_sync", "user_id", "sync_version"),
+    )
 
 
 class Transaction(Base):
@@ -68,12 +88,61 @@ class Transaction(Base):
     transaction_date = Column(Date, nullable=False)
     payment_method = Column(String)
     notes = Column(String)
+    # Set on rows materialized from a RecurringTransaction schedule
+    recurring_id = Column(Integer, ForeignKey("recurring_transactions.recurring_id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_version = Column(Integer, onupdate=null())
     
     user = relationship("User", back_populates="transactions")
     account = relationship("Account", back_populates="transactions")
     category = relationship("Category", back_populates="transactions")
 
+    # Composite indexes backing keyset pagination and the list filters
+    __table_args__ = (
+        Index("ix_transactions_user_date_id", "user_id", "transaction_date", "transaction_id"),
+        Index("ix_transactions_user_account_date", "user_id", "account_id", "transaction_date"),
+        Index("ix_transactions_user_category_date", "user_id", "category_id", "transaction_date"),
+        Index("ix_transactions_user_type_date", "user_id", "transaction_type", "transaction_date"),
+        # Covers the budget progress aggregate (spent per category per month)
+        Index("ix_transactions_user_type_category_date", "user_id", "transaction_type", "category_id", "transaction_date", "amount"),
+        # Delta sync: rows changed after a cursor
+        Index("ix_transactions_user_updated", "user_id", "updated_at"),
+        Index("ix_transactions_user_sync", "user_id", "sync_version"),
+        # One row per schedule occurrence, even if two scheduler runs overlap
+        Index("ux_transactions_recurring_date", "recurring_id", "transaction_date", unique=True),
+    )
+
+
+# Full-text search over description and notes. SQLite keeps a separate FTS5
+# table maintained by the transaction CRUD paths, holding words as
+# "<user_id>_<word>" tokens so a lookup only walks that user's postings;
+# Postgres uses a GIN expression index that the database maintains itself.
+# Both are created and dropped with the schema; migrations.py adds them to
+# older databases.
+TRANSACTION_SEARCH_TABLE = "transactions_fts"
+TRANSACTION_SEARCH_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, coalesce(description, '') || ' ' || coalesce(notes, ''))"
+)
+TRANSACTION_SEARCH_DDL = {
+    "sqlite": DDL(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TRANSACTION_SEARCH_TABLE} "
+        "USING fts5(description, notes, tokenize=\"unicode61 tokenchars '_'\")"
+    ),
+    "postgresql": DDL(
+        f"CREATE INDEX IF NOT EXISTS ix_transactions_search ON transactions USING gin ({TRANSACTION_SEARCH_DOCUMENT})"
+    ),
+}
+
+for _dialect, _ddl in TRANSACTION_SEARCH_DDL.items():
+    event.listen(Base.metadata, "after_create", _ddl.execute_if(dialect=_dialect))
+
+# The FTS table is not a model, so drop_all would leave its rows behind to
+# collide with the rowids of new transactions; the GIN index goes with its table
+event.listen(Base.metadata, "before_drop", DDL(
+    f"DROP TABLE IF EXISTS {TRANSACTION_SEARCH_TABLE}"
+).execute_if(dialect="sqlite"))
+
 
 class Budget(Base):
     __tablename__ = "budgets"
@@ -85,6 +154,138 @@ class Budget(Base):
     month = Column(Integer, nullable=False)
     year = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sync_version = Column(Integer, onupdate=null())
     
     user = relationship("User", back_populates="budgets")
-    category = relationship("Category", back_populates="budgets")
\ No newline at end of file
+    category = relationship("Category", back_populates="budgets")
+    
+    __table_args__ = (
+        Index("ix_budgets_user_updated", "user_id", "updated_at"),
+        Index("ix_budgets_user_sync", "user_id", "sync_version"),
+    )
+
+
+class MonthlyTotal(Base):
+    """Per-month rollup of transactions, maintained by the transaction CRUD paths"""
+    __tablename__ = "monthly_totals"
+    
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.account_id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.category_id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    transaction_type = Column(String, nullable=False)
+    total = Column(Numeric(12, 2), nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "year", "month", "account_id", "category_id", "transaction_type"),
+    )
+
+
+class BalanceSnapshot(Base):
+    """Account balance as of the end of snapshot_date.
+
+    Every account has an opening snapshot dated OPENING_SNAPSHOT_DATE holding its
+    opening balance; later ones (e.g. month ends) let balances be derived as
+    snapshot + transactions after it instead of a full ledger scan.
+    """
+    __tablename__ = "balance_snapshots"
+    
+    account_id = Column(Integer, ForeignKey("accounts.account_id"), nullable=False)
+    snapshot_date = Column(Date, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False, index=True)
+    balance = Column(Numeric(12, 2), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("account_id", "snapshot_date"),
+    )
+
+
+class UserDataVersion(Base):
+    """Counter bumped by every write to a user's data; backs ETag / Last-Modified"""
+    __tablename__ = "user_data_versions"
+    
+    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+
+class Tombstone(Base):
+    """Record of a deleted account, transaction or budget, served by delta sync"""
+    __tablename__ = "tombstones"
+    
+    tombstone_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sync_version = Column(Integer)
+    
+    __table_args__ = (
+        Index("ix_tombstones_user_deleted", "user_id", "deleted_at"),
+        Index("ix_tombstones_user_sync", "user_id", "sync_version"),
+    )
+
+
+class RecurringTransaction(Base):
+    """Schedule that the recurring scheduler materializes into Transaction rows.
+
+    Occurrence n falls on start_date + n * interval units of frequency (monthly
+    and yearly dates clamp to the month end); occurrence_count of them exist so
+    far and next_due_date is the next one, NULL once the schedule has ended.
+    """
+    __tablename__ = "recurring_transactions"
+    
+    recurring_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.account_id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.category_id"), nullable=False)
+    transaction_type = Column(String, nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    description = Column(String, nullable=False)
+    payment_method = Column(String)
+    notes = Column(String)
+    frequency = Column(String, nullable=False)  # daily, weekly, monthly or yearly
+    interval = Column(Integer, nullable=False, default=1)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date)
+    occurrence_count = Column(Integer, nullable=False, default=0)
+    next_due_date = Column(Date)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # The scheduler's due query is a range scan on this index
+        Index("ix_recurring_transactions_next_due", "next_due_date"),
+        Index("ix_recurring_transactions_user", "user_id"),
+    )
+
+
+class FxRate(Base):
+    """Exchange rate of one currency on one date, loaded from a rates file.
+
+    rate is units of `currency` per one unit of the base currency
+    (fx.FX_BASE_CURRENCY); a date without a row uses the latest earlier rate.
+    """
+    __tablename__ = "fx_rates"
+    
+    currency = Column(String(3), nullable=False)
+    rate_date = Column(Date, nullable=False)
+    rate = Column(Numeric(18, 8), nullable=False)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("currency", "rate_date"),
+    )
+
+
+class SchemaMigration(Base):
+    """One row per migration applied to this database (see migrations.py)"""
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,50 @@
+from contextlib import asynccontextmanager, suppress
+from datetime import date
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from .database import SessionLocal
+from . import crud
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# In-process scheduler for recurring transactions. Every interval it
+# materializes the occurrences due by today; a run after downtime catches up
+# on everything missed. Set RECURRING_INTERVAL_SECONDS=0 to disable it, e.g.
+# on all but one instance.
+RECURRING_INTERVAL_SECONDS = int(os.getenv("RECURRING_INTERVAL_SECONDS", "3600"))
+
+def run_recurring_once(today: Optional[date] = None) -> int:
+    """One scheduler tick in its own session; returns the transactions created"""
+    db = SessionLocal()
+    try:
+        return crud.materialize_recurring(db, today)
+    finally:
+        db.close()
+
+async def _recurring_loop(interval: int):
+    while True:
+        try:
+            created = await run_in_threadpool(run_recurring_once)
+            if created:
+                logger.info("Materialized %d recurring transaction(s)", created)
+        except Exception:
+            # Includes losing a race with another instance; the next tick retries
+            logger.exception("Recurring transaction run failed")
+        await asyncio.sleep(interval)
+
+@asynccontextmanager
+async def lifespan(app):
+    """FastAPI lifespan: runs the recurring scheduler alongside the app"""
+    task = None
+    if RECURRING_INTERVAL_SECONDS > 0:
+        task = asyncio.create_task(_recurring_loop(RECURRING_INTERVAL_SECONDS))
+    try:
+        yield
+    finally:
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
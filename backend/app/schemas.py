@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from datetime import date
-from typing import Optional
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal, Optional, Union
 
 # User Schemas
 class UserBase(BaseModel):
@@ -23,7 +23,7 @@ class UserLogin(BaseModel):
 class UserResponse(UserBase):
     user_id: int
     is_active: bool
-    created_at: date
+    created_at: datetime
 
     class Config:
         from_attributes = True
@@ -33,13 +33,16 @@ class AccountCreate(BaseModel):
     account_name: str
     account_type: str
     balance: float
+    # ISO 4217 code; omitted, new accounts are USD and updates keep the current one
+    currency: Optional[str] = Field(None, pattern="^[A-Za-z]{3}$")
 
 class AccountResponse(AccountCreate):
     account_id: int
     user_id: int
     currency: str
     is_active: bool
-    created_at: date
+    created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -58,11 +61,17 @@ class TransactionCreate(BaseModel):
 class TransactionResponse(TransactionCreate):
     transaction_id: int
     user_id: int
-    created_at: date
+    created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+# List and search rows carry their category and account (eager-loaded)
+class TransactionDetailResponse(TransactionResponse):
+    category: Optional["CategoryResponse"] = None
+    account: Optional[AccountResponse] = None
+
 # Category Schemas
 class CategoryCreate(BaseModel):
     category_name: str
@@ -74,7 +83,8 @@ class CategoryResponse(CategoryCreate):
     category_id: int
     user_id: int
     is_default: bool
-    created_at: date
+    created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -89,7 +99,79 @@ class BudgetCreate(BaseModel):
 class BudgetResponse(BudgetCreate):
     budget_id: int
     user_id: int
-    created_at: date
+    created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BudgetDetailResponse(BudgetResponse):
+    category: Optional[CategoryResponse] = None
+    # Set by crud.get_budgets(with_progress=True)
+    spent: Optional[float] = None
+    remaining: Optional[float] = None
+    percent_used: Optional[float] = None
+
+# Recurring Transaction Schemas
+class RecurringTransactionCreate(BaseModel):
+    account_id: int
+    category_id: int
+    transaction_type: str
+    amount: float
+    description: str
+    payment_method: Optional[str] = None
+    notes: Optional[str] = None
+    frequency: Literal["daily", "weekly", "monthly", "yearly"]
+    interval: int = Field(1, ge=1, le=366)
+    start_date: date
+    end_date: Optional[date] = None
+
+class RecurringTransactionResponse(RecurringTransactionCreate):
+    recurring_id: int
+    user_id: int
+    occurrence_count: int
+    next_due_date: Optional[date] = None  # None once the schedule has ended
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Sync Schemas
+class SyncChanges(BaseModel):
+    accounts: List[AccountResponse]
+    categories: List[CategoryResponse]
+    transactions: List[TransactionResponse]
+    budgets: List[BudgetResponse]
+
+class SyncDeleted(BaseModel):
+    accounts: List[int]
+    categories: List[int]
+    transactions: List[int]
+    budgets: List[int]
+
+class SyncResponse(BaseModel):
+    cursor: Optional[str] = None  # None until the user has any data
+    changes: SyncChanges
+    deleted: SyncDeleted
+
+# Batch Schemas
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    entity: Literal["accounts", "categories", "transactions", "budgets"]
+    # Row to update or delete; "$n" refers to the row created by operation n
+    id: Optional[Union[int, str]] = None
+    # The entity's create schema for create and update; "$n" is allowed in *_id fields
+    data: Optional[Dict[str, Any]] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=500)
+
+class BatchResult(BaseModel):
+    op: str
+    entity: str
+    id: int
+    data: Optional[Union[AccountResponse, CategoryResponse, TransactionResponse, BudgetResponse]] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
@@ -0,0 +1,111 @@
+"""Analytics over one user's history: NumPy columns vs ORM objects in Python loops.
+
+Generates one user with --transactions transactions and times each analytics
+function (trends, linear and seasonal forecasts, MAD anomalies):
+
+    orm      crud-style ORM objects, per-row Python loops (monthly totals and
+             per-category z-scores only, as the baseline)
+    cold     analytics.* with an empty column cache: column select + NumPy
+    warm     analytics.* with the user's columns cached (the common case
+             between writes); this is the part that should stay under 50 ms
+
+    cd backend && python benchmarks/analytics.py --transactions 100000
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/analytics.db"
+
+from app import analytics
+from app.database import SessionLocal, engine
+from app.models import Transaction, User
+from generate_data import generate_data
+
+BUDGET_MS = 50
+
+
+def orm_baseline(db, user_id):
+    """What the endpoints would cost over ORM objects: monthly totals and z-scores in loops"""
+    rows = db.query(Transaction).filter(Transaction.user_id == user_id).all()
+    monthly = defaultdict(float)
+    by_category = defaultdict(list)
+    for row in rows:
+        if row.transaction_type == "expense":
+            amount = float(row.amount)
+            monthly[(row.category_id, row.transaction_date.year, row.transaction_date.month)] += amount
+            by_category[row.category_id].append((row.transaction_id, amount))
+    flagged = []
+    for values in by_category.values():
+        mean = sum(amount for _, amount in values) / len(values)
+        std = math.sqrt(sum((amount - mean) ** 2 for _, amount in values) / len(values)) or 1.0
+        flagged.extend(transaction_id for transaction_id, amount in values if abs(amount - mean) / std > 3)
+    return monthly, flagged
+
+
+CASES = {
+    "trends": lambda db, user_id: analytics.get_trends(db, user_id, "expense", "month", 12, 3),
+    "forecast": lambda db, user_id: analytics.get_forecast(db, user_id, "expense", "linear", 24),
+    "seasonal": lambda db, user_id: analytics.get_forecast(db, user_id, "expense", "seasonal", 24),
+    "anomalies": lambda db, user_id: analytics.get_anomalies(db, user_id, "expense", "mad", None, 90, 50),
+}
+
+
+def timed(fn, user_id, repeat, cold):
+    times = []
+    for _ in range(repeat):
+        if cold:
+            analytics.column_cache.clear()
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            fn(db, user_id)
+            times.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--months", type=int, default=36, help="history length")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case; the median is reported")
+    args = parser.parse_args()
+
+    generate_data(users=1, transactions_per_user=args.transactions, months=args.months, prefix="analytics", seed=7, reset=True)
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.user_id).filter(User.username == "analytics1").scalar()
+    finally:
+        db.close()
+
+    print(f"⏱️  {args.transactions} transactions over {args.months} months on {engine.url.get_backend_name()}, median of {args.repeat}")
+    orm_ms = timed(orm_baseline, user_id, max(1, args.repeat // 2), cold=False)
+    print(f"{'orm loops':>10}: {orm_ms:8.1f} ms (monthly totals + z-scores only)")
+    over_budget = []
+    for label, fn in CASES.items():
+        cold_ms = timed(fn, user_id, args.repeat, cold=True)
+        warm_ms = timed(fn, user_id, args.repeat, cold=False)
+        print(f"{label:>10}: {cold_ms:8.1f} ms cold  {warm_ms:8.1f} ms warm")
+        if warm_ms > BUDGET_MS:
+            over_budget.append(label)
+
+    if over_budget:
+        print(f"❌ over {BUDGET_MS} ms with cached columns: {', '.join(over_budget)}")
+        sys.exit(1)
+    print(f"✅ every analytics call under {BUDGET_MS} ms with cached columns")
+
+
+if __name__ == "__main__":
+    main()
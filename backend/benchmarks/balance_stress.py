@@ -0,0 +1,140 @@
+"""Concurrency stress check: parallel transaction writers must keep balances exact.
+
+Runs many threads that create, update and delete transactions against the same
+few accounts through the crud layer, then compares every account balance with
+the sum of its ledger. Uses a throwaway SQLite file unless DATABASE_URL is set.
+
+    cd backend && python benchmarks/balance_stress.py --workers 16 --operations 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/stress.db")
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import OperationalError
+
+from app import crud
+from app.database import engine, SessionLocal
+from app.models import Account, Base, Category, Transaction, User
+from app.schemas import TransactionCreate
+
+OPENING_BALANCE = Decimal("1000.00")
+
+
+def setup(accounts: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(username=f"stress-{time.time_ns()}", email=f"{time.time_ns()}@stress.test", hashed_password="x")
+        db.add(user)
+        db.flush()
+        category = Category(user_id=user.user_id, category_name="Stress", category_type="expense")
+        db.add(category)
+        account_rows = [
+            Account(user_id=user.user_id, account_name=f"A{i}", account_type="bank", balance=OPENING_BALANCE)
+            for i in range(accounts)
+        ]
+        db.add_all(account_rows)
+        db.commit()
+        return user.user_id, category.category_id, [a.account_id for a in account_rows]
+    finally:
+        db.close()
+
+
+def with_retry(fn, *args):
+    # SQLite reports lock contention as OperationalError; a real client retries
+    for attempt in range(50):
+        db = SessionLocal()
+        try:
+            return fn(db, *args)
+        except OperationalError:
+            db.rollback()
+            time.sleep(0.01 * (attempt + 1))
+        finally:
+            db.close()
+    raise RuntimeError("gave up after repeated lock contention")
+
+
+def writer(user_id: int, category_id: int, account_ids: list, operations: int, seed: int, counters: dict):
+    rng = random.Random(seed)
+    mine = []
+    for _ in range(operations):
+        payload = TransactionCreate(
+            account_id=rng.choice(account_ids),
+            category_id=category_id,
+            transaction_type=rng.choice(["income", "expense"]),
+            amount=round(rng.uniform(0.01, 500), 2),
+            description="stress",
+            transaction_date=date(2025, rng.randint(1, 12), rng.randint(1, 28)),
+        )
+        action = rng.random()
+        if mine and action < 0.25:
+            with_retry(crud.delete_transaction, mine.pop(rng.randrange(len(mine))), user_id)
+            counters["delete"] += 1
+        elif mine and action < 0.5:
+            with_retry(crud.update_transaction, rng.choice(mine), payload, user_id)
+            counters["update"] += 1
+        else:
+            mine.append(with_retry(crud.create_transaction, payload, user_id).transaction_id)
+            counters["create"] += 1
+
+
+def verify(user_id: int, account_ids: list) -> int:
+    db = SessionLocal()
+    try:
+        signed = case((Transaction.transaction_type == "income", Transaction.amount), else_=-Transaction.amount)
+        ledger = dict(
+            db.query(Transaction.account_id, func.coalesce(func.sum(signed), 0))
+            .filter(Transaction.user_id == user_id)
+            .group_by(Transaction.account_id)
+            .all()
+        )
+        drifted = 0
+        for account in db.query(Account).filter(Account.account_id.in_(account_ids)):
+            expected = OPENING_BALANCE + Decimal(str(ledger.get(account.account_id, 0))).quantize(Decimal("0.01"))
+            status = "✅" if account.balance == expected else "❌"
+            drifted += account.balance != expected
+            print(f"{status} account {account.account_id}: balance {account.balance}  ledger {expected}")
+        return drifted
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=200)
+    parser.add_argument("--accounts", type=int, default=3)
+    args = parser.parse_args()
+
+    user_id, category_id, account_ids = setup(args.accounts)
+    counters = {"create": 0, "update": 0, "delete": 0}
+    threads = [
+        threading.Thread(target=writer, args=(user_id, category_id, account_ids, args.operations, seed, counters))
+        for seed in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"⏱️  {sum(counters.values())} writes in {elapsed:.1f}s across {args.workers} threads {counters}")
+    drifted = verify(user_id, account_ids)
+    print("🎉 Balances exact" if not drifted else f"❌ {drifted} account(s) drifted")
+    sys.exit(1 if drifted else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""POST /batch vs the same writes sent as sequential requests.
+
+One "screen" creates an account, adds transactions to it and adjusts a
+budget: 2 + --transactions requests one by one, or a single /batch call
+whose operations refer to the new account as "$0". Both variants drive the
+real app in-process over ASGI with concurrent clients and report screens per
+second, latency and SQL statements per screen. With --concurrency above 1 on
+SQLite the numbers mostly measure waits on its single-writer lock.
+
+    cd backend && python benchmarks/batch.py --screens 200 --transactions 5
+    DB_ASYNC=true python benchmarks/batch.py
+
+The target database (DATABASE_URL, else a temporary SQLite file) is dropped
+and recreated, so never point it at real data.
+"""
+import argparse
+import asyncio
+import contextvars
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/batch.db"
+
+PASSWORD = "bench-pass"
+
+# SQL statements issued while serving the current screen
+_statements = contextvars.ContextVar("bench_statements", default=None)
+
+
+def _on_execute(*_):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def screen_requests(user, index, transactions):
+    """The requests of one screen; account_id None means "the account just created" """
+    today = date.today().isoformat()
+    budget = user["budgets"][index % len(user["budgets"])]
+    account = {"account_name": f"Wallet {index}", "account_type": "cash", "balance": 200}
+    payments = [
+        {
+            "account_id": None,
+            "category_id": user["expense_category_ids"][(index + n) % len(user["expense_category_ids"])],
+            "transaction_type": "expense",
+            "amount": 3 + n,
+            "description": f"Screen {index} purchase {n}",
+            "transaction_date": today,
+        }
+        for n in range(transactions)
+    ]
+    budget_update = {
+        "category_id": budget["category_id"],
+        "budget_amount": budget["budget_amount"] + index % 10,
+        "month": budget["month"],
+        "year": budget["year"],
+    }
+    return account, payments, budget, budget_update
+
+
+async def sequential_screen(client, user, index, transactions):
+    account, payments, budget, budget_update = screen_requests(user, index, transactions)
+    response = await client.post("/accounts", json=account, headers=user["headers"])
+    response.raise_for_status()
+    account_id = response.json()["account_id"]
+    for payment in payments:
+        (await client.post("/transactions", json={**payment, "account_id": account_id}, headers=user["headers"])).raise_for_status()
+    (await client.put(f"/budgets/{budget['budget_id']}", json=budget_update, headers=user["headers"])).raise_for_status()
+
+
+async def batch_screen(client, user, index, transactions):
+    account, payments, budget, budget_update = screen_requests(user, index, transactions)
+    operations = [{"op": "create", "entity": "accounts", "data": account}]
+    operations += [{"op": "create", "entity": "transactions", "data": {**payment, "account_id": "$0"}} for payment in payments]
+    operations.append({"op": "update", "entity": "budgets", "id": budget["budget_id"], "data": budget_update})
+    response = await client.post("/batch", json={"operations": operations}, headers=user["headers"])
+    response.raise_for_status()
+
+
+async def run_variant(client, label, screen, users, args):
+    latencies, statements = [], []
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < args.screens:
+            index = next_index
+            next_index += 1
+            counter = [0]
+            token = _statements.set(counter)
+            started = time.perf_counter()
+            try:
+                await screen(client, users[index % len(users)], index, args.transactions)
+            finally:
+                _statements.reset(token)
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter[0])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    rate = len(latencies) / elapsed
+    print(
+        f"{label:>10}: {rate:8.1f} screens/s  p50 {statistics.median(latencies) * 1000:7.1f}  "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms  "
+        f"{statistics.mean(statements):5.1f} statements/screen"
+    )
+    return rate
+
+
+async def run(args, usernames):
+    from sqlalchemy import event
+
+    from app import database
+    from app.main import app
+
+    for sync_engine in filter(None, [database.engine, database.async_engine and database.async_engine.sync_engine]):
+        event.listen(sync_engine, "before_cursor_execute", _on_execute)
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            users = []
+            for username in usernames:
+                login = await client.post("/auth/login", json={"username": username, "password": PASSWORD})
+                login.raise_for_status()
+                headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+                categories = (await client.get("/categories", headers=headers)).json()
+                users.append({
+                    "headers": headers,
+                    "expense_category_ids": [c["category_id"] for c in categories if c["category_type"] == "expense"],
+                    "budgets": (await client.get("/budgets", headers=headers)).json(),
+                })
+
+            before = await run_variant(client, "sequential", sequential_screen, users, args)
+            after = await run_variant(client, "batch", batch_screen, users, args)
+            print(f"✅ {after / before:.2f}x screens/s with /batch")
+    finally:
+        # aiosqlite connections hold non-daemon threads until disposed
+        if database.async_engine is not None:
+            await database.async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--screens", type=int, default=200, help="screens per variant")
+    parser.add_argument("--transactions", type=int, default=5, help="transactions created per screen")
+    parser.add_argument("--concurrency", type=int, default=1, help="concurrent clients")
+    args = parser.parse_args()
+
+    from generate_data import generate_data
+
+    usernames = generate_data(users=args.users, transactions_per_user=100, password=PASSWORD, prefix="batch", reset=True)
+
+    from app.database import DB_ASYNC, engine
+    print(
+        f"⏱️  {engine.url.get_backend_name()} ({'async' if DB_ASYNC else 'sync'} mode), "
+        f"{args.screens} screens of 1 account + {args.transactions} transactions + 1 budget update, "
+        f"{args.concurrency} concurrent clients"
+    )
+    asyncio.run(run(args, usernames))
+
+
+if __name__ == "__main__":
+    main()
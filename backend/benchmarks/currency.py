@@ -0,0 +1,157 @@
+"""Multi-currency reporting: per-row conversion vs grouped, vectorized conversion.
+
+Generates one user whose accounts are in USD, EUR and GBP, loads a daily rate
+table for the history (a random walk), and times the income/expense summary
+in a reporting currency two ways:
+
+    per-row    every transaction fetched and converted in a Python loop
+    grouped    crud.get_type_totals: SQL sums per currency and day, converted
+               by fx.RateTable in one NumPy pass
+
+It also times the converted CSV-style export of the transactions section
+against the unconverted one, and checks both summary paths agree to within
+rounding (a cent per group at most).
+
+    cd backend && python benchmarks/currency.py --transactions 200000
+"""
+import argparse
+import bisect
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/currency.db"
+
+from sqlalchemy import func, select, update
+
+from app import crud, fx
+from app.database import SessionLocal, engine
+from app.models import Account, FxRate, Transaction, User
+from generate_data import generate_data
+
+CURRENCIES = ["USD", "EUR", "GBP"]
+START_RATES = {"EUR": 0.92, "GBP": 0.79, "JPY": 150.0}
+
+
+def load_rates(db, start, end, seed):
+    rng = random.Random(seed)
+    rows = []
+    for currency, rate in START_RATES.items():
+        day = start
+        while day <= end:
+            rows.append({"currency": currency, "rate_date": day, "rate": Decimal(f"{rate:.6f}")})
+            rate *= 1 + rng.gauss(0, 0.004)
+            day += timedelta(days=1)
+    return crud.upsert_fx_rates(db, rows)
+
+
+def per_row_totals(db, user_id, currency):
+    """The naive path: fetch every transaction and convert it in Python"""
+    series = {}
+    for code, rate_date, rate in db.execute(
+        select(FxRate.currency, FxRate.rate_date, FxRate.rate).order_by(FxRate.currency, FxRate.rate_date)
+    ):
+        days, rates = series.setdefault(code, ([], []))
+        days.append(rate_date)
+        rates.append(float(rate))
+
+    def rate_on(code, day):
+        if code == fx.FX_BASE_CURRENCY:
+            return 1.0
+        days, rates = series[code]
+        return rates[max(bisect.bisect_right(days, day) - 1, 0)]
+
+    totals = {}
+    rows = db.execute(
+        select(Transaction.transaction_type, Transaction.amount, Account.currency, Transaction.transaction_date)
+        .join(Account, Account.account_id == Transaction.account_id)
+        .where(Transaction.user_id == user_id)
+    )
+    for t_type, amount, code, day in rows:
+        entry = totals.setdefault(t_type, {"total": 0.0, "count": 0})
+        entry["total"] += float(amount) * rate_on(currency, day) / rate_on(code, day)
+        entry["count"] += 1
+    return {t_type: {"total": round(entry["total"], 2), "count": entry["count"]} for t_type, entry in totals.items()}
+
+
+def grouped_totals(db, user_id, currency):
+    return crud.get_type_totals(db, user_id, currency=currency)
+
+
+def export_rows(db, user_id, currency):
+    return sum(1 for _ in crud.iter_export_rows(db, user_id, "transactions", currency=currency))
+
+
+def timed(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            result = fn(db)
+            times.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return result, statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=200000)
+    parser.add_argument("--months", type=int, default=36, help="history length")
+    parser.add_argument("--currency", default="JPY", help="reporting currency")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per path; the median is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate_data(users=1, accounts_per_user=len(CURRENCIES), transactions_per_user=args.transactions,
+                  months=args.months, prefix="currency", seed=args.seed, reset=True)
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.user_id).filter(User.username == "currency1").scalar()
+        account_ids = [a for (a,) in db.query(Account.account_id).filter(Account.user_id == user_id).order_by(Account.account_id)]
+        db.execute(update(Account), [{"account_id": a, "currency": c} for a, c in zip(account_ids, CURRENCIES)])
+        first_day = db.query(func.min(Transaction.transaction_date)).scalar()
+        loaded = load_rates(db, first_day, date.today(), args.seed)
+        groups = db.query(Account.currency, Transaction.transaction_type, Transaction.transaction_date)\
+            .join(Account, Account.account_id == Transaction.account_id)\
+            .filter(Transaction.user_id == user_id).distinct().count()
+    finally:
+        db.close()
+
+    print(
+        f"⏱️  {args.transactions} transactions in {', '.join(CURRENCIES)} over {args.months} months, "
+        f"{loaded} daily rates, reporting in {args.currency} on {engine.url.get_backend_name()}, median of {args.repeat}"
+    )
+    naive, naive_ms = timed(lambda db: per_row_totals(db, user_id, args.currency), args.repeat)
+    print(f"   per-row: {naive_ms:8.1f} ms")
+    fast, fast_ms = timed(lambda db: grouped_totals(db, user_id, args.currency), args.repeat)
+    print(f"   grouped: {fast_ms:8.1f} ms  ({groups} currency/type/day groups)")
+
+    plain_count, plain_ms = timed(lambda db: export_rows(db, user_id, None), args.repeat)
+    converted_count, converted_ms = timed(lambda db: export_rows(db, user_id, args.currency), args.repeat)
+    print(f"    export: {plain_ms:8.1f} ms plain, {converted_ms:8.1f} ms converted ({converted_count / converted_ms * 1000:,.0f} rows/s)")
+
+    tolerance = 0.01 * groups
+    for t_type in naive:
+        if naive[t_type]["count"] != fast[t_type]["count"] or abs(naive[t_type]["total"] - fast[t_type]["total"]) > tolerance:
+            print(f"❌ {t_type}: per-row {naive[t_type]} vs grouped {fast[t_type]}")
+            sys.exit(1)
+    if plain_count != converted_count:
+        print(f"❌ export rows differ: {plain_count} vs {converted_count}")
+        sys.exit(1)
+    print(f"✅ {naive_ms / fast_ms:.1f}x faster summary conversion; totals agree within rounding")
+
+
+if __name__ == "__main__":
+    main()
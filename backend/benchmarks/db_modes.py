@@ -0,0 +1,126 @@
+"""Compare requests/second of the sync (threadpool) and async (AsyncSession) DB modes.
+
+Starts one uvicorn server per mode against a fresh SQLite database, seeds a
+user with transactions, then hammers read endpoints with concurrent clients.
+
+    cd backend && python benchmarks/db_modes.py --concurrency 64 --duration 10
+
+Requires httpx and uvicorn; the async mode also needs aiosqlite (or asyncpg).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ENDPOINTS = ["/accounts", "/categories", "/transactions?limit=50", "/reports/summary"]
+
+
+def start_server(port: int, database_url: str, db_async: bool):
+    env = dict(os.environ, DATABASE_URL=database_url, DB_ASYNC="true" if db_async else "false")
+    # As in a deploy: create the schema first, then start the app
+    subprocess.run([sys.executable, "migrate.py"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, check=True)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get("/")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def seed(client: httpx.AsyncClient, transactions: int) -> dict:
+    await client.post("/auth/register", json={"username": "bench", "email": "bench@example.com", "password": "bench-pass"})
+    login = await client.post("/auth/login", json={"username": "bench", "password": "bench-pass"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    account = (await client.post("/accounts", headers=headers, json={
+        "account_name": "Bench", "account_type": "bank", "balance": 0,
+    })).json()
+    category = next(c for c in (await client.get("/categories", headers=headers)).json() if c["category_type"] == "expense")
+    rows = "account_id,category_id,transaction_type,amount,description,transaction_date\n" + "".join(
+        f"{account['account_id']},{category['category_id']},expense,{1 + i % 50},row {i},2025-{1 + i % 12:02d}-{1 + i % 28:02d}\n"
+        for i in range(transactions)
+    )
+    await client.post("/transactions/import", headers=headers, files={"file": ("seed.csv", rows)})
+    return headers
+
+
+async def load(client: httpx.AsyncClient, headers: dict, concurrency: int, duration: float):
+    latencies = []
+    errors = 0
+    stop_at = time.monotonic() + duration
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        i = worker_id
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            response = await client.get(ENDPOINTS[i % len(ENDPOINTS)], headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+            i += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def run_mode(db_async: bool, port: int, args) -> dict:
+    database_url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    server = start_server(port, database_url, db_async)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_until_up(client)
+            headers = await seed(client, args.transactions)
+            await load(client, headers, args.concurrency, 1.0)  # warm-up
+            return await load(client, headers, args.concurrency, args.duration)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"⏱️  {args.concurrency} concurrent clients, {args.duration}s per mode, {args.transactions} transactions")
+    for label, db_async in (("sync", False), ("async", True)):
+        result = asyncio.run(run_mode(db_async, args.port, args))
+        print(
+            f"{label:>5}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+            f"p95 {result['p95_ms']:7.1f} ms  ({result['requests']} requests, {result['errors']} errors)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Registrations per second: the old multi-commit path vs crud.register_user.
+
+Runs both paths against fresh databases with a precomputed password hash, so
+the numbers isolate the database work (bcrypt costs the same either way and is
+bounded separately by the password-hash pool).
+
+    cd backend && python benchmarks/registration.py --users 2000
+
+Set DATABASE_URL to a Postgres URL (one database per run is recreated) to
+benchmark there instead of a temporary SQLite file.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/registration.db"
+
+from sqlalchemy import event
+
+from app import auth, crud
+from app.database import SessionLocal, engine
+from app.models import Base, Category
+from app.schemas import UserCreate
+
+
+def legacy_register(db, user: UserCreate, hashed_password: str):
+    """The pre-batching flow: two probes, two commits, one INSERT per category"""
+    if crud.get_user_by_username(db, user.username) or crud.get_user_by_email(db, user.email):
+        raise ValueError("already registered")
+    created_user = crud.create_user(db, user, hashed_password)
+    for cat_data in crud.DEFAULT_CATEGORIES:
+        db.add(Category(user_id=created_user.user_id, is_default=True, **cat_data))
+    db.commit()
+    return created_user.user_id
+
+
+def batched_register(db, user: UserCreate, hashed_password: str):
+    if crud.get_registration_conflict(db, user.username, user.email):
+        raise ValueError("already registered")
+    return crud.register_user(db, user, hashed_password)
+
+
+def run(label: str, register, users: int, hashed_password: str):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for i in range(users):
+            register(db, UserCreate(username=f"{label}{i}", email=f"{label}{i}@example.com", password="x"), hashed_password)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", count)
+
+    print(
+        f"{label:>8}: {users / elapsed:8.1f} registrations/s  "
+        f"{elapsed / users * 1000:6.2f} ms each  {statements / users:5.1f} statements each"
+    )
+    return users / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    hashed_password = auth.get_password_hash("bench-pass")
+    print(f"⏱️  {args.users} sequential registrations per path on {engine.url.get_backend_name()}")
+    before = run("legacy", legacy_register, args.users, hashed_password)
+    after = run("batched", batched_register, args.users, hashed_password)
+    print(f"✅ {after / before:.2f}x registrations/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Serialization cost of a transaction list: ORM objects vs plain rows + orjson.
+
+Times the three ways GET /transactions can produce its JSON body for one page
+of transactions with their category and account:
+
+    encoder   ORM objects through jsonable_encoder + json (the old path)
+    model     ORM objects validated into List[TransactionDetailResponse]
+    rows      crud.get_transaction_rows dicts dumped with orjson (the fast path)
+
+Query and serialization time are reported separately.
+
+    cd backend && python benchmarks/serialization.py --rows 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/serialization.db"
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app import crud
+from app.database import SessionLocal, engine
+from app.main import _orjson_default
+from app.models import User
+from app.schemas import TransactionDetailResponse
+from generate_data import generate_data
+
+detail_list = TypeAdapter(List[TransactionDetailResponse])
+
+
+def encoder_path(db, user_id, limit):
+    rows = crud.get_transactions(db, user_id, limit=limit)
+    started = time.perf_counter()
+    body = json.dumps(jsonable_encoder(rows)).encode()
+    return rows, started, body
+
+
+def model_path(db, user_id, limit):
+    rows = crud.get_transactions(db, user_id, limit=limit)
+    started = time.perf_counter()
+    body = detail_list.dump_json(detail_list.validate_python(rows, from_attributes=True))
+    return rows, started, body
+
+
+def rows_path(db, user_id, limit):
+    rows = crud.get_transaction_rows(db, user_id, limit=limit)
+    started = time.perf_counter()
+    body = orjson.dumps(rows, default=_orjson_default)
+    return rows, started, body
+
+
+def run(label, path, user_id, limit, repeat):
+    query_times, encode_times = [], []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            rows, encode_started, body = path(db, user_id, limit)
+            finished = time.perf_counter()
+        finally:
+            db.close()
+        query_times.append(encode_started - started)
+        encode_times.append(finished - encode_started)
+
+    query_ms = statistics.median(query_times) * 1000
+    encode_ms = statistics.median(encode_times) * 1000
+    print(
+        f"{label:>8}: {query_ms:8.1f} ms query  {encode_ms:8.1f} ms serialize  "
+        f"{len(rows) / (query_ms + encode_ms) * 1000:10.0f} rows/s  {len(body) / 1024:7.0f} KiB"
+    )
+    return body, query_ms + encode_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="transactions in the page")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per path; the median is reported")
+    args = parser.parse_args()
+
+    generate_data(users=1, transactions_per_user=args.rows, prefix="serial", seed=1, reset=True)
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.user_id).filter(User.username == "serial1").scalar()
+    finally:
+        db.close()
+
+    print(f"⏱️  {args.rows} transactions per page on {engine.url.get_backend_name()}, median of {args.repeat}")
+    encoder_body, before = run("encoder", encoder_path, user_id, args.rows, args.repeat)
+    model_body, _ = run("model", model_path, user_id, args.rows, args.repeat)
+    rows_body, after = run("rows", rows_path, user_id, args.rows, args.repeat)
+
+    # The fast path must produce what the response model documents
+    if json.loads(model_body) != json.loads(rows_body):
+        print("❌ rows output differs from the response model")
+        sys.exit(1)
+    print(f"✅ {before / after:.1f}x faster end to end than the encoder path")
+
+
+if __name__ == "__main__":
+    main()
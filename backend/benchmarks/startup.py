@@ -0,0 +1,155 @@
+"""Cold-start latency: importing the app, starting it and serving the first request.
+
+Each run is a fresh interpreter, as for a new uvicorn worker or an autoscaled
+instance. It times:
+
+    import          `import app.main`
+    startup         the lifespan (migration check, which opens the first
+                    pooled connection; the recurring scheduler is disabled)
+    first request   GET /accounts for a seeded user
+    second request  the same again, for contrast
+
+and, for reference, what the import used to pay on every spawn before the
+schema moved to migrate.py (Base.metadata.create_all on an up-to-date
+database). Separately it checks that importing the app neither touches the
+database nor writes to stdout, and lists the slowest modules to import.
+
+    cd backend && python benchmarks/startup.py --runs 9 --max-import-ms 1500
+
+Exits non-zero if an import side effect is found or a --max-* budget is
+exceeded, so it can guard against startup regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/startup.db"
+
+USERNAME = "startup1"
+PHASES = ["import", "startup", "first request", "second request", "create_all"]
+
+
+def probe():
+    """Runs in the fresh interpreter; prints the phase timings as JSON"""
+    timings = {}
+    started = time.perf_counter()
+    from app.main import app
+    timings["import"] = time.perf_counter() - started
+
+    from fastapi.testclient import TestClient
+    from app.auth import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': USERNAME})}"}
+
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        timings["startup"] = time.perf_counter() - started
+        for phase in ("first request", "second request"):
+            started = time.perf_counter()
+            client.get("/accounts", headers=headers).raise_for_status()
+            timings[phase] = time.perf_counter() - started
+
+    from app.database import engine
+    from app.models import Base
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    timings["create_all"] = time.perf_counter() - started
+    print(json.dumps({phase: seconds * 1000 for phase, seconds in timings.items()}))
+
+
+def run_probe() -> dict:
+    env = dict(os.environ, RECURRING_INTERVAL_SECONDS="0")
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", __file__, "--probe"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_side_effects() -> list:
+    """Import the app against a database file that does not exist yet"""
+    database = Path(tempfile.mkdtemp()) / "untouched.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    problems = []
+    if database.exists():
+        problems.append("importing the app opened the database")
+    if result.stdout:
+        problems.append(f"importing the app printed {result.stdout.strip()!r}")
+    return problems
+
+
+def slowest_imports(count: int) -> list:
+    """(self ms, module) of the count slowest modules, from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            own, _, name = line[len("import time:"):].split("|")
+            if own.strip().isdigit():
+                modules.append((int(own) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters; the median is reported")
+    parser.add_argument("--transactions", type=int, default=1000)
+    parser.add_argument("--slowest", type=int, default=10, help="slowest imported modules to list (0: none)")
+    parser.add_argument("--max-import-ms", type=float, help="fail if the median import takes longer")
+    parser.add_argument("--max-first-request-ms", type=float, help="fail if the median first request takes longer")
+    parser.add_argument("--probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe()
+        return
+
+    # Imported here, not at the top: the probes must be the first to load the app
+    from generate_data import generate_data
+    generate_data(users=1, transactions_per_user=args.transactions, prefix="startup", reset=True)
+
+    run_probe()  # warm the OS file cache and .pyc files
+    runs = [run_probe() for _ in range(args.runs)]
+    print(f"⏱️  {args.runs} cold starts against {os.environ['DATABASE_URL'].split(':', 1)[0]}, median (min)")
+    medians = {}
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        medians[phase] = statistics.median(values)
+        label = "create_all (was on import)" if phase == "create_all" else phase
+        print(f"   {label:>26}: {medians[phase]:8.1f} ms  ({min(values):.1f})")
+
+    if args.slowest:
+        print("   slowest imports (self time):")
+        for own_ms, name in slowest_imports(args.slowest):
+            print(f"      {own_ms:7.1f} ms  {name}")
+
+    problems = import_side_effects()
+    if args.max_import_ms is not None and medians["import"] > args.max_import_ms:
+        problems.append(f"import took {medians['import']:.1f} ms (budget {args.max_import_ms:.0f} ms)")
+    if args.max_first_request_ms is not None and medians["first request"] > args.max_first_request_ms:
+        problems.append(f"first request took {medians['first request']:.1f} ms (budget {args.max_first_request_ms:.0f} ms)")
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"✅ import is side-effect free; cold start to first response {sum(medians[p] for p in PHASES[:3]):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Benchmark the FastAPI app endpoint by endpoint on generated data.
+
+Generates synthetic users (generate_data.py), then drives the real app
+in-process over ASGI with concurrent clients through login, list, search,
+report, create, update, delete and export requests. For each endpoint it
+reports throughput, p50/p95/p99 latency and SQL statements per request.
+
+    cd backend && python benchmarks/suite.py --users 50 --transactions 2000
+    python benchmarks/suite.py --database-url postgresql://localhost/finance_bench
+    DB_ASYNC=true python benchmarks/suite.py --json results-async.json
+
+Data generation is seeded, so runs are repeatable; --skip-generate reuses the
+data already in --database-url. The target database is dropped and recreated
+otherwise, so never point it at real data.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+PASSWORD = "bench-pass"
+PREFIX = "bench"
+
+# SQL statements issued while serving the current request
+_statements = contextvars.ContextVar("bench_statements", default=None)
+
+
+def _on_execute(*_):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class Scenario:
+    def __init__(self, name, build, requests=None, on_response=None):
+        self.name = name
+        self.build = build  # (user, index) -> (method, url, kwargs)
+        self.requests = requests
+        self.on_response = on_response  # (user, response), e.g. to remember created ids
+
+
+async def run_scenario(client, scenario, users, total, concurrency):
+    latencies, statements = [], []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            user = users[index % len(users)]
+            method, url, kwargs = scenario.build(user, index)
+            counter = [0]
+            token = _statements.set(counter)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, headers=user.get("headers"), **kwargs)
+                await response.aread()
+            finally:
+                _statements.reset(token)
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter[0])
+            if response.status_code >= 400:
+                errors += 1
+            elif scenario.on_response:
+                scenario.on_response(user, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "endpoint": scenario.name,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "queries": statistics.mean(statements),
+    }
+
+
+def build_scenarios(args):
+    today = date.today().isoformat()
+    quarter_ago = date.fromordinal(date.today().toordinal() - 90).isoformat()
+
+    def transaction_body(user, index):
+        return {
+            "account_id": user["account_ids"][index % len(user["account_ids"])],
+            "category_id": user["expense_category_ids"][index % len(user["expense_category_ids"])],
+            "transaction_type": "expense",
+            "amount": 5 + index % 40,
+            "description": f"Benchmark purchase {index}",
+            "transaction_date": today,
+        }
+
+    def create(user, index):
+        return "POST", "/transactions", {"json": transaction_body(user, index)}
+
+    def remember(user, response):
+        user["created"].append(response.json()["transaction_id"])
+
+    def update(user, index):
+        created = user["created"]
+        return "PUT", f"/transactions/{created[index % len(created)]}", {
+            "json": {**transaction_body(user, index), "description": f"Benchmark update {index}"},
+        }
+
+    def delete(user, index):
+        return "DELETE", f"/transactions/{user['created'].pop()}", {}
+
+    slow = min(args.requests, args.slow_requests)
+    return [
+        Scenario("POST /auth/login", lambda u, i: ("POST", "/auth/login", {
+            "json": {"username": u["username"], "password": PASSWORD},
+        }), slow),
+        Scenario("GET /accounts", lambda u, i: ("GET", "/accounts", {})),
+        Scenario("GET /categories", lambda u, i: ("GET", "/categories", {})),
+        Scenario("GET /budgets", lambda u, i: ("GET", "/budgets", {"params": {"with_progress": "true"}})),
+        Scenario("GET /transactions", lambda u, i: ("GET", "/transactions", {"params": {"limit": 50}})),
+        Scenario("GET /transactions filtered", lambda u, i: ("GET", "/transactions", {"params": {
+            "limit": 50, "start_date": quarter_ago, "transaction_type": "expense",
+        }})),
+        Scenario("GET /transactions/search", lambda u, i: ("GET", "/transactions/search", {
+            "params": {"q": ["uber", "coffee", "amazon", "rent", "hotel"][i % 5]},
+        })),
+        Scenario("GET /reports/summary", lambda u, i: ("GET", "/reports/summary", {})),
+        Scenario("GET /reports/monthly", lambda u, i: ("GET", "/reports/monthly", {})),
+        Scenario("GET /sync", lambda u, i: ("GET", "/sync", {})),
+        Scenario("POST /transactions", create, on_response=remember),
+        Scenario("PUT /transactions/{id}", update),
+        Scenario("DELETE /transactions/{id}", delete),
+        Scenario("GET /users/me/export", lambda u, i: ("GET", "/users/me/export", {"params": {"format": "ndjson"}}), slow),
+    ]
+
+
+async def prepare_users(client, usernames):
+    users = []
+    for username in usernames:
+        login = await client.post("/auth/login", json={"username": username, "password": PASSWORD})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        accounts = (await client.get("/accounts", headers=headers)).json()
+        categories = (await client.get("/categories", headers=headers)).json()
+        users.append({
+            "username": username,
+            "headers": headers,
+            "account_ids": [a["account_id"] for a in accounts],
+            "expense_category_ids": [c["category_id"] for c in categories if c["category_type"] == "expense"],
+            "created": [],
+        })
+    return users
+
+
+async def run_suite(args, usernames):
+    from sqlalchemy import event
+
+    from app import database
+    from app.main import app
+
+    for sync_engine in filter(None, [database.engine, database.async_engine and database.async_engine.sync_engine]):
+        event.listen(sync_engine, "before_cursor_execute", _on_execute)
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            users = await prepare_users(client, usernames[:args.clients])
+
+            results = []
+            for scenario in build_scenarios(args):
+                if args.only and not any(part in scenario.name for part in args.only):
+                    continue
+                result = await run_scenario(client, scenario, users, scenario.requests or args.requests, args.concurrency)
+                results.append(result)
+                print(
+                    f"{result['endpoint']:<28} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f}  "
+                    f"p95 {result['p95_ms']:7.1f}  p99 {result['p99_ms']:7.1f} ms  "
+                    f"{result['queries']:5.1f} queries  ({result['requests']} requests, {result['errors']} errors)"
+                )
+            return results
+    finally:
+        # aiosqlite connections hold non-daemon threads until disposed
+        if database.async_engine is not None:
+            await database.async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL, else a temporary SQLite file")
+    parser.add_argument("--users", type=int, default=50, help="generated users")
+    parser.add_argument("--transactions", type=int, default=2000, help="generated transactions per user")
+    parser.add_argument("--clients", type=int, default=20, help="distinct logged-in users issuing requests")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--slow-requests", type=int, default=50, help="requests for login (bcrypt) and export")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-generate", action="store_true", help="reuse data generated by an earlier run")
+    parser.add_argument("--only", nargs="*", help="run endpoints whose name contains any of these")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or os.environ.get(
+        "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/suite.db"
+    )
+
+    from generate_data import generate_data
+
+    if args.skip_generate:
+        usernames = [f"{PREFIX}{n}" for n in range(1, args.users + 1)]
+    else:
+        usernames = generate_data(
+            users=args.users, transactions_per_user=args.transactions,
+            password=PASSWORD, prefix=PREFIX, seed=args.seed, reset=True,
+        )
+    random.Random(args.seed).shuffle(usernames)
+
+    from app.database import DB_ASYNC, engine
+    print(
+        f"⏱️  {engine.url.get_backend_name()} ({'async' if DB_ASYNC else 'sync'} mode), {args.clients} users, "
+        f"{args.concurrency} concurrent clients, {args.requests} requests per endpoint"
+    )
+    results = asyncio.run(run_suite(args, usernames))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "database": engine.url.get_backend_name(),
+            "async": DB_ASYNC,
+            "users": args.users,
+            "transactions_per_user": args.transactions,
+            "results": results,
+        }, indent=2))
+        print(f"✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import random
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import func, insert, update
+
+from app.database import engine, SessionLocal
+from app.models import (
+    Account, BalanceSnapshot, Base, Budget, Category, Transaction, User, UserDataVersion,
+    OPENING_SNAPSHOT_DATE,
+)
+from app import migrations
+from app.auth import get_password_hash
+from app.crud import DEFAULT_CATEGORIES, rebuild_monthly_totals, rebuild_search_index
+
+ACCOUNT_TEMPLATES = [
+    ("Checking", "bank"),
+    ("Cash Wallet", "cash"),
+    ("Credit Card", "credit_card"),
+    ("Savings", "bank"),
+    ("Travel Card", "credit_card"),
+]
+
+# Descriptions and (median amount, spread) per default category
+MERCHANTS = {
+    "Salary": ["Monthly Salary", "Payroll Deposit"],
+    "Freelance": ["Client Invoice", "Website Project", "Consulting Fee"],
+    "Investment": ["Stock Dividends", "Savings Interest", "ETF Distribution"],
+    "Business": ["Sales Revenue", "Marketplace Payout"],
+    "Food & Dining": ["Whole Foods", "Trader Joe's", "Starbucks", "Chipotle", "Pizza Night", "Local Diner", "Coffee Shop"],
+    "Transportation": ["Uber Ride", "Lyft Ride", "Shell Gas Station", "Metro Card", "Parking Garage"],
+    "Shopping": ["Amazon Order", "Target", "IKEA", "Best Buy", "Clothing Purchase"],
+    "Entertainment": ["Netflix", "Spotify", "Movie Tickets", "Concert", "Steam Games"],
+    "Bills & Utilities": ["Electricity Bill", "Water Bill", "Internet", "Phone Bill", "Rent"],
+    "Healthcare": ["Pharmacy", "Dentist", "Clinic Copay", "Gym Membership"],
+    "Education": ["Online Course", "Bookstore", "Tuition Payment"],
+    "Travel": ["Airline Ticket", "Hotel Booking", "Airbnb", "Car Rental"],
+}
+AMOUNTS = {
+    "Salary": (4200, 0.15), "Freelance": (600, 0.6), "Investment": (120, 0.8), "Business": (900, 0.7),
+    "Food & Dining": (28, 0.7), "Transportation": (22, 0.6), "Shopping": (65, 0.9), "Entertainment": (18, 0.6),
+    "Bills & Utilities": (110, 0.5), "Healthcare": (60, 0.8), "Education": (80, 0.9), "Travel": (350, 0.8),
+}
+EXPENSE_WEIGHTS = {
+    "Food & Dining": 35, "Transportation": 18, "Shopping": 14, "Entertainment": 10,
+    "Bills & Utilities": 10, "Healthcare": 5, "Education": 3, "Travel": 5,
+}
+INCOME_WEIGHTS = {"Salary": 70, "Freelance": 15, "Investment": 10, "Business": 5}
+PAYMENT_METHODS = ["card", "card", "card", "cash", "transfer", None]
+
+
+def _amount(rng, category_name):
+    median, spread = AMOUNTS[category_name]
+    return Decimal(str(max(0.5, round(rng.lognormvariate(0, spread) * median, 2)))).quantize(Decimal("0.01"))
+
+
+def generate_data(
+    users=100,
+    accounts_per_user=3,
+    transactions_per_user=1000,
+    budgets_per_user=8,
+    months=12,
+    income_share=0.08,
+    password="password123",
+    prefix="user",
+    seed=42,
+    reset=False,
+    batch_size=5000,
+):
+    """Bulk-insert synthetic users with accounts, default categories,
+    transactions and budgets; logins are <prefix><n> / password"""
+    print(f"🔧 Generating {users} users x {transactions_per_user} transactions...")
+    started = datetime.now()
+    rng = random.Random(seed)
+
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    migrations.upgrade(engine)
+
+    hashed_password = get_password_hash(password)
+    today = date.today()
+    window_start = today - timedelta(days=30 * months)
+    window_days = (today - window_start).days
+
+    db = SessionLocal()
+    try:
+        first = (db.query(func.max(User.user_id)).scalar() or 0) + 1
+        now = datetime.utcnow()
+        user_ids = db.execute(
+            insert(User).returning(User.user_id, sort_by_parameter_order=True),
+            [
+                {
+                    "username": f"{prefix}{n}",
+                    "email": f"{prefix}{n}@example.com",
+                    "hashed_password": hashed_password,
+                    "first_name": f"Test{n}",
+                    "last_name": "User",
+                    "is_active": True,
+                }
+                for n in range(first, first + users)
+            ],
+        ).scalars().all()
+
+        category_rows = db.execute(
+            insert(Category).returning(Category.category_id, Category.user_id, Category.category_name, sort_by_parameter_order=True),
+            [{**cat_data, "user_id": user_id, "is_default": True} for user_id in user_ids for cat_data in DEFAULT_CATEGORIES],
+        ).all()
+        categories = {}
+        for category_id, user_id, category_name in category_rows:
+            categories.setdefault(user_id, {})[category_name] = category_id
+
+        templates = [ACCOUNT_TEMPLATES[i % len(ACCOUNT_TEMPLATES)] for i in range(accounts_per_user)]
+        account_specs = [
+            {
+                "user_id": user_id,
+                "account_name": name,
+                "account_type": account_type,
+                "balance": Decimal(rng.randrange(0, 5000)),
+                "currency": "USD",
+                "is_active": True,
+            }
+            for user_id in user_ids for name, account_type in templates
+        ]
+        account_ids = db.execute(
+            insert(Account).returning(Account.account_id, sort_by_parameter_order=True), account_specs,
+        ).scalars().all()
+        db.execute(insert(BalanceSnapshot), [
+            {"account_id": account_id, "user_id": spec["user_id"], "snapshot_date": OPENING_SNAPSHOT_DATE, "balance": spec["balance"]}
+            for account_id, spec in zip(account_ids, account_specs)
+        ])
+        balances = {account_id: spec["balance"] for account_id, spec in zip(account_ids, account_specs)}
+        accounts = {}
+        for account_id, spec in zip(account_ids, account_specs):
+            accounts.setdefault(spec["user_id"], []).append(account_id)
+
+        expense_names, expense_weights = zip(*EXPENSE_WEIGHTS.items())
+        income_names, income_weights = zip(*INCOME_WEIGHTS.items())
+        transaction_count = 0
+        batch = []
+        for user_id in user_ids:
+            for _ in range(transactions_per_user):
+                if rng.random() < income_share:
+                    t_type, category_name = "income", rng.choices(income_names, income_weights)[0]
+                    account_id = accounts[user_id][0]
+                else:
+                    t_type, category_name = "expense", rng.choices(expense_names, expense_weights)[0]
+                    account_id = rng.choice(accounts[user_id])
+                amount = _amount(rng, category_name)
+                balances[account_id] += amount if t_type == "income" else -amount
+                batch.append({
+                    "user_id": user_id,
+                    "account_id": account_id,
+                    "category_id": categories[user_id][category_name],
+                    "transaction_type": t_type,
+                    "amount": amount,
+                    "description": rng.choice(MERCHANTS[category_name]),
+                    "transaction_date": window_start + timedelta(days=rng.randrange(window_days + 1)),
+                    "payment_method": rng.choice(PAYMENT_METHODS),
+                    "notes": "auto-generated" if rng.random() < 0.1 else None,
+                })
+                if len(batch) >= batch_size:
+                    db.execute(insert(Transaction), batch)
+                    transaction_count += len(batch)
+                    batch.clear()
+        if batch:
+            db.execute(insert(Transaction), batch)
+            transaction_count += len(batch)
+        db.execute(update(Account), [{"account_id": a, "balance": b} for a, b in balances.items()])
+
+        # Budgets: a few expense categories per month, most recent months first
+        budget_rows = []
+        for user_id in user_ids:
+            period = today.replace(day=1)
+            remaining = budgets_per_user
+            while remaining > 0:
+                for category_name in rng.sample(expense_names, min(4, remaining)):
+                    budget_rows.append({
+                        "user_id": user_id,
+                        "category_id": categories[user_id][category_name],
+                        "budget_amount": AMOUNTS[category_name][0] * 10,
+                        "month": period.month,
+                        "year": period.year,
+                    })
+                remaining -= min(4, remaining)
+                period = (period - timedelta(days=1)).replace(day=1)
+        if budget_rows:
+            db.execute(insert(Budget), budget_rows)
+
+        db.execute(insert(UserDataVersion), [{"user_id": user_id, "version": 1, "updated_at": now} for user_id in user_ids])
+        db.commit()
+
+        # Derived tables: one pass over everything after a reset, per user otherwise
+        scopes = [None] if reset else user_ids
+        for scope in scopes:
+            rebuild_monthly_totals(db, scope)
+            rebuild_search_index(db, scope)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(
+        f"✅ {len(user_ids)} users, {len(account_ids)} accounts, {len(category_rows)} categories, "
+        f"{transaction_count} transactions, {len(budget_rows)} budgets in {elapsed:.1f}s"
+    )
+    print(f"   Login: {prefix}{first} .. {prefix}{first + users - 1} / {password}")
+    return [f"{prefix}{n}" for n in range(first, first + users)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-generate synthetic finance data")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--accounts", type=int, default=3, help="accounts per user")
+    parser.add_argument("--transactions", type=int, default=1000, help="transactions per user")
+    parser.add_argument("--budgets", type=int, default=8, help="budgets per user")
+    parser.add_argument("--months", type=int, default=12, help="history window for transaction dates")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--prefix", default="user", help="username prefix")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    generate_data(
+        users=args.users,
+        accounts_per_user=args.accounts,
+        transactions_per_user=args.transactions,
+        budgets_per_user=args.budgets,
+        months=args.months,
+        password=args.password,
+        prefix=args.prefix,
+        seed=args.seed,
+        reset=args.reset,
+    )
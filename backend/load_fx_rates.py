@@ -0,0 +1,35 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import engine, SessionLocal
+from app import migrations
+from app.crud import upsert_fx_rates
+from app.fx import FX_BASE_CURRENCY, read_rate_file
+
+def load_fx_rates(path):
+    """Load or update exchange rates from a date,currency,rate CSV file"""
+    print(f"🔧 Loading exchange rates from {path} (base {FX_BASE_CURRENCY})...")
+    
+    # Bring older databases up to date (a no-op once migrate.py has run)
+    migrations.upgrade(engine)
+    
+    db = SessionLocal()
+    try:
+        rows = upsert_fx_rates(db, read_rate_file(path))
+        print(f"✅ {rows} rates loaded")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load or update exchange rates")
+    parser.add_argument("rates_file", metavar="rates.csv", help="date,currency,rate rows")
+    args = parser.parse_args()
+    load_fx_rates(args.rates_file)
@@ -0,0 +1,76 @@
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import create_engine
+from app.database import engine
+from app import migrations
+
+def migrate():
+    """Create or upgrade the database schema; run once per deploy, before the app starts"""
+    print(f"🔧 Migrating {engine.url.render_as_string(hide_password=True)}...")
+    try:
+        with engine.connect() as connection:
+            version = migrations.current_version(connection)
+        applied = migrations.upgrade(engine)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    if version is None:
+        print(f"✅ Schema created at version {migrations.head()}")
+        return
+    for number, name, _ in applied:
+        print(f"✅ {number:03d} {name}")
+    if not applied:
+        print(f"✅ Already at version {version}")
+
+def status():
+    with engine.connect() as connection:
+        version = migrations.current_version(connection)
+        steps = migrations.pending(connection)
+    print(f"📋 Version {version if version is not None else '(empty database)'}, head {migrations.head()}")
+    for number, name, _ in steps:
+        print(f"   pending: {number:03d} {name}")
+
+def check(sql_file=None):
+    """Report tables, columns and indexes from models.py missing in the
+    database, or in a schema script such as database/schema_sqlite.sql"""
+    target = engine
+    if sql_file:
+        # Load the script into an in-memory SQLite database and inspect that
+        target = create_engine("sqlite://", creator=lambda: _load_script(sql_file))
+    with target.connect() as connection:
+        problems = migrations.schema_drift(connection)
+    for problem in problems:
+        print(f"⚠️  {problem}")
+    if problems:
+        sys.exit(1)
+    print("✅ Schema matches models.py")
+
+def _load_script(path):
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    try:
+        connection.executescript(Path(path).read_text(encoding="utf-8"))
+    except sqlite3.Error as e:
+        # Statements before the failing one (normally all the DDL) still ran
+        print(f"⚠️  {path} stopped at an error: {e}")
+    return connection
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="show the applied version and pending migrations")
+    parser.add_argument("--check", nargs="?", const="database", metavar="SQL_FILE",
+                        help="report schema drift from models.py (default: the database)")
+    args = parser.parse_args()
+
+    if args.status:
+        status()
+    elif args.check:
+        check(None if args.check == "database" else args.check)
+    else:
+        migrate()
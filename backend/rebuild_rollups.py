@@ -0,0 +1,35 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import engine, SessionLocal
+from app import migrations
+from app.crud import rebuild_monthly_totals
+
+def rebuild_rollups(user_id=None):
+    """Backfill or repair the monthly_totals rollup from transactions"""
+    print("🔧 Rebuilding monthly totals...")
+    
+    # Bring older databases up to date (a no-op once migrate.py has run)
+    migrations.upgrade(engine)
+    
+    db = SessionLocal()
+    try:
+        rows = rebuild_monthly_totals(db, user_id)
+        scope = f"user {user_id}" if user_id is not None else "all users"
+        print(f"✅ {rows} rollup rows written for {scope}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the monthly_totals rollup from transactions")
+    parser.add_argument("--user-id", type=int, help="only this user (default: all users)")
+    args = parser.parse_args()
+    rebuild_rollups(args.user_id)
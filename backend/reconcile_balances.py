@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import engine, SessionLocal
+from app import migrations
+from app.crud import initialize_opening_snapshots, create_balance_snapshots, reconcile_balances
+
+def last_month_end(today: date) -> date:
+    return today.replace(day=1) - timedelta(days=1)
+
+def run_once(fix: bool, snapshot_date: date = None):
+    """Snapshot balances and check accounts.balance against the ledger for all users"""
+    db = SessionLocal()
+    try:
+        initialized = initialize_opening_snapshots(db)
+        if initialized:
+            print(f"🔧 Opening snapshots created for {initialized} account(s)")
+        
+        if snapshot_date:
+            written = create_balance_snapshots(db, snapshot_date)
+            print(f"✅ {written} snapshot(s) written for {snapshot_date}")
+        
+        drifted = reconcile_balances(db, fix=fix)
+        if not drifted:
+            print("✅ All account balances match the ledger")
+        for item in drifted:
+            action = "fixed" if fix else "drift"
+            print(
+                f"⚠️  {action}: account {item['account_id']} (user {item['user_id']}) "
+                f"stored {item['stored_balance']:.2f} vs ledger {item['ledger_balance']:.2f} "
+                f"({item['drift']:+.2f})"
+            )
+        return drifted
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot and reconcile account balances")
+    parser.add_argument("--fix", action="store_true", help="reset drifted balances to the ledger value")
+    parser.add_argument("--snapshot", nargs="?", const="month-end", metavar="YYYY-MM-DD",
+                        help="also write snapshots (default date: last month end)")
+    parser.add_argument("--interval", type=int, default=0, metavar="SECONDS",
+                        help="keep running, repeating every SECONDS")
+    args = parser.parse_args()
+    
+    # Bring older databases up to date (a no-op once migrate.py has run)
+    migrations.upgrade(engine)
+    
+    while True:
+        snapshot_date = None
+        if args.snapshot == "month-end":
+            snapshot_date = last_month_end(date.today())
+        elif args.snapshot:
+            snapshot_date = date.fromisoformat(args.snapshot)
+        run_once(args.fix, snapshot_date)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
@@ -6,6 +6,7 @@ sys.path.append(str(Path(__file__).parent))
 
 from app.database import engine, SessionLocal
 from app.models import Base
+from app import migrations
 from app.crud import create_user, create_default_categories
 from app.schemas import UserCreate
 
@@ -15,7 +16,7 @@ def setup_database():
     
     # Create all tables
     Base.metadata.drop_all(bind=engine)  # Drop existing tables
-    Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
     print("✅ Tables created")
     
     # Create test user with categories
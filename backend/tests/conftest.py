@@ -0,0 +1,77 @@
+# API and crud regression tests. From backend/:
+#
+#     pip install -r requirements-dev.txt && python -m pytest tests
+import itertools
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Never the app's own database: a throwaway SQLite file unless
+# TEST_DATABASE_URL points somewhere else. Set before the app is imported.
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ["RECURRING_INTERVAL_SECONDS"] = "0"
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import migrations
+from app.database import engine, SessionLocal
+from app.main import app
+
+_user_numbers = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def schema():
+    migrations.upgrade(engine)
+
+
+@pytest.fixture(scope="session")
+def client(schema):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(schema):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def register(client):
+    """register() -> auth headers for a new user (with the default categories)"""
+    def register_user():
+        name = f"user{next(_user_numbers)}"
+        client.post("/auth/register", json={"username": name, "email": f"{name}@test.local", "password": "password123"})\
+            .raise_for_status()
+        token = client.post("/auth/login", json={"username": name, "password": "password123"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    return register_user
+
+
+@pytest.fixture
+def headers(register):
+    return register()
+
+
+@pytest.fixture
+def account_id(client, headers):
+    response = client.post("/accounts", json={"account_name": "Checking", "account_type": "bank", "balance": 100}, headers=headers)
+    response.raise_for_status()
+    return response.json()["account_id"]
+
+
+@pytest.fixture
+def category_id(client, headers):
+    return next(c["category_id"] for c in client.get("/categories", headers=headers).json() if c["category_type"] == "expense")
+
+
+def transaction(account_id: int, category_id: int, amount=10, transaction_type="expense", day="2026-03-01", **extra):
+    return {
+        "account_id": account_id, "category_id": category_id, "transaction_type": transaction_type,
+        "amount": amount, "description": "test", "transaction_date": day, **extra,
+    }
@@ -0,0 +1,89 @@
+"""Account balances are kept by atomic deltas; concurrent writers must not lose any"""
+import random
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import OperationalError
+
+from app import crud
+from app.database import SessionLocal
+from app.models import Account, Transaction
+from app.schemas import AccountCreate, CategoryCreate, TransactionCreate, UserCreate
+
+WORKERS = 8
+OPERATIONS = 40
+OPENING_BALANCE = Decimal("1000.00")
+
+
+def with_retry(fn, *args):
+    # SQLite reports lock contention as OperationalError; a real client retries
+    for attempt in range(50):
+        db = SessionLocal()
+        try:
+            return fn(db, *args)
+        except OperationalError:
+            db.rollback()
+            time.sleep(0.01 * (attempt + 1))
+        finally:
+            db.close()
+    raise RuntimeError("gave up after repeated lock contention")
+
+
+def writer(user_id, category_id, account_ids, seed, errors):
+    rng = random.Random(seed)
+    mine = []
+    try:
+        for _ in range(OPERATIONS):
+            payload = TransactionCreate(
+                account_id=rng.choice(account_ids),
+                category_id=category_id,
+                transaction_type=rng.choice(["income", "expense"]),
+                amount=round(rng.uniform(0.01, 500), 2),
+                description="stress",
+                transaction_date=date(2025, rng.randint(1, 12), rng.randint(1, 28)),
+            )
+            action = rng.random()
+            if mine and action < 0.25:
+                with_retry(crud.delete_transaction, mine.pop(rng.randrange(len(mine))), user_id)
+            elif mine and action < 0.5:
+                with_retry(crud.update_transaction, rng.choice(mine), payload, user_id)
+            else:
+                mine.append(with_retry(crud.create_transaction, payload, user_id).transaction_id)
+    except Exception as e:  # surfaced by the test, not lost in the thread
+        errors.append(e)
+
+
+def test_concurrent_writes_keep_balances_exact(db):
+    user = crud.create_user(db, UserCreate(username="stress", email="stress@test.local", password="x"), hashed_password="x")
+    category_id = crud.create_category(db, CategoryCreate(category_name="Stress", category_type="expense"), user.user_id).category_id
+    account_ids = [
+        crud.create_account(db, AccountCreate(account_name=f"A{i}", account_type="bank", balance=float(OPENING_BALANCE)), user.user_id).account_id
+        for i in range(3)
+    ]
+
+    errors = []
+    threads = [
+        threading.Thread(target=writer, args=(user.user_id, category_id, account_ids, seed, errors))
+        for seed in range(WORKERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+    db.expire_all()
+    signed = case((Transaction.transaction_type == "income", Transaction.amount), else_=-Transaction.amount)
+    ledger = dict(
+        db.query(Transaction.account_id, func.coalesce(func.sum(signed), 0))
+        .filter(Transaction.user_id == user.user_id)
+        .group_by(Transaction.account_id)
+        .all()
+    )
+    for account in db.query(Account).filter(Account.account_id.in_(account_ids)):
+        expected = OPENING_BALANCE + Decimal(str(ledger.get(account.account_id, 0))).quantize(Decimal("0.01"))
+        assert account.balance == expected
+    assert crud.reconcile_balances(db, user_id=user.user_id) == []
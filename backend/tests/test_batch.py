@@ -0,0 +1,48 @@
+"""POST /batch applies every operation or none"""
+from conftest import transaction
+
+
+def accounts(client, headers):
+    return {a["account_id"]: a["balance"] for a in client.get("/accounts", headers=headers).json()}
+
+
+def test_batch_applies_operations_with_references(client, headers, category_id):
+    response = client.post("/batch", json={"operations": [
+        {"entity": "accounts", "op": "create", "data": {"account_name": "Cash", "account_type": "cash", "balance": 50}},
+        {"entity": "transactions", "op": "create", "data": transaction("$0", category_id, amount=20)},
+        {"entity": "transactions", "op": "update", "id": "$1", "data": transaction("$0", category_id, amount=5)},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    assert list(accounts(client, headers).values()) == [45.0]
+
+
+def test_failed_operation_rolls_back_the_batch(client, headers, account_id, category_id):
+    before = accounts(client, headers)
+    etag = client.get("/accounts", headers=headers).headers["ETag"]
+
+    response = client.post("/batch", json={"operations": [
+        {"entity": "accounts", "op": "create", "data": {"account_name": "Cash", "account_type": "cash", "balance": 50}},
+        {"entity": "transactions", "op": "create", "data": transaction(account_id, category_id, amount=30)},
+        {"entity": "transactions", "op": "delete", "id": 10 ** 9},
+    ]}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["index"] == 2
+    assert accounts(client, headers) == before
+    assert client.get("/transactions", headers=headers).json() == []
+    # Nothing was written, so the data version (and the ETag) did not move
+    assert client.get("/accounts", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+
+def test_batch_rejects_another_users_account(client, headers, register, category_id):
+    other = register()
+    other_account = client.post("/accounts", json={"account_name": "Theirs", "account_type": "bank", "balance": 10}, headers=other)\
+        .json()["account_id"]
+
+    response = client.post("/batch", json={"operations": [
+        {"entity": "transactions", "op": "create", "data": transaction(other_account, category_id)},
+    ]}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == {"index": 0, "error": "Account not found"}
+    assert list(accounts(client, other).values()) == [10.0]
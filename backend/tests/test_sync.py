@@ -0,0 +1,64 @@
+"""GET /sync: data-version cursors and tombstones"""
+from conftest import transaction
+
+
+def sync(client, headers, cursor=None):
+    response = client.get("/sync", params={"since": cursor} if cursor else {}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def changed(result):
+    return {name: len(rows) for name, rows in result["changes"].items() if rows}
+
+
+def test_full_sync_then_deltas(client, headers, account_id, category_id):
+    full = sync(client, headers)
+    assert len(full["changes"]["accounts"]) == 1
+    assert full["changes"]["categories"]
+    cursor = full["cursor"]
+
+    # Nothing changed: nothing returned, same cursor
+    idle = sync(client, headers, cursor)
+    assert changed(idle) == {}
+    assert idle["cursor"] == cursor
+
+    # A transaction changes its account's balance too
+    transaction_id = client.post("/transactions", json=transaction(account_id, category_id), headers=headers).json()["transaction_id"]
+    delta = sync(client, headers, cursor)
+    assert changed(delta) == {"accounts": 1, "transactions": 1}
+    assert delta["changes"]["accounts"][0]["balance"] == 90.0
+    cursor = delta["cursor"]
+
+    # Deletes come back as tombstones
+    client.delete(f"/transactions/{transaction_id}", headers=headers).raise_for_status()
+    delta = sync(client, headers, cursor)
+    assert delta["deleted"]["transactions"] == [transaction_id]
+    assert changed(delta) == {"accounts": 1}
+    assert sync(client, headers, delta["cursor"])["deleted"]["transactions"] == []
+
+
+def test_every_write_between_syncs_is_returned(client, headers, account_id, category_id):
+    cursor = sync(client, headers)["cursor"]
+    created = [
+        client.post("/transactions", json=transaction(account_id, category_id, day=f"2026-0{month}-01"), headers=headers).json()["transaction_id"]
+        for month in range(1, 6)
+    ]
+    client.post("/batch", json={"operations": [
+        {"entity": "budgets", "op": "create", "data": {"category_id": category_id, "budget_amount": 100, "month": 1, "year": 2026}},
+    ]}, headers=headers).raise_for_status()
+
+    delta = sync(client, headers, cursor)
+    assert sorted(t["transaction_id"] for t in delta["changes"]["transactions"]) == created
+    assert len(delta["changes"]["budgets"]) == 1
+
+
+def test_sync_is_per_user(client, headers, register, account_id):
+    other = register()
+    assert sync(client, other)["changes"]["accounts"] == []
+
+
+def test_invalid_cursor(client, headers):
+    # Neither garbage nor an old timestamp cursor is accepted
+    assert client.get("/sync", params={"since": "garbage"}, headers=headers).status_code == 400
+    assert client.get("/sync", params={"since": "MjAyNi0wMS0wMVQwMDowMDowMA"}, headers=headers).status_code == 400
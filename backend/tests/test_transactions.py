@@ -0,0 +1,68 @@
+"""Transaction listing (keyset cursor, ETags) and bulk import"""
+from conftest import transaction
+
+
+def test_keyset_pagination_visits_every_transaction_once(client, headers, account_id, category_id):
+    days = ["2026-01-05", "2026-03-01", "2026-01-05", "2026-02-10", "2026-03-01", "2026-01-05", "2026-04-20"]
+    for day in days:
+        client.post("/transactions", json=transaction(account_id, category_id, day=day), headers=headers).raise_for_status()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/transactions", params=params, headers=headers)
+        page = response.json()
+        seen += [(t["transaction_date"], t["transaction_id"]) for t in page]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(days)
+    assert seen == sorted(seen, reverse=True)
+    assert client.get("/transactions", params={"cursor": "garbage"}, headers=headers).status_code == 400
+
+
+def test_etag_revalidation(client, headers, register, account_id, category_id):
+    first = client.get("/accounts", headers=headers)
+    etag = first.headers["ETag"]
+    assert "Authorization" in first.headers["Vary"]
+    assert client.get("/accounts", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.post("/transactions", json=transaction(account_id, category_id), headers=headers).raise_for_status()
+    after_write = client.get("/accounts", headers={**headers, "If-None-Match": etag})
+    assert after_write.status_code == 200
+    assert after_write.headers["ETag"] != etag
+
+    # Another user's ETag never validates this user's list
+    other = register()
+    client.post("/accounts", json={"account_name": "Theirs", "account_type": "bank", "balance": 1}, headers=other)
+    other_etag = client.get("/accounts", headers=other).headers["ETag"]
+    assert client.get("/accounts", headers={**headers, "If-None-Match": other_etag}).status_code == 200
+
+
+def test_import_reports_bad_rows_and_keeps_good_ones(client, headers, register, account_id, category_id):
+    other = register()
+    other_account = client.post("/accounts", json={"account_name": "Theirs", "account_type": "bank", "balance": 1}, headers=other)\
+        .json()["account_id"]
+    csv = "\n".join([
+        "account_id,category_id,transaction_type,amount,description,transaction_date",
+        f"{account_id},{category_id},expense,25,ok,2026-02-01",
+        f"{account_id},{category_id},expense,3,bad date,2026-02-31",
+        f"{other_account},{category_id},expense,5,foreign,2026-02-03",
+        f"{account_id},{category_id},expense,5,extra,2026-02-04,surplus",
+        f"{account_id},{category_id},income,40,ok,2026-02-05",
+    ]) + "\n"
+
+    result = client.post("/transactions/import", files={"file": ("statement.csv", csv)}, headers=headers).json()
+
+    assert result["imported"] == 2
+    errors = {error["row"]: error["error"] for error in result["errors"]}
+    assert sorted(errors) == [2, 3, 4]
+    assert errors[3] == "Account not found"
+    assert "more field" in errors[4]
+    assert client.get(f"/accounts/{account_id}", headers=headers).json()["balance"] == 115.0
+
+
+def test_import_rejects_invalid_utf8(client, headers):
+    response = client.post("/transactions/import", files={"file": ("statement.csv", b"description\n\xff\n")}, headers=headers)
+    assert response.status_code == 400
@@ -1,7 +1,15 @@
 -- Finance Tracker Database Schema for SQLite
 
 -- Drop tables if they exist (for clean setup)
+DROP TABLE IF EXISTS schema_migrations;
+DROP TABLE IF EXISTS transactions_fts;
+DROP TABLE IF EXISTS fx_rates;
+DROP TABLE IF EXISTS tombstones;
+DROP TABLE IF EXISTS user_data_versions;
+DROP TABLE IF EXISTS balance_snapshots;
+DROP TABLE IF EXISTS monthly_totals;
 DROP TABLE IF EXISTS transactions;
+DROP TABLE IF EXISTS recurring_transactions;
 DROP TABLE IF EXISTS budgets;
 DROP TABLE IF EXISTS accounts;
 DROP TABLE IF EXISTS categories;
@@ -29,6 +37,8 @@ CREATE TABLE categories (
     color TEXT,
     is_default BOOLEAN DEFAULT 0,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sync_version INTEGER,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
 
@@ -42,6 +52,8 @@ CREATE TABLE accounts (
     currency TEXT DEFAULT 'USD',
     is_active BOOLEAN DEFAULT 1,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sync_version INTEGER,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
 
@@ -57,7 +69,35 @@ CREATE TABLE transactions (
     transaction_date DATE NOT NULL,
     payment_method TEXT,
     notes TEXT,
+    recurring_id INTEGER,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sync_version INTEGER,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES categories(category_id) ON DELETE CASCADE,
+    FOREIGN KEY (recurring_id) REFERENCES recurring_transactions(recurring_id)
+);
+
+-- Recurring Transactions Table (schedules materialized into transactions)
+CREATE TABLE recurring_transactions (
+    recurring_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    account_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    transaction_type TEXT NOT NULL CHECK (transaction_type IN ('income', 'expense')),
+    amount REAL NOT NULL CHECK (amount > 0),
+    description TEXT NOT NULL,
+    payment_method TEXT,
+    notes TEXT,
+    frequency TEXT NOT NULL CHECK (frequency IN ('daily', 'weekly', 'monthly', 'yearly')),
+    interval INTEGER NOT NULL DEFAULT 1,
+    start_date DATE NOT NULL,
+    end_date DATE,
+    occurrence_count INTEGER NOT NULL DEFAULT 0,
+    next_due_date DATE,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
     FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE,
     FOREIGN KEY (category_id) REFERENCES categories(category_id) ON DELETE CASCADE
@@ -72,16 +112,115 @@ CREATE TABLE budgets (
     month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
     year INTEGER NOT NULL CHECK (year >= 2020),
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sync_version INTEGER,
     UNIQUE(user_id, category_id, month, year),
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
     FOREIGN KEY (category_id) REFERENCES categories(category_id) ON DELETE CASCADE
 );
 
+-- Monthly rollup of transactions (maintained by the API, rebuilt by rebuild_rollups.py)
+CREATE TABLE monthly_totals (
+    user_id INTEGER NOT NULL,
+    account_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    transaction_type TEXT NOT NULL,
+    total REAL NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, year, month, account_id, category_id, transaction_type),
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES categories(category_id) ON DELETE CASCADE
+);
+
+-- Account balance at the end of snapshot_date; 1900-01-01 holds the opening balance
+CREATE TABLE balance_snapshots (
+    account_id INTEGER NOT NULL,
+    snapshot_date DATE NOT NULL,
+    user_id INTEGER NOT NULL,
+    balance REAL NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (account_id, snapshot_date),
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Bumped on every write to a user's data; backs the ETags on list endpoints
+CREATE TABLE user_data_versions (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Deleted accounts, transactions and budgets, served to delta sync clients
+CREATE TABLE tombstones (
+    tombstone_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    entity_type TEXT NOT NULL,
+    entity_id INTEGER NOT NULL,
+    deleted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sync_version INTEGER,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Dated exchange rates (units of currency per one unit of the base currency),
+-- loaded by load_fx_rates.py
+CREATE TABLE fx_rates (
+    currency TEXT NOT NULL,
+    rate_date DATE NOT NULL,
+    rate DECIMAL(18, 8) NOT NULL,
+    PRIMARY KEY (currency, rate_date)
+);
+
+-- Applied migrations (backend/app/migrations.py). Left empty here: running
+-- `python migrate.py` on a database created from this script finds every
+-- object already present and records each version
+CREATE TABLE schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Full-text search over transactions (rowid = transaction_id); words are stored
+-- as "<user_id>_<word>" tokens by the API, rebuilt by rebuild_search_index.py
+CREATE VIRTUAL TABLE transactions_fts USING fts5(description, notes, tokenize="unicode61 tokenchars '_'");
+
 -- Indexes for better query performance
+CREATE UNIQUE INDEX ix_users_username ON users(username);
+CREATE UNIQUE INDEX ix_users_email ON users(email);
+CREATE INDEX ix_users_user_id ON users(user_id);
+CREATE INDEX ix_categories_category_id ON categories(category_id);
+CREATE INDEX ix_accounts_account_id ON accounts(account_id);
+CREATE INDEX ix_transactions_transaction_id ON transactions(transaction_id);
+CREATE INDEX ix_budgets_budget_id ON budgets(budget_id);
+CREATE INDEX ix_tombstones_tombstone_id ON tombstones(tombstone_id);
+CREATE INDEX ix_recurring_transactions_recurring_id ON recurring_transactions(recurring_id);
 CREATE INDEX idx_transactions_date ON transactions(transaction_date DESC);
 CREATE INDEX idx_transactions_account ON transactions(account_id);
 CREATE INDEX idx_transactions_category ON transactions(category_id);
+CREATE INDEX ix_transactions_user_date_id ON transactions(user_id, transaction_date, transaction_id);
+CREATE INDEX ix_transactions_user_account_date ON transactions(user_id, account_id, transaction_date);
+CREATE INDEX ix_transactions_user_category_date ON transactions(user_id, category_id, transaction_date);
+CREATE INDEX ix_transactions_user_type_date ON transactions(user_id, transaction_type, transaction_date);
+CREATE INDEX ix_transactions_user_type_category_date ON transactions(user_id, transaction_type, category_id, transaction_date, amount);
 CREATE INDEX idx_budgets_period ON budgets(year, month);
+CREATE INDEX ix_balance_snapshots_user_id ON balance_snapshots(user_id);
+CREATE INDEX ix_categories_user_updated ON categories(user_id, updated_at);
+CREATE INDEX ix_categories_user_sync ON categories(user_id, sync_version);
+CREATE INDEX ix_accounts_user_updated ON accounts(user_id, updated_at);
+CREATE INDEX ix_accounts_user_sync ON accounts(user_id, sync_version);
+CREATE INDEX ix_transactions_user_updated ON transactions(user_id, updated_at);
+CREATE INDEX ix_transactions_user_sync ON transactions(user_id, sync_version);
+CREATE INDEX ix_budgets_user_updated ON budgets(user_id, updated_at);
+CREATE INDEX ix_budgets_user_sync ON budgets(user_id, sync_version);
+CREATE INDEX ix_tombstones_user_deleted ON tombstones(user_id, deleted_at);
+CREATE INDEX ix_tombstones_user_sync ON tombstones(user_id, sync_version);
+CREATE UNIQUE INDEX ux_transactions_recurring_date ON transactions(recurring_id, transaction_date);
+CREATE INDEX ix_recurring_transactions_next_due ON recurring_transactions(next_due_date);
+CREATE INDEX ix_recurring_transactions_user ON recurring_transactions(user_id);
 
 -- Insert default categories
 INSERT INTO categories (category_name, category_type, icon, color, is_default) VALUES
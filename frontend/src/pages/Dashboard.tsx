@@ -16,7 +16,7 @@ import {
   ArcElement,
   BarElement,
 } from 'chart.js';
-import { accountAPI, transactionAPI } from '../services/api';
+import { reportAPI, transactionAPI } from '../services/api';
 import { Card, CardHeader, CardBody } from '../components/ui/Card';
 import { Button } from '../components/ui/Button';
 import { useAuth } from '../context/AuthContext';
@@ -188,19 +188,22 @@ const TransactionAmount = styled.div<{ type: string }>`
 
 const Dashboard: React.FC = () => {
   const { state } = useAuth();
-  const [accounts, setAccounts] = useState<any[]>([]);
-  const [transactions, setTransactions] = useState<any[]>([]);
+  const [recentTransactions, setRecentTransactions] = useState<any[]>([]);
+  const [summary, setSummary] = useState<any>(null);
+  const [netWorth, setNetWorth] = useState<any>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [accountsRes, transactionsRes] = await Promise.all([
-          accountAPI.getAccounts(),
-          transactionAPI.getTransactions()
+        const [summaryRes, netWorthRes, recentRes] = await Promise.all([
+          reportAPI.getSummary(),
+          reportAPI.getNetWorth(),
+          transactionAPI.getTransactionsPage({ limit: 5 })
         ]);
-        setAccounts(accountsRes.data);
-        setTransactions(transactionsRes.data);
+        setSummary(summaryRes.data);
+        setNetWorth(netWorthRes.data);
+        setRecentTransactions(recentRes.data);
       } catch (error) {
         console.error('Error fetching dashboard data:', error);
       } finally {
@@ -211,31 +214,20 @@ const Dashboard: React.FC = () => {
     fetchData();
   }, []);
 
-  const totalBalance = accounts.reduce((sum, acc) => sum + parseFloat(acc.balance), 0);
-  const recentTransactions = transactions.slice(0, 5);
+  // Balances in different currencies are converted server-side by /reports/net-worth
+  const totalBalance = netWorth?.total ?? 0;
+  const currencyPrefix = !netWorth || netWorth.currency === 'USD' ? '$' : `${netWorth.currency} `;
 
-  const income = transactions
-    .filter(t => t.transaction_type === 'income')
-    .reduce((sum, t) => sum + parseFloat(t.amount), 0);
-
-  const expenses = transactions
-    .filter(t => t.transaction_type === 'expense')
-    .reduce((sum, t) => sum + parseFloat(t.amount), 0);
-
-  // Calculate expenses by category for Pie Chart
-  const expensesByCategory = transactions
-    .filter(t => t.transaction_type === 'expense')
-    .reduce((acc: any, t) => {
-      const category = t.category?.category_name || 'Uncategorized';
-      acc[category] = (acc[category] || 0) + parseFloat(t.amount);
-      return acc;
-    }, {});
+  // Totals are aggregated server-side by /reports/summary
+  const income = summary?.total_income ?? 0;
+  const expenses = summary?.total_expense ?? 0;
+  const expensesByCategory: any[] = summary?.expenses_by_category ?? [];
 
   const pieChartData = {
-    labels: Object.keys(expensesByCategory),
+    labels: expensesByCategory.map(c => c.category_name),
     datasets: [
       {
-        data: Object.values(expensesByCategory),
+        data: expensesByCategory.map(c => c.total),
         backgroundColor: [
           '#FF6384',
           '#36A2EB',
@@ -330,7 +322,7 @@ const Dashboard: React.FC = () => {
               <FaWallet />
             </IconWrapper>
           </StatHeader>
-          <StatValue>${totalBalance.toFixed(2)}</StatValue>
+          <StatValue>{currencyPrefix}{totalBalance.toFixed(2)}</StatValue>
           <StatLabel>Total Balance</StatLabel>
         </StatCard>
 
@@ -360,7 +352,7 @@ const Dashboard: React.FC = () => {
               <FaChartLine />
             </IconWrapper>
           </StatHeader>
-          <StatValue>{transactions.length}</StatValue>
+          <StatValue>{summary?.transaction_count ?? 0}</StatValue>
           <StatLabel>Total Transactions</StatLabel>
         </StatCard>
       </StatsGrid>
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import styled from 'styled-components';
 import { FaPlus, FaEdit, FaTrash } from 'react-icons/fa';
-import { budgetAPI, transactionAPI } from '../../services/api';
+import { budgetAPI } from '../../services/api';
 import BudgetForm from '../../components/BudgetForm';
 import { Card } from '../../components/ui/Card';
 import { Button, IconButton } from '../../components/ui/Button';
@@ -134,19 +134,14 @@ const EmptyState = styled.div`
 
 const Budgets: React.FC = () => {
   const [budgets, setBudgets] = useState<any[]>([]);
-  const [transactions, setTransactions] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [isFormOpen, setIsFormOpen] = useState(false);
   const [editingBudget, setEditingBudget] = useState<any>(null);
 
   const fetchBudgets = async () => {
     try {
-      const [budgetsRes, transactionsRes] = await Promise.all([
-        budgetAPI.getBudgets(),
-        transactionAPI.getTransactions()
-      ]);
+      const budgetsRes = await budgetAPI.getBudgets({ with_progress: true });
       setBudgets(budgetsRes.data);
-      setTransactions(transactionsRes.data);
     } catch (error) {
       console.error('Error fetching budgets:', error);
     } finally {
@@ -158,22 +153,6 @@ const Budgets: React.FC = () => {
     fetchBudgets();
   }, []);
 
-  const calculateSpent = (budget: any) => {
-    const spent = transactions
-      .filter((t: any) => {
-        const tDate = new Date(t.transaction_date);
-        return (
-          t.category_id === budget.category_id &&
-          t.transaction_type === 'expense' &&
-          tDate.getMonth() + 1 === budget.month &&
-          tDate.getFullYear() === budget.year
-        );
-      })
-      .reduce((sum: number, t: any) => sum + parseFloat(t.amount), 0);
-
-    return spent;
-  };
-
   const handleAddBudget = () => {
     setEditingBudget(null);
     setIsFormOpen(true);
@@ -240,9 +219,9 @@ const Budgets: React.FC = () => {
       ) : (
         <BudgetGrid>
           {budgets.map((budget: any) => {
-            const spent = calculateSpent(budget);
+            const spent = budget.spent;
             const budgetAmount = parseFloat(budget.budget_amount);
-            const percentage = (spent / budgetAmount) * 100;
+            const percentage = budget.percent_used;
             const overBudget = spent > budgetAmount;
 
             return (
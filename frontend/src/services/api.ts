@@ -66,6 +66,7 @@ export const accountAPI = {
     account_name: string;
     account_type: string;
     balance: number;
+    currency?: string;
   }) => api.post('/accounts', accountData),
 
   updateAccount: (id: number, accountData: any) =>
@@ -75,8 +76,38 @@ export const accountAPI = {
 };
 
 // Transaction API calls
+export interface TransactionFilters {
+  start_date?: string;
+  end_date?: string;
+  account_id?: number;
+  category_id?: number;
+  transaction_type?: string;
+  min_amount?: number;
+  max_amount?: number;
+}
+
 export const transactionAPI = {
-  getTransactions: () => api.get('/transactions'),
+  // Single keyset page; pass the previous page's X-Next-Cursor header as `cursor`
+  getTransactionsPage: (params: TransactionFilters & { limit?: number; cursor?: string } = {}) =>
+    api.get('/transactions', { params }),
+
+  // Follows cursors until the last page and returns every matching row
+  getTransactions: async (filters: TransactionFilters = {}) => {
+    let data: any[] = [];
+    let cursor: string | undefined;
+    do {
+      const response = await api.get('/transactions', {
+        params: { ...filters, limit: 500, cursor },
+      });
+      data = data.concat(response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return { data };
+  },
+
+  // Ranked full-text search over description and notes; pages via X-Next-Cursor
+  searchTransactions: (q: string, params: { limit?: number; cursor?: string } = {}) =>
+    api.get('/transactions/search', { params: { q, ...params } }),
 
   createTransaction: (transactionData: {
     account_id: number;
@@ -93,6 +124,50 @@ export const transactionAPI = {
     api.put(`/transactions/${id}`, transactionData),
 
   deleteTransaction: (id: number) => api.delete(`/transactions/${id}`),
+
+  importTransactions: (file: File, format?: 'csv' | 'jsonl') => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return api.post('/transactions/import', formData, {
+      params: { format },
+      headers: { 'Content-Type': 'multipart/form-data' },
+      timeout: 0,
+    });
+  },
+};
+
+// Report API calls
+// `currency` is the reporting currency; omitted, the server picks the one all accounts share
+export const reportAPI = {
+  getSummary: (params: { start_date?: string; end_date?: string; currency?: string } = {}) =>
+    api.get('/reports/summary', { params }),
+
+  getNetWorth: (params: { currency?: string } = {}) =>
+    api.get('/reports/net-worth', { params }),
+};
+
+// Analytics API calls (amounts in the user's reporting currency)
+export const analyticsAPI = {
+  getTrends: (params: {
+    transaction_type?: 'income' | 'expense';
+    interval?: 'week' | 'month';
+    periods?: number;
+    window?: number;
+  } = {}) => api.get('/analytics/trends', { params }),
+
+  getForecast: (params: {
+    transaction_type?: 'income' | 'expense';
+    method?: 'linear' | 'seasonal';
+    history?: number;
+  } = {}) => api.get('/analytics/forecast', { params }),
+
+  getAnomalies: (params: {
+    transaction_type?: 'income' | 'expense';
+    method?: 'mad' | 'zscore';
+    threshold?: number;
+    days?: number;
+    limit?: number;
+  } = {}) => api.get('/analytics/anomalies', { params }),
 };
 
 // Category API calls
@@ -109,7 +184,7 @@ export const categoryAPI = {
 
 // Budget API calls
 export const budgetAPI = {
-  getBudgets: () => api.get('/budgets'),
+  getBudgets: (params: { with_progress?: boolean } = {}) => api.get('/budgets', { params }),
 
   createBudget: (budgetData: {
     category_id: number;
@@ -128,6 +203,18 @@ export const budgetAPI = {
   deleteBudget: (id: number) => api.delete(`/budgets/${id}`),
 };
 
+// Batch: ordered writes applied atomically; "$n" in an id refers to the row created by operation n
+export interface BatchOperation {
+  op: 'create' | 'update' | 'delete';
+  entity: 'accounts' | 'categories' | 'transactions' | 'budgets';
+  id?: number | string;
+  data?: Record<string, unknown>;
+}
+
+export const batchAPI = {
+  apply: (operations: BatchOperation[]) => api.post('/batch', { operations }),
+};
+
 export default api;
 
 // Settings API calls